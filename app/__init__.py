@@ -4,23 +4,47 @@ from flask import Flask, make_response, render_template, request
 from werkzeug.middleware.shared_data import SharedDataMiddleware
 from werkzeug.utils import redirect
 
-from app.models import Usuario
+from app.authentication import get_session_user
 
 
-def create_app(with_static=True):
+def create_app(with_static=True, with_metrics=None):
     new_app = Flask(__name__)
 
+    from app.metrics import METRICS_ENABLED, init_metrics
+
+    if METRICS_ENABLED if with_metrics is None else with_metrics:
+        init_metrics(new_app)
+
     @new_app.route("/")
     def home_page():
-        session_key = request.cookies.get("sessionId", False)
-        if session_key:
-            logged_user = Usuario.get_by_session_id(session_key)
+        logged_user = get_session_user()
 
-            if logged_user is not None:
-                return redirect(f"/usuario/{logged_user.username}/dashboard")
+        if logged_user is not None:
+            return redirect(f"/usuario/{logged_user.username}/dashboard")
 
         return make_response(render_template("home.html"))
 
+    from app.passwords import init_passwords
+
+    init_passwords(new_app)
+
+    from app.db import init_db
+
+    init_db(new_app)
+
+    from app.query_log import init_query_log
+
+    init_query_log(new_app)
+
+    from app.models.referencia import preload_reference_data
+
+    preload_reference_data()
+
+    from app.models.sesion import SESSION_MAINTENANCE, start_session_maintenance
+
+    if SESSION_MAINTENANCE:
+        start_session_maintenance()
+
     from app.db_cli import db_setup
 
     new_app.cli.add_command(db_setup)
@@ -1,8 +1,14 @@
-from flask import Blueprint, jsonify, request
+import functools
+from datetime import timezone
+
+from flask import Blueprint, Response, jsonify, make_response, request
 
 from app.authentication import need_authorization, required_login
-from app.db import context_db_manager
-from app.models import Proyecto, Roles, Usuario
+from app.db import atomic_request, context_db_manager
+from app.models import HistorialProyecto, Proyecto, Referencia, Roles, Usuario
+from app.models.historial import history_range
+from app.models.metricas import MetricasProyecto
+from app.models.version_proyecto import VersionProyecto, cached_aggregate
 from app.validation.full import validate_project
 
 project_service = Blueprint(
@@ -12,100 +18,104 @@ project_service = Blueprint(
 )
 
 
+# agregados que no dependen del usuario, cacheados por versión del proyecto
+_AGGREGATES = {
+    "gral_stats": MetricasProyecto.general,
+    "tareas_equipo": MetricasProyecto.tasks_per_team,
+    "miembros_equipo": MetricasProyecto.members_per_team,
+    "estado_tareas": MetricasProyecto.tasks_per_status,
+}
+
+
+def _cache_bypassed():
+    # ?sin_cache=1 recalcula la respuesta, para depurar. No se usa
+    # Cache-Control: fetch() lo envía en cada pedido con cache "no-store"
+    return bool(request.args.get("sin_cache"))
+
+
+def _cached(db, proyect_id, name):
+    return cached_aggregate(
+        proyect_id,
+        name,
+        lambda: _AGGREGATES[name](db.cursor, proyect_id),
+        bypass=_cache_bypassed(),
+    )
+
+
+def _conditional(func):
+    """GET condicional con la versión del proyecto como ETag.
+
+    Si el cliente envía el ETag (If-None-Match) o la fecha
+    (If-Modified-Since) vigentes se responde 304 sin ejecutar func;
+    si no, se agregan ETag y Last-Modified a su respuesta. Debe ir
+    después de need_authorization.
+    """
+
+    @functools.wraps(func)
+    def wrapper(username, proyect_id, *args, **kwargs):
+        if not str(proyect_id).isdigit() or _cache_bypassed():
+            return func(username, proyect_id, *args, **kwargs)
+
+        version, modified = VersionProyecto.read(int(proyect_id))
+        # los nombres de los estados vienen de los datos de referencia
+        etag = f"p{proyect_id}-v{version}-r{Referencia.version()}"
+
+        if modified is not None:
+            modified = modified.replace(tzinfo=timezone.utc)
+
+        if request.if_none_match:
+            not_modified = request.if_none_match.contains_weak(etag)
+        else:
+            since = request.if_modified_since
+            not_modified = None not in (modified, since) and modified <= since
+
+        if not_modified:
+            response = Response(status=304)
+        else:
+            response = make_response(func(username, proyect_id, *args, **kwargs))
+
+            if response.status_code != 200:
+                return response
+
+        response.set_etag(etag, weak=True)
+        response.last_modified = modified
+        # el navegador puede guardarla pero debe revalidarla siempre
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+
+        return response
+
+    return wrapper
+
+
 @project_service.get("/proyecto/<proyect_id>/gral_stats")
 @required_login
 @need_authorization
+@_conditional
 def general_stats(username, proyect_id):
     with context_db_manager(dict=True) as db:
-        db.execute(
-            """select
-            COALESCE(e.total_equipos, 0)  as "total_equipos"
-            , COALESCE(tt.total_tareas, 0)  as "total_tareas"
-            , COALESCE(ipr.total_integrantes, 0)  as "total_integrantes"
-            from proyecto as p
-            left join
-            (select proyecto, count(id) as total_equipos from equipo group by proyecto)
-            as e
-            on p.id = e.proyecto
-            left join
-            (select proyecto, count(id) as total_tareas from ticket_tarea group by proyecto)
-            as tt
-            on p.id = tt.proyecto
-            inner join
-            (select proyecto, count(id) as total_integrantes from integrantes_proyecto group by proyecto)
-            as ipr
-            on p.id = ipr.proyecto
-            where p.id = %s
-            group by p.id;""",
-            (proyect_id,),
-        )
-
-        data = db.fetchall()
+        data = _cached(db, proyect_id, "gral_stats")
 
-    if data is None or not data:
+    if data is None:
         not_found = jsonify(message="El recurso solicitado no fue encontrado")
         not_found.status = 404
         return not_found
 
-    return jsonify(**data[0])
+    return jsonify(**data)
 
 
 @project_service.get("/proyecto/<proyect_id>/user_stats")
 @required_login
 @need_authorization
+@_conditional
 def user_stats(username, proyect_id):
     with context_db_manager(dict=True) as db:
-        data = {}
-
-        total_tasks_n_teams = """SELECT
-                COUNT(me.id) AS total_equipos
-                , COALESCE(SUM(asigt.total), 0) AS total_tareas
-                FROM usuario AS u
-                INNER JOIN integrantes_proyecto AS ipr
-                ON u.id = ipr.integrante
-                INNER JOIN miembros_equipo AS me
-                ON ipr.id = me.miembro
-                INNER JOIN
-                (SELECT COUNT(id) AS total, miembro FROM asignacion_tarea group by miembro) AS asigt
-                ON me.id = asigt.miembro
-                WHERE ipr.proyecto = %s AND u.username = %s"""
-
-        db.execute(total_tasks_n_teams, (proyect_id, username))
-        total_tasks_n_teams = db.fetchall()
-
-        if total_tasks_n_teams is None:
-            not_found = jsonify(message="El recurso solicitado no fue encontrado")
-            not_found.status = 404
-            return not_found
-
-        data.update(total_tasks_n_teams[0])
-        data["total_tareas"] = int(data["total_tareas"])
-        total_per_state = """SELECT
-                st.nombre, COUNT(tt.id) AS "total"
-                FROM usuario AS u
-                INNER JOIN integrantes_proyecto AS ipr
-                ON u.id = ipr.integrante
-                INNER JOIN miembros_equipo AS me
-                ON ipr.id = me.miembro
-                INNER JOIN asignacion_tarea AS asigt
-                ON me.id = asigt.miembro
-                INNER JOIN ticket_tarea AS tt
-                ON asigt.ticket_tarea = tt.id
-                INNER JOIN estado AS st
-                ON tt.estado = st.id
-                WHERE ipr.proyecto = %s AND u.username = %s
-                group by st.nombre
-                order by st.id;"""
-
-        db.execute(total_per_state, (proyect_id, username))
-        query_result = db.fetchall()
-
-        if query_result is None:
-            not_found = jsonify(message="El recurso solicitado no fue encontrado")
-            not_found.status = 404
-            return not_found
+        data = MetricasProyecto.of_user(db.cursor, proyect_id, username)
 
-        data["por_estado"] = query_result
+    if data is None:
+        not_found = jsonify(message="El recurso solicitado no fue encontrado")
+        not_found.status = 404
+        return not_found
 
     return jsonify(**data)
 
@@ -113,25 +123,12 @@ def user_stats(username, proyect_id):
 @project_service.get("/proyecto/<proyect_id>/tareas_equipo")
 @required_login
 @need_authorization
+@_conditional
 def task_per_team(username, proyect_id):
     data = None
 
     with context_db_manager(dict=True) as db:
-        db.execute(
-            """select
-            e.id, e.nombre, count(tt.id) as total
-            from proyecto as p
-            inner join equipo as e
-            on p.id = e.proyecto
-            left join ticket_tarea as tt
-            on e.id = tt.equipo
-            where p.id = %s
-            group by e.id
-            """,
-            (proyect_id,),
-        )
-
-        data = db.fetchall()
+        data = _cached(db, proyect_id, "tareas_equipo")
 
     if data is None or not data:
         not_found = jsonify(message="El recurso solicitado no fue encontrado")
@@ -144,23 +141,12 @@ def task_per_team(username, proyect_id):
 @project_service.get("/proyecto/<proyect_id>/miembros_equipo")
 @required_login
 @need_authorization
+@_conditional
 def members_per_team(username, proyect_id):
     data = None
 
     with context_db_manager(dict=True) as db:
-        db.execute(
-            """select
-            e.id, e.nombre, count(m.id) as "total"
-            from equipo as e
-            inner join miembros_equipo as m
-            on e.id = m.equipo
-            where e.proyecto = %s
-            group by e.id
-            """,
-            (proyect_id,),
-        )
-
-        data = db.fetchall()
+        data = _cached(db, proyect_id, "miembros_equipo")
 
     if data is None or not data:
         not_found = jsonify(message="El recurso solicitado no fue encontrado")
@@ -173,25 +159,12 @@ def members_per_team(username, proyect_id):
 @project_service.get("/proyecto/<proyect_id>/estado_tareas")
 @required_login
 @need_authorization
+@_conditional
 def tasks_per_status(username, proyect_id):
     data = None
 
     with context_db_manager(dict=True) as db:
-        db.execute(
-            """select 
-            st.id, st.nombre,
-            IFNULL(count(tt.id), 0) as total
-            from estado as st
-            left join ticket_tarea as tt
-            on st.id = tt.estado
-            and tt.proyecto = %s
-            group by st.id
-            order by st.id
-            """,
-            (proyect_id,),
-        )
-
-        data = db.fetchall()
+        data = _cached(db, proyect_id, "estado_tareas")
 
     if data is None or not data:
         not_found = jsonify(message="El recurso solicitado no fue encontrado")
@@ -201,9 +174,60 @@ def tasks_per_status(username, proyect_id):
     return jsonify(*data)
 
 
+@project_service.get("/proyecto/<proyect_id>/metrics_bundle")
+@required_login
+@need_authorization
+@_conditional
+def metrics_bundle(username, proyect_id):
+    """Todas las métricas de la página del proyecto en una respuesta:
+    una sola autorización y un solo cursor sobre la conexión del request,
+    con la forma de cada endpoint individual bajo su nombre."""
+
+    with context_db_manager(dict=True) as db:
+        general = _cached(db, proyect_id, "gral_stats")
+
+        if general is None:
+            not_found = jsonify(message="El recurso solicitado no fue encontrado")
+            not_found.status = 404
+            return not_found
+
+        data = {
+            "gral_stats": general,
+            "user_stats": MetricasProyecto.of_user(db.cursor, proyect_id, username),
+            "tareas_equipo": _cached(db, proyect_id, "tareas_equipo"),
+            "miembros_equipo": _cached(db, proyect_id, "miembros_equipo"),
+            "estado_tareas": _cached(db, proyect_id, "estado_tareas"),
+        }
+
+    return jsonify(**data)
+
+
+@project_service.get("/proyecto/<proyect_id>/historial")
+@required_login
+@need_authorization
+def project_history(username, proyect_id):
+    """Fotos diarias de las métricas del proyecto entre `desde` y `hasta`
+    (AAAA-MM-DD, por defecto los últimos HISTORY_DEFAULT_DAYS días).
+    Sin _conditional: las fotos cambian con db-cli rollup-history, no
+    con la versión del proyecto."""
+
+    try:
+        desde, hasta = history_range(
+            request.args.get("desde"), request.args.get("hasta")
+        )
+    except ValueError as error:
+        return jsonify(message=str(error)), 400
+
+    with context_db_manager(dict=True) as db:
+        data = HistorialProyecto.history(db.cursor, proyect_id, desde, hasta)
+
+    return jsonify(desde=desde.isoformat(), hasta=hasta.isoformat(), **data)
+
+
 @project_service.post("/proyecto/crear")
 @required_login
 @need_authorization
+@atomic_request
 def create_proyect(username):
 
     proyect_info: dict = {}
@@ -244,6 +268,7 @@ def create_proyect(username):
 @project_service.get("/proyecto/<proyect_id>")
 @required_login
 @need_authorization
+@_conditional
 def read_proyect(username, proyect_id):
     project_read = Proyecto.get_by_id(proyect_id)
 
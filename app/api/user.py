@@ -2,7 +2,7 @@ from flask import Blueprint, jsonify, request
 
 from app.authentication import need_authorization, required_login
 from app.db import context_db_manager
-from app.models import Usuario
+from app.models import Equipo, Proyecto, Ticket_Tarea, Usuario
 
 user_service = Blueprint(
     name="user_service",
@@ -32,3 +32,42 @@ def delete_user(username):
     success = jsonify(message="Eliminado exitosamente")
     success.status = 200
     return success
+
+
+def _page_response(username, page_of):
+    user = Usuario.get_by_username_or_mail(username)
+
+    if user is None:
+        not_found = jsonify(message="El recurso solicitado no fue encontrado")
+        not_found.status = 404
+        return not_found
+
+    page = page_of(
+        user.id,
+        despues=request.args.get("despues"),
+        antes=request.args.get("antes"),
+        cantidad=request.args.get("cantidad"),
+    )
+
+    return jsonify(**page.to_dict())
+
+
+@user_service.get("/proyectos")
+@required_login
+@need_authorization
+def user_projects_page(username):
+    return _page_response(username, Proyecto.page_of_participant)
+
+
+@user_service.get("/equipos")
+@required_login
+@need_authorization
+def user_teams_page(username):
+    return _page_response(username, Equipo.page_of_member)
+
+
+@user_service.get("/tareas")
+@required_login
+@need_authorization
+def user_tasks_page(username):
+    return _page_response(username, Ticket_Tarea.page_of_asigned_user)
@@ -1,20 +1,41 @@
+import copy
 import datetime
 import functools
 import secrets
 import types
 
-from flask import request
+from flask import g, has_request_context, request
+from itsdangerous import BadSignature, URLSafeTimedSerializer
 from werkzeug.utils import redirect
 from werkzeug.wrappers import Response
 
+import app.config as config
+import app.passwords as passwords
+import app.validation as validation
+from app.cache import session_cache
 from app.db import close_conn_cursor, get_connection
-from app.models import Equipo, Proyecto, Ticket_Tarea, Usuario
+from app.models import AccesoUsuario, Sesion, Usuario
+from app.models.sesion import SESSION_MAX_AGE
 
+# "db": la cookie es un id aleatorio cuyo hash se guarda en la tabla sesion
+# "signed": la cookie es un token firmado con el id de usuario y su
+# generación de sesión, verificable sin consultar la base de datos
+SESSION_MODE: str = getattr(config, "SESSION_MODE", "db")
 
-def generate_session_cookies() -> dict:
+
+def _session_serializer() -> URLSafeTimedSerializer:
+    secret_key = getattr(config, "SECRET_KEY", None)
+
+    if not secret_key:
+        raise RuntimeError("SESSION_MODE 'signed' requiere SECRET_KEY en app/config.py")
+
+    return URLSafeTimedSerializer(secret_key, salt="promanager-sesion")
+
+
+def generate_session_cookies(value: str | None = None) -> dict:
     """Función para generar las cookies de sesión de usuario.
     "key": "sessionId",
-    "value": id de sesión,
+    "value": id de sesión, aleatorio si no se indica,
     "max_age": 5 días,
     "expires": 5 días,
     "path": "/",
@@ -27,12 +48,12 @@ def generate_session_cookies() -> dict:
         dict: con los valores previamente expresados.
     """
 
-    max_age = datetime.timedelta(days=5)
+    max_age = SESSION_MAX_AGE
     expires = datetime.datetime.now(datetime.timezone.utc) + max_age
 
     session_cookies = {
         "key": "sessionId",
-        "value": secrets.token_urlsafe(16),
+        "value": value if value is not None else secrets.token_urlsafe(16),
         "max_age": max_age,
         "expires": expires,
         "path": "/",
@@ -44,84 +65,250 @@ def generate_session_cookies() -> dict:
     return session_cookies
 
 
-def _is_logged() -> bool:
-    request_session_id = request.cookies.get("sessionId", False)
+def start_session(user: Usuario, cursor=None) -> dict | None:
+    """Abrir una sesión para un usuario ya autenticado.
 
-    if not request_session_id:
-        return False
+    Args:
+        cursor (optional): cursor de la transacción en curso, para
+        registrar la sesión dentro de ella.
 
-    cnx = get_connection()
+    Returns:
+        dict | None: cookies de sesión, None si no pudo establecerse.
+    """
+
+    if SESSION_MODE == "signed":
+        token = _session_serializer().dumps({"u": user.id, "g": user.generacion_sesion})
+        return generate_session_cookies(token)
+
+    session_cookies = generate_session_cookies()
+
+    if not user.set_session_id(session_cookies["value"], cursor=cursor):
+        return None
+
+    return session_cookies
+
+
+def login(identif: str, passwd: str) -> tuple[Usuario | None, dict | None, list]:
+    """Autenticar e iniciar la sesión de un usuario.
+
+    Una sola consulta trae el perfil y el hash (por email o username según
+    el formato de la identificación) y la sesión se registra en la misma
+    transacción.
+
+    Returns:
+        tuple: (usuario, cookies de sesión, errores). Si hay errores el
+        usuario y las cookies son None.
+
+    Raises:
+        passwords.PasswordServiceError: el servicio de contraseñas
+        rechazó el intento.
+    """
+
+    by_email = validation.email_address(identif)
 
+    if not by_email and not validation.username_length(identif):
+        return None, None, ["La identificación ingresada no es válida"]
+
+    cnx = get_connection()
     cursor = cnx.cursor(dictionary=True)
 
-    cursor.execute(
-        "SELECT 1 FROM usuario WHERE llave_sesion = %s",
-        (request_session_id,),
-    )
+    try:
+        user, hashed_passwd = Usuario.get_for_login(cursor, identif, by_email)
 
-    key_exists = cursor.fetchone()
+        if user is None:
+            error = (
+                "Email no registrado"
+                if by_email
+                else "Nombre de usuario no registrado."
+            )
+            return None, None, [error]
 
-    close_conn_cursor(cnx, cursor)
+        if not passwords.check_password(passwd, hashed_passwd, identifier=identif):
+            return None, None, ["Error al autenticar. Contraseña o e-mail erróneos."]
 
-    if key_exists is None:
-        return False
+        new_hash = passwords.rehash_if_needed(passwd, hashed_passwd)
 
-    return True
+        if new_hash is not None:
+            Usuario.set_password_hash(cursor, user.id, new_hash)
 
+        session_cookies = start_session(user, cursor=cursor)
+
+        if session_cookies is None:
+            return None, None, ["Hubo un error al establecer su sesión."]
+
+        cnx.commit()
+    finally:
+        close_conn_cursor(cnx, cursor)
+
+    return user, session_cookies, []
+
+
+def end_session(session_id: str) -> None:
+    """Cerrar la sesión de la cookie indicada.
+
+    Los tokens firmados no pueden revocarse de a uno: en ese modo se
+    cierran todas las sesiones del usuario.
+    """
+
+    if SESSION_MODE == "signed":
+        user = get_session_user(session_id)
+
+        if user is not None:
+            Usuario.remove_session(user.id)
+
+        return
+
+    Sesion.end(session_id)
+    session_cache.pop(session_id)
+
+
+def _load_signed_session(token: str) -> Usuario | None:
+    """Verificar un token firmado y que su generación siga vigente,
+    es decir que no se haya cerrado la sesión desde que se emitió."""
+
+    try:
+        payload = _session_serializer().loads(
+            token, max_age=SESSION_MAX_AGE.total_seconds()
+        )
+    except BadSignature:
+        return None
+
+    user = Usuario.get_by_id(payload["u"])
+
+    if user is None or user.generacion_sesion != payload["g"]:
+        return None
+
+    return user
 
-def _has_access() -> bool:
-    request_session_id = request.cookies.get("sessionId", False)
-    resources_queried = _required_resources()
 
-    user_by_path = Usuario.get_by_username_or_mail(resources_queried["usuario"])
-    user_by_cookies = Usuario.get_by_session_id(request_session_id)
+def get_session_user(session_id: str | None = None) -> Usuario | None:
+    """Obtener el usuario dueño de una sesión.
 
-    user_by_path.load_session_key()
+    Las sesiones resueltas se guardan en session_cache, por lo que un
+    request con la cache caliente no consulta la base de datos para
+    identificar al usuario. Dentro de un request el resultado se
+    reutiliza en todas las verificaciones.
 
-    if user_by_path is None or user_by_cookies is None:
+    Args:
+        session_id (str, optional): id de sesión, por defecto el de las
+        cookies del request.
+
+    Returns:
+        Usuario | None: copia del usuario de la sesión, None si no existe.
+    """
+
+    if session_id is None:
+        session_id = request.cookies.get("sessionId", None)
+
+    if not session_id:
+        return None
+
+    in_request = has_request_context()
+
+    if in_request and g.get("session_id") == session_id:
+        return g.session_user
+
+    user = session_cache.get(session_id)
+
+    if user is None:
+        if SESSION_MODE == "signed":
+            user = _load_signed_session(session_id)
+        else:
+            user = Usuario.get_by_session_id(session_id)
+
+        if user is None:
+            return None
+
+        session_cache.set(session_id, user)
+
+    if SESSION_MODE != "signed":
+        Sesion.touch(session_id)
+
+    user = copy.copy(user)
+
+    if in_request:
+        g.session_id = session_id
+        g.session_user = user
+        # las lecturas del mismo usuario en el request retornan esta instancia
+        user.remember(session_id)
+
+    return user
+
+
+def _is_logged() -> bool:
+    return get_session_user() is not None
+
+
+def _has_access() -> bool:
+    resources_queried = _required_resources()
+    user_by_cookies = get_session_user()
+
+    if user_by_cookies is None:
         return False
 
-    if (
-        user_by_cookies.llave_sesion != user_by_path.llave_sesion
-        or user_by_cookies.username != user_by_path.username
+    # la ruta debe ser la del propio usuario en sesión
+    if resources_queried.get("usuario") not in (
+        user_by_cookies.username,
+        user_by_cookies.email,
     ):
         return False
 
     resources_queried.pop("usuario")
-    user_by_cookies.load_own_resources()
-
-    user_resources = {
-        "proyecto": [str(p["id proyecto"]) for p in user_by_cookies.proyectos],
-        "equipo": [str(e["id equipo"]) for e in user_by_cookies.equipos],
-        "tarea": [str(t["id tarea"]) for t in user_by_cookies.tareas],
-    }
 
     for resource, value in resources_queried.items():
-        if value not in user_resources[resource]:
+        if not user_has_access(user_by_cookies.id, resource, value):
             return False
 
     return True
 
 
-def _can_modify():
-    resources_queried = _required_resources()
+def _access(user_id: int, resource: str, resource_id: str | int) -> bool | None:
+    """Fila de acceso_usuario del usuario para el recurso, memorizada
+    durante el request. None si no tiene acceso, si lo tiene su
+    puede_modificar."""
 
-    request_session_id = request.cookies.get("sessionId", False)
-    user_in_session = Usuario.get_by_session_id(request_session_id)
+    if not str(resource_id).isdigit():
+        return None
 
-    if "proyecto" in resources_queried.keys():
-        required_proyect = Proyecto.get_by_id(resources_queried["proyecto"])
-        if not required_proyect.user_can_modify(user_in_session.id):
-            return False
+    key = (user_id, resource, int(resource_id))
+    checks = g.setdefault("access_checks", {}) if has_request_context() else {}
 
-    if "equipo" in resources_queried.keys():
-        required_team = Equipo.get_by_id(resources_queried["equipo"])
-        if not required_team.user_can_modify(user_in_session.id):
-            return False
+    if key not in checks:
+        checks[key] = AccesoUsuario.get(user_id, resource, int(resource_id))
 
-    if "tarea" in resources_queried.keys():
-        required_task = Ticket_Tarea.get_by_id(resources_queried["tarea"])
-        if not required_task.user_can_modify(user_in_session.id):
+    return checks[key]
+
+
+def user_has_access(user_id: int, resource: str, resource_id: str | int) -> bool:
+    """Verificar si un usuario participa de un proyecto, es miembro
+    de un equipo o tiene asignada una tarea.
+
+    Args:
+        user_id (int): id del usuario.
+        resource (str): "proyecto", "equipo" o "tarea".
+        resource_id (str | int): id del recurso, tal como llega en la ruta.
+
+    Returns:
+        bool: True si el usuario tiene acceso al recurso.
+    """
+
+    return _access(user_id, resource, resource_id) is not None
+
+
+def user_can_modify(user_id: int, resource: str, resource_id: str | int) -> bool:
+    """Verificar si un usuario puede modificar un proyecto, equipo o tarea."""
+
+    return _access(user_id, resource, resource_id) is True
+
+
+def _can_modify():
+    resources_queried = _required_resources()
+    resources_queried.pop("usuario", None)
+
+    user_in_session = get_session_user()
+
+    for resource, value in resources_queried.items():
+        if not user_can_modify(user_in_session.id, resource, value):
             return False
 
     return True
@@ -0,0 +1,99 @@
+""" Caches en memoria del proceso.
+    Cada cache tiene un tamaño máximo (se descarta la entrada usada
+    hace más tiempo) y un tiempo de vida por entrada.
+    Las caches son por proceso: una invalidación en un worker no
+    alcanza a los demás, el TTL acota cuánto puede durar esa diferencia.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+import app.config as config
+
+_MISSING = object()
+
+_caches: list["TTLCache"] = []
+_caches_lock = threading.Lock()
+
+
+class TTLCache:
+    """Cache LRU acotada con vencimiento por entrada y contadores
+    de aciertos y fallos."""
+
+    def __init__(self, name: str, maxsize: int, ttl: float) -> None:
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        with _caches_lock:
+            _caches.append(self)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+
+            if entry is _MISSING or entry[0] < now:
+                if entry is not _MISSING:
+                    del self._entries[key]
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def discard_where(self, predicate: Callable[[Hashable, Any], bool]) -> None:
+        """Invalidar todas las entradas para las que predicate(key, value)
+        sea verdadero."""
+
+        with self._lock:
+            for key in [k for k, (_, v) in self._entries.items() if predicate(k, v)]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+def all_caches() -> list[TTLCache]:
+    with _caches_lock:
+        return list(_caches)
+
+
+# id de sesión -> Usuario de esa sesión, ver app.authentication
+session_cache = TTLCache(
+    "sesiones",
+    maxsize=getattr(config, "SESSION_CACHE_SIZE", 10000),
+    ttl=getattr(config, "SESSION_CACHE_TTL", 60.0),
+)
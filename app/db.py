@@ -2,15 +2,360 @@
     Utilería apara la creación de la DB y sus tablas.
     Obtención y manejo de conexciones.
 """
+import functools
 import os
+import re
+import threading
+import time
+import types
 
 import mysql.connector
+from flask import Flask, Response, g, has_request_context
 from mysql.connector import Error as dbError
+from mysql.connector import errorcode
 from mysql.connector.connection import MySQLConnection
 from mysql.connector.cursor import CursorBase
-from mysql.connector.pooling import PooledMySQLConnection
-
+from mysql.connector.errors import PoolError
+from mysql.connector.pooling import (
+    CONNECTION_POOL_LOCK,
+    MySQLConnectionPool,
+    PooledMySQLConnection,
+)
+
+import app.config as config
 from app.config import DB_CONFIG, DB_NAME, TEST_DB
+from app.query_log import InstrumentedCursor
+
+# Envolver cada request en una unica transaccion, ver atomic_request
+ATOMIC_REQUESTS: bool = getattr(config, "DB_ATOMIC_REQUESTS", False)
+
+# Parametros del pool, sobreescribibles desde app/config.py.
+# mysql-connector no admite pools de mas de 32 conexiones.
+POOL_SIZE: int = getattr(config, "DB_POOL_SIZE", 5)
+# segundos que se espera por una conexion libre antes de fallar
+POOL_TIMEOUT: float = getattr(config, "DB_POOL_TIMEOUT", 10.0)
+# segundos de vida maxima de una conexion antes de reconectarla, 0 desactiva
+POOL_RECYCLE: float = getattr(config, "DB_POOL_RECYCLE", 3600.0)
+
+
+class ConnectionPool(MySQLConnectionPool):
+    """Pool de conexiones sobre mysql.connector.pooling.
+
+    Las conexiones entregadas son PooledMySQLConnection, por lo que
+    llamar a .close() las devuelve al pool en lugar de cerrarlas.
+    Al retirar una conexion se verifica que siga viva (ping) y se
+    reconecta si esta caida o si supero POOL_RECYCLE segundos de vida.
+    Si no hay conexiones libres se espera hasta POOL_TIMEOUT segundos.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = POOL_SIZE,
+        timeout: float = POOL_TIMEOUT,
+        recycle: float = POOL_RECYCLE,
+        **kwargs,
+    ) -> None:
+        self.timeout = timeout
+        self.recycle = recycle
+        self._available = threading.Condition()
+        self._in_use = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._timeouts = 0
+
+        super().__init__(pool_size=pool_size, **kwargs)
+
+    def get_connection(self) -> PooledMySQLConnection:
+        start = time.perf_counter()
+        deadline = start + self.timeout
+        waited = False
+
+        while True:
+            try:
+                pooled = super().get_connection()
+                break
+            except PoolError:
+                with self._available:
+                    # una devolucion pudo ocurrir entre el intento y el lock
+                    if self._cnx_queue.qsize():
+                        continue
+
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolError(
+                            f"No hubo conexiones libres en {self.timeout}s "
+                            f"(pool de {self.pool_size})"
+                        )
+
+                    waited = True
+                    self._available.wait(remaining)
+
+        created_at = getattr(pooled._cnx, "pool_created_at", None)
+        now = time.monotonic()
+
+        if created_at is None:
+            pooled._cnx.pool_created_at = now
+        elif self.recycle and now - created_at > self.recycle:
+            try:
+                pooled._cnx.reconnect()
+            except Exception:
+                # la conexion vuelve a la cola sin contarse en uso, se
+                # intenta reconectarla de nuevo al retirarla otra vez
+                with CONNECTION_POOL_LOCK:
+                    self._queue_connection(pooled._cnx)
+
+                with self._available:
+                    self._available.notify()
+
+                raise
+
+            pooled._cnx.pool_created_at = now
+
+        with self._available:
+            self._in_use += 1
+            self._checkouts += 1
+            if waited:
+                self._waits += 1
+                self._wait_time += time.perf_counter() - start
+
+        return pooled
+
+    def add_connection(self, cnx=None) -> None:
+        super().add_connection(cnx)
+
+        # cnx es None solo cuando el pool crea conexiones nuevas
+        if cnx is not None:
+            with self._available:
+                self._in_use -= 1
+                self._available.notify()
+
+    def stats(self) -> dict:
+        """Estado del pool para dimensionarlo por worker."""
+
+        with self._available:
+            return {
+                "size": self.pool_size,
+                "in_use": self._in_use,
+                "idle": self._cnx_queue.qsize(),
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "wait_time": self._wait_time,
+                "timeouts": self._timeouts,
+            }
+
+
+_pools: dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(connect_test_db: bool = False) -> ConnectionPool:
+    """Obtener (creandolo la primera vez) el pool de la base de datos
+    de la aplicacion o de la de testing."""
+
+    database = TEST_DB if connect_test_db else DB_NAME
+
+    with _pools_lock:
+        if database not in _pools:
+            # cursores con buffer por defecto: una conexion devuelta al pool
+            # no puede quedar con resultados sin leer
+            _pools[database] = ConnectionPool(
+                pool_name=f"promanager_{database}",
+                **{**DB_CONFIG, "database": database, "buffered": True},
+            )
+
+        return _pools[database]
+
+
+def pool_stats() -> dict[str, dict]:
+    """Estadisticas de cada pool creado, por nombre de base de datos."""
+
+    with _pools_lock:
+        pools = dict(_pools)
+
+    return {database: pool.stats() for database, pool in pools.items()}
+
+
+class TracedConnection:
+    """Conexion del pool cuyos cursores registran cada consulta
+    (ver app.query_log)."""
+
+    def __init__(self, connection: PooledMySQLConnection) -> None:
+        self._cnx = connection
+
+    def __getattr__(self, attr):
+        return getattr(self._cnx, attr)
+
+    def cursor(self, *args, **kwargs) -> InstrumentedCursor:
+        return InstrumentedCursor(self._cnx.cursor(*args, **kwargs))
+
+    def close(self) -> None:
+        self._cnx.close()
+
+
+class RequestConnection(TracedConnection):
+    """Conexion del pool compartida por todas las consultas de un request.
+
+    Los modelos la usan como una conexion mas: .close() no la devuelve
+    al pool (eso ocurre en el teardown del request) y, si el request es
+    atomico, .commit() no confirma nada: la transaccion se confirma con
+    finish() antes de enviar la respuesta.
+    """
+
+    def __init__(self, connection: PooledMySQLConnection, atomic: bool = False):
+        super().__init__(connection)
+        self.atomic = atomic
+
+    def commit(self) -> None:
+        if not self.atomic:
+            self._cnx.commit()
+
+    def close(self) -> None:
+        """No-op, la conexion se libera con release()"""
+
+    def finish(self, commit: bool) -> None:
+        """Confirmar o deshacer la transaccion de un request atomico."""
+
+        if not self.atomic:
+            return
+
+        if commit:
+            self._cnx.commit()
+        else:
+            self._cnx.rollback()
+
+    def release(self, exc: BaseException | None = None) -> None:
+        """Devolver la conexion al pool. Lo que un request atomico no
+        confirmo con finish() (p. ej. si la respuesta no llego a
+        armarse) se deshace."""
+
+        try:
+            if self.atomic:
+                self._cnx.rollback()
+        finally:
+            self._cnx.close()
+
+
+class StreamingConnection(TracedConnection):
+    """Conexion del pool propia de una lectura en streaming.
+
+    Sus cursores sin buffer retienen la conexion hasta leer la ultima
+    fila, por lo que no se comparte con el resto del request. Al
+    cerrarla se descartan las filas que no se hayan leido antes de
+    devolverla al pool; cerrarla mas de una vez no hace nada.
+    """
+
+    def __init__(self, connection: PooledMySQLConnection) -> None:
+        super().__init__(connection)
+        self.closed = False
+
+    def close(self) -> None:
+        if self.closed:
+            return
+
+        self.closed = True
+
+        try:
+            if self._cnx.unread_result:
+                self._cnx.consume_results()
+        finally:
+            self._cnx.close()
+
+
+def get_streaming_connection(connect_test_db: bool = False) -> StreamingConnection:
+    """Conexion exclusiva para leer con cursor(buffered=False).
+
+    Dentro de un request se cierra, si quedo abierta, al terminar el
+    request; con stream_template eso ocurre al terminar la respuesta.
+    """
+
+    connection = StreamingConnection(get_pool(connect_test_db).get_connection())
+
+    if has_request_context():
+        g.setdefault("db_streaming_connections", []).append(connection)
+
+    return connection
+
+
+def _request_connection(connect_test_db: bool = False) -> RequestConnection:
+    database = TEST_DB if connect_test_db else DB_NAME
+    connections = g.setdefault("db_connections", {})
+
+    if database not in connections:
+        connections[database] = RequestConnection(
+            get_pool(connect_test_db).get_connection(),
+            atomic=g.get("db_atomic", ATOMIC_REQUESTS),
+        )
+
+    return connections[database]
+
+
+def release_request_connections(exc: BaseException | None = None) -> None:
+    """Teardown: liberar las conexiones tomadas durante el request."""
+
+    connections = g.pop("db_connections", {})
+    # lecturas en streaming que no llegaron a su ultima fila
+    streaming = g.pop("db_streaming_connections", [])
+
+    for connection in [*connections.values(), *streaming]:
+        try:
+            if isinstance(connection, RequestConnection):
+                connection.release(exc)
+            else:
+                connection.close()
+        except dbError as exception:
+            # TODO: Loggear este output a algun lugar
+            print(f"There was an error while releasing a connection:\n {exception}")
+
+
+def finish_request_transactions(response: Response) -> Response:
+    """after_request: confirmar las transacciones de los requests
+    atomicos antes de enviar la respuesta, o deshacerlas si la
+    respuesta no es 2xx/3xx. Si el commit falla se responde 500 en
+    lugar de la respuesta de la vista."""
+
+    commit = response.status_code < 400
+
+    for connection in g.get("db_connections", {}).values():
+        try:
+            connection.finish(commit)
+        except dbError as exception:
+            # TODO: Loggear este output a algun lugar
+            print(f"There was an error while committing the request:\n {exception}")
+
+            # las conexiones siguientes se deshacen en el teardown
+            return Response(
+                "No se pudieron guardar los cambios, intente nuevamente.",
+                status=500,
+            )
+
+    return response
+
+
+def atomic_request(func: types.FunctionType):
+    """Decorador que ejecuta todas las escrituras del request en una
+    sola transaccion, confirmada antes de enviar la respuesta si esta
+    es 2xx/3xx y deshecha si no (ver finish_request_transactions)."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        g.db_atomic = True
+
+        for connection in g.get("db_connections", {}).values():
+            connection.atomic = True
+
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+def init_db(app: Flask) -> None:
+    """Registrar la confirmacion y la liberacion de conexiones por
+    request en la aplicación."""
+
+    app.after_request(finish_request_transactions)
+    app.teardown_appcontext(release_request_connections)
 
 
 class context_db_manager:
@@ -20,7 +365,7 @@ class context_db_manager:
         named_tuple: bool = False,
         test_db: bool = False,
     ) -> None:
-        self.db_config = DB_CONFIG
+        self.test_db = test_db
         self.type = None
         self.connection = None
         self.cursor = None
@@ -32,13 +377,8 @@ class context_db_manager:
         elif named_tuple:
             self.type = {"named_tuple": True}
 
-        if test_db:
-            self.db_config["database"] = TEST_DB
-        else:
-            self.db_config["database"] = DB_NAME
-
     def __enter__(self):
-        self.connection = mysql.connector.connect(**self.db_config)
+        self.connection = get_connection(connect_test_db=self.test_db)
         if self.type is not None:
             self.cursor = self.connection.cursor(**self.type)
         else:
@@ -140,13 +480,120 @@ def crear_schemas(test_db: bool = False) -> None:
             # TODO: Loggear este output a algun lugar que no sea stdout
             print(
                 f"Hubo un problema al crear las tablas de\
-                    {DB_CONFIG['database']}:\n{exception}"
+                    {TEST_DB if test_db else DB_NAME}:\n{exception}"
             )
 
     cnx.commit()
     cursor.close()
     cnx.close()
 
+    # CREATE TABLE IF NOT EXISTS no modifica las tablas ya creadas
+    agregar_columnas(test_db=test_db)
+    crear_triggers(test_db=test_db)
+
+
+def crear_triggers(test_db: bool = False) -> None:
+    """Crear, o reemplazar si ya existen, los triggers de triggers.sql.
+
+    Args:
+        test_db (bool): crearlos en la base de datos de testing.
+    """
+
+    triggers_file = os.path.join(os.path.dirname(__file__), "triggers.sql")
+
+    with open(triggers_file, encoding="utf8") as triggers:
+        # separar cada CREATE TRIGGER, delimitados por '-- trigger'
+        # y quitar el comentario inicial
+        triggers_commands = triggers.read().split("-- trigger")[1:]
+
+    cnx = get_connection(connect_test_db=test_db)
+    cursor = cnx.cursor()
+
+    for trigger in triggers_commands:
+        name = re.search(r"CREATE TRIGGER (\w+)", trigger).group(1)
+
+        try:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+            cursor.execute(trigger)
+        except dbError as exception:
+            # TODO: Loggear este output a algun lugar que no sea stdout
+            print(
+                f"Hubo un problema al crear el trigger {name} de\
+                    {TEST_DB if test_db else DB_NAME}:\n{exception}"
+            )
+
+    cursor.close()
+    cnx.close()
+
+
+# columnas de schema.sql, para bases creadas antes de agregarlas
+SCHEMA_COLUMNS: tuple[str, ...] = (
+    "ALTER TABLE usuario ADD COLUMN generacion_sesion INT NOT NULL DEFAULT 0",
+)
+
+
+def agregar_columnas(test_db: bool = False) -> int:
+    """Agregar a las tablas existentes las columnas que les falten, las
+    que ya existen se saltean.
+
+    Returns:
+        int: cantidad de columnas agregadas.
+    """
+
+    cnx = get_connection(connect_test_db=test_db)
+    cursor = cnx.cursor()
+    added = 0
+
+    for statement in SCHEMA_COLUMNS:
+        try:
+            cursor.execute(statement)
+            added += 1
+        except dbError as exception:
+            if exception.errno != errorcode.ER_DUP_FIELDNAME:
+                raise
+
+    cursor.close()
+    cnx.close()
+
+    return added
+
+
+# indices de busqueda de schema.sql, para bases creadas antes de agregarlos
+SEARCH_INDEXES: tuple[str, ...] = (
+    "ALTER TABLE proyecto ADD INDEX proyecto_nombre (nombre(20))",
+    "ALTER TABLE proyecto ADD FULLTEXT INDEX proyecto_busqueda (nombre, descripcion)",
+    "ALTER TABLE equipo ADD INDEX equipo_nombre (nombre(20))",
+    "ALTER TABLE equipo ADD FULLTEXT INDEX equipo_busqueda (nombre)",
+    "ALTER TABLE ticket_tarea ADD INDEX tarea_nombre (nombre(20))",
+    "ALTER TABLE ticket_tarea ADD FULLTEXT INDEX tarea_busqueda (nombre, descripcion)",
+)
+
+
+def crear_indices_busqueda(test_db: bool = False) -> int:
+    """Agregar a las tablas existentes los indices de busqueda que les
+    falten, los que ya existen se saltean.
+
+    Returns:
+        int: cantidad de indices creados.
+    """
+
+    cnx = get_connection(connect_test_db=test_db)
+    cursor = cnx.cursor()
+    created = 0
+
+    for statement in SEARCH_INDEXES:
+        try:
+            cursor.execute(statement)
+            created += 1
+        except dbError as exception:
+            if exception.errno != errorcode.ER_DUP_KEYNAME:
+                raise
+
+    cursor.close()
+    cnx.close()
+
+    return created
+
 
 def tirar_base_de_datos(test_db: bool = False) -> None:
     cnx = mysql.connector.connect(**DB_CONFIG)
@@ -177,6 +624,7 @@ def tirar_tablas_raiz(test_db: bool = False) -> None:
         cursor.execute("DROP TABLE IF EXISTS roles_equipo")
         cursor.execute("DROP TABLE IF EXISTS roles_proyecto")
         cursor.execute("DROP TABLE IF EXISTS estado")
+        cursor.execute("DROP TABLE IF EXISTS version_referencia")
     except dbError as exception:
         # TODO: Loggear este output a algun lugar
         print(f"There was an error while dropping the root tables:\n {exception}")
@@ -211,6 +659,14 @@ def tirar_tablas_hoja(test_db: bool = False) -> None:
 
     try:
         cursor.execute("DROP TABLE IF EXISTS asignacion_tarea")
+        cursor.execute("DROP TABLE IF EXISTS acceso_usuario")
+        cursor.execute("DROP TABLE IF EXISTS sesion")
+        cursor.execute("DROP TABLE IF EXISTS version_proyecto")
+        cursor.execute("DROP TABLE IF EXISTS contadores_proyecto")
+        cursor.execute("DROP TABLE IF EXISTS contadores_equipo")
+        cursor.execute("DROP TABLE IF EXISTS contadores_estado")
+        cursor.execute("DROP TABLE IF EXISTS historial_proyecto")
+        cursor.execute("DROP TABLE IF EXISTS historial_version")
     except dbError as exception:
         # TODO: Loggear este output a algun lugar
         print(f"There was an error while dropping the leaf tables:\n {exception}")
@@ -222,30 +678,31 @@ def tirar_tablas_hoja(test_db: bool = False) -> None:
 
 def get_connection(
     connect_test_db: bool = False,
-) -> MySQLConnection | PooledMySQLConnection:
-    """Obtain a mysql-connector connection object
+) -> TracedConnection:
+    """Obtain a pooled mysql-connector connection object whose cursors
+    are instrumented. Calling .close() on it returns it to the pool.
 
-    return: mysql.connector.connect(config)
-    """
+    Inside a Flask request every call returns the same connection,
+    released when the request ends.
 
-    if connect_test_db:
-        DB_CONFIG["database"] = TEST_DB
-    else:
-        DB_CONFIG["database"] = DB_NAME
+    return: TracedConnection | RequestConnection
+    """
 
-    connection = mysql.connector.connect(**DB_CONFIG)
+    if has_request_context():
+        return _request_connection(connect_test_db)
 
-    return connection
+    return TracedConnection(get_pool(connect_test_db).get_connection())
 
 
 def close_conn_cursor(
     connection: MySQLConnection, cursor: CursorBase | list[CursorBase]
 ) -> None:
-    """Función para facilitar el cierre de conexión y cursores de MYSQL"""
+    """Función para facilitar el cierre de cursores de MYSQL
+    y la devolución de la conexión a su pool"""
 
     if isinstance(cursor, list):
         for c in cursor:
-            cursor.close()
+            c.close()
     else:
         cursor.close()
 
@@ -1,6 +1,8 @@
 import click
 from app.db import (
+    agregar_columnas,
     crear_base_de_datos,
+    crear_indices_busqueda,
     crear_schemas,
     tirar_base_de_datos,
     tirar_tablas_hoja,
@@ -9,6 +11,18 @@ from app.db import (
 )
 from flask.cli import AppGroup
 
+import app.passwords as passwords
+from app.models import (
+    AccesoUsuario,
+    Contadores,
+    HistorialProyecto,
+    Referencia,
+    Sesion,
+    Usuario,
+)
+from app.models.metricas import QUERIES, MetricasProyecto
+from app.models.referencia import REFERENCE_CHECK_INTERVAL
+
 db_setup: AppGroup = AppGroup("db-cli")
 
 
@@ -142,3 +156,209 @@ def drop_tables(test_db: bool = False):
     tirar_tablas_hoja(test_db=test_db)
     tirar_tablas_rama(test_db=test_db)
     tirar_tablas_raiz(test_db=test_db)
+
+
+@db_setup.command("add-columns")
+@click.option(
+    "--test-db",
+    "-t",
+    is_flag=True,
+    help="usar db de pruebas 'promanager_test'",
+)
+def add_columns(test_db: bool = False):
+    """Agregar las columnas nuevas de schema.sql a una base creada antes
+    de que estuvieran, también lo hace create-schemas"""
+
+    added = agregar_columnas(test_db=test_db)
+    click.echo(f"columnas agregadas: {added}")
+
+
+@db_setup.command("create-search-indexes")
+@click.option(
+    "--test-db",
+    "-t",
+    is_flag=True,
+    help="usar db de pruebas 'promanager_test'",
+)
+def create_search_indexes(test_db: bool = False):
+    """Agregar los indices FULLTEXT y de prefijo de la busqueda a una
+    base creada antes de que estuvieran en schema.sql"""
+
+    created = crear_indices_busqueda(test_db=test_db)
+    click.echo(f"indices de busqueda creados: {created}")
+
+
+@db_setup.command("explain-metrics")
+@click.option(
+    "--test-db",
+    "-t",
+    is_flag=True,
+    help="usar db de pruebas 'promanager_test'",
+)
+def explain_metrics(test_db: bool = False):
+    """Verificar con EXPLAIN que ninguna consulta de métricas recorra
+    tablas completas, falla si alguna lo hace"""
+
+    sample = MetricasProyecto.explain_sample(test_db=test_db)
+
+    if sample is None:
+        raise click.ClickException("no hay proyectos con integrantes")
+
+    project_id, username, scans = sample
+    click.echo(f"planes para el proyecto {project_id} y el usuario {username}")
+
+    for scan in scans:
+        click.echo(
+            f"{scan['consulta']}: {scan['tabla']} recorrida completa "
+            f"({scan['tipo']}, ~{scan['filas']} filas)"
+        )
+
+    if scans:
+        raise click.ClickException(
+            "consultas de métricas que recorren tablas completas"
+        )
+
+    click.echo(f"{len(QUERIES)} consultas, ninguna recorre tablas completas")
+
+
+@db_setup.command("rebuild-access")
+@click.option(
+    "--test-db",
+    "-t",
+    is_flag=True,
+    help="usar db de pruebas 'promanager_test'",
+)
+@click.option(
+    "--verify-only",
+    "-v",
+    is_flag=True,
+    help="solo comparar acceso_usuario con las participaciones, sin reconstruir",
+)
+def rebuild_access(test_db: bool = False, verify_only: bool = False):
+    """Reconstruir y verificar la tabla acceso_usuario"""
+
+    if not verify_only:
+        inserted = AccesoUsuario.rebuild_all(test_db=test_db)
+        click.echo(f"acceso_usuario reconstruida: {inserted} filas")
+
+    drift = AccesoUsuario.verify(test_db=test_db)
+
+    for kind, total in drift.items():
+        click.echo(f"{kind}: {total}")
+
+    if any(drift.values()):
+        raise click.ClickException("acceso_usuario no coincide con las participaciones")
+
+
+@db_setup.command("recount")
+@click.option(
+    "--test-db",
+    "-t",
+    is_flag=True,
+    help="usar db de pruebas 'promanager_test'",
+)
+@click.option(
+    "--verify-only",
+    "-v",
+    is_flag=True,
+    help="solo comparar los contadores con las tablas de origen, sin reconstruir",
+)
+def recount(test_db: bool = False, verify_only: bool = False):
+    """Reconstruir y verificar las tablas de contadores de proyectos y
+    equipos"""
+
+    if not verify_only:
+        inserted = Contadores.rebuild_all(test_db=test_db)
+
+        for table, total in inserted.items():
+            click.echo(f"{table} reconstruida: {total} filas")
+
+    drift = Contadores.verify(test_db=test_db)
+
+    for table, total in drift.items():
+        click.echo(f"{table}: {total} filas con diferencias")
+
+    if any(drift.values()):
+        raise click.ClickException(
+            "los contadores no coinciden con las tablas de origen"
+        )
+
+
+@db_setup.command("rollup-history")
+@click.option(
+    "--test-db",
+    "-t",
+    is_flag=True,
+    help="usar db de pruebas 'promanager_test'",
+)
+def rollup_history(test_db: bool = False):
+    """Guardar la foto diaria de métricas de los proyectos modificados
+    desde su última foto, para correr periódicamente (p. ej. cron)"""
+
+    processed = HistorialProyecto.rollup(test_db=test_db)
+    click.echo(f"proyectos con foto nueva: {processed}")
+
+
+@db_setup.command("sweep-sessions")
+@click.option(
+    "--test-db",
+    "-t",
+    is_flag=True,
+    help="usar db de pruebas 'promanager_test'",
+)
+def sweep_sessions(test_db: bool = False):
+    """Borrar las sesiones vencidas"""
+
+    deleted = Sesion.sweep_expired(test_db=test_db)
+    click.echo(f"sesiones vencidas borradas: {deleted}")
+
+
+@db_setup.command("password-cost")
+@click.option(
+    "--test-db",
+    "-t",
+    is_flag=True,
+    help="usar db de pruebas 'promanager_test'",
+)
+def password_cost(test_db: bool = False):
+    """Calibrar el costo de bcrypt y mostrar los costos guardados"""
+
+    calibration = passwords.calibrate()
+
+    click.echo(
+        f"costo calibrado: {calibration['rounds']} "
+        f"(~{calibration['estimated_ms']} ms por hash, "
+        f"objetivo {calibration['target_ms']} ms; "
+        f"{calibration['measured_ms']} ms con costo {calibration['measured_rounds']})"
+    )
+
+    if passwords.PASSWORD_ROUNDS is not None:
+        click.echo(f"costo fijado por PASSWORD_ROUNDS: {passwords.PASSWORD_ROUNDS}")
+
+    current = passwords.bcrypt_rounds()
+
+    for cost, users in Usuario.password_costs(test_db=test_db).items():
+        state = "vigente" if cost == current else "se recalcula al ingresar"
+        click.echo(f"costo {cost}: {users} usuarios ({state})")
+
+
+@db_setup.command("refresh-reference")
+@click.option(
+    "--test-db",
+    "-t",
+    is_flag=True,
+    help="usar db de pruebas 'promanager_test'",
+)
+def refresh_reference(test_db: bool = False):
+    """Recargar roles, estados y prefijos en todos los procesos"""
+
+    version = Referencia.bump_version(test_db=test_db)
+    loaded = Referencia.load(test_db=test_db)
+
+    for table, rows in loaded.items():
+        click.echo(f"{table}: {rows} filas")
+
+    click.echo(
+        f"versión {version}: los procesos en ejecución recargan en menos de "
+        f"{int(REFERENCE_CHECK_INTERVAL)} segundos"
+    )
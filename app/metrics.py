@@ -0,0 +1,354 @@
+""" Métricas de la aplicación en formato de texto de Prometheus.
+    Latencia, códigos de estado y requests en curso por blueprint y
+    endpoint, más los indicadores del pool de conexiones y de las caches.
+    Los valores son por proceso: cada worker expone los suyos.
+"""
+import threading
+import time
+from typing import Callable, Iterable
+
+from flask import Flask, g, request
+from werkzeug.wrappers import Response
+
+import app.config as config
+from app.cache import all_caches
+from app.db import pool_stats
+
+METRICS_ENABLED: bool = getattr(config, "METRICS_ENABLED", False)
+
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+# (nombre, etiquetas, valor)
+Sample = tuple[str, dict[str, str], float]
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+
+    pairs = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n")
+        value = value.replace('"', '\\"')
+        pairs.append(f'{key}="{value}"')
+
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    type_name = "untyped"
+
+    def __init__(self, name: str, description: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._values: dict[tuple, float] = {}
+
+    def _key(self, labels: dict[str, str]) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def samples(self) -> list[Sample]:
+        with self._lock:
+            items = list(self._values.items())
+
+        return [
+            (self.name, dict(zip(self.label_names, key)), value) for key, value in items
+        ]
+
+
+class Counter(Metric):
+    type_name = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    type_name = "gauge"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labels: Iterable[str] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # por etiqueta: [cuentas por bucket..., suma, total]
+        self._series: dict[tuple, list[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+
+        with self._lock:
+            series = self._series.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+
+            for position, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[position] += 1
+
+            series[-2] += value
+            series[-1] += 1
+
+    def samples(self) -> list[Sample]:
+        with self._lock:
+            items = [(key, list(series)) for key, series in self._series.items()]
+
+        samples = []
+        for key, series in items:
+            labels = dict(zip(self.label_names, key))
+
+            for position, bound in enumerate(self.buckets):
+                samples.append(
+                    (
+                        f"{self.name}_bucket",
+                        {**labels, "le": _format_value(bound)},
+                        series[position],
+                    )
+                )
+
+            samples.append((f"{self.name}_sum", labels, series[-2]))
+            samples.append((f"{self.name}_count", labels, series[-1]))
+
+        return samples
+
+
+class Registry:
+    """Conjunto de métricas y de colectores.
+
+    Un colector es una función llamada en cada lectura de /metrics que
+    devuelve [(nombre, descripcion, tipo, [(etiquetas, valor), ...]), ...],
+    útil para valores que ya lleva otro componente (pool, caches).
+    """
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, Metric] = {}
+        self._collectors: list[Callable[[], list]] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def register_collector(self, collector: Callable[[], list]) -> None:
+        with self._lock:
+            if collector not in self._collectors:
+                self._collectors.append(collector)
+
+    def get(self, name: str) -> Metric | None:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+
+        lines = []
+
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.description}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        for collector in collectors:
+            for name, description, type_name, values in collector():
+                lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} {type_name}")
+                for labels, value in values:
+                    lines.append(
+                        f"{name}{_format_labels(labels)} {_format_value(value)}"
+                    )
+
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+request_latency: Histogram = registry.register(
+    Histogram(
+        "promanager_request_duration_seconds",
+        "Latencia de los requests",
+        labels=("blueprint", "endpoint", "method"),
+    )
+)
+
+request_status: Counter = registry.register(
+    Counter(
+        "promanager_requests_total",
+        "Requests respondidos por código de estado",
+        labels=("blueprint", "endpoint", "method", "status"),
+    )
+)
+
+requests_in_flight: Gauge = registry.register(
+    Gauge(
+        "promanager_requests_in_flight",
+        "Requests en curso",
+        labels=("blueprint", "endpoint"),
+    )
+)
+
+
+def _pool_collector() -> list:
+    stats = pool_stats()
+
+    def per_database(field: str) -> list:
+        return [({"database": db}, s[field]) for db, s in stats.items()]
+
+    return [
+        (
+            "promanager_db_pool_size",
+            "Conexiones del pool",
+            "gauge",
+            per_database("size"),
+        ),
+        (
+            "promanager_db_pool_in_use",
+            "Conexiones retiradas del pool",
+            "gauge",
+            per_database("in_use"),
+        ),
+        (
+            "promanager_db_pool_idle",
+            "Conexiones libres en el pool",
+            "gauge",
+            per_database("idle"),
+        ),
+        (
+            "promanager_db_pool_waits_total",
+            "Retiros que debieron esperar una conexión libre",
+            "counter",
+            per_database("waits"),
+        ),
+        (
+            "promanager_db_pool_wait_seconds_total",
+            "Tiempo total esperando conexiones libres",
+            "counter",
+            per_database("wait_time"),
+        ),
+        (
+            "promanager_db_pool_timeouts_total",
+            "Retiros que agotaron la espera",
+            "counter",
+            per_database("timeouts"),
+        ),
+    ]
+
+
+registry.register_collector(_pool_collector)
+
+
+def _cache_collector() -> list:
+    stats = {cache.name: cache.stats() for cache in all_caches()}
+
+    def per_cache(field: str) -> list:
+        return [({"cache": name}, s[field]) for name, s in stats.items()]
+
+    return [
+        ("promanager_cache_size", "Entradas en la cache", "gauge", per_cache("size")),
+        (
+            "promanager_cache_hits_total",
+            "Lecturas resueltas por la cache",
+            "counter",
+            per_cache("hits"),
+        ),
+        (
+            "promanager_cache_misses_total",
+            "Lecturas no encontradas en la cache",
+            "counter",
+            per_cache("misses"),
+        ),
+        (
+            "promanager_cache_evictions_total",
+            "Entradas descartadas por tamaño",
+            "counter",
+            per_cache("evictions"),
+        ),
+    ]
+
+
+registry.register_collector(_cache_collector)
+
+
+def _request_labels() -> dict[str, str]:
+    return {
+        "blueprint": request.blueprint or "",
+        "endpoint": request.endpoint or "none",
+    }
+
+
+def init_metrics(app: Flask) -> None:
+    """Medir cada request de la aplicación y exponer /metrics."""
+
+    @app.before_request
+    def start_request_timer() -> None:
+        g.metrics_start = time.perf_counter()
+        requests_in_flight.inc(**_request_labels())
+
+    @app.after_request
+    def record_request(response: Response) -> Response:
+        start = g.get("metrics_start")
+
+        if start is not None:
+            labels = _request_labels()
+            request_latency.observe(
+                time.perf_counter() - start, method=request.method, **labels
+            )
+            request_status.inc(
+                method=request.method, status=response.status_code, **labels
+            )
+
+        return response
+
+    @app.teardown_request
+    def finish_request(exc: BaseException | None = None) -> None:
+        if g.pop("metrics_start", None) is not None:
+            requests_in_flight.dec(**_request_labels())
+
+    @app.get("/metrics")
+    def metrics_endpoint() -> Response:
+        return Response(
+            registry.render(),
+            mimetype="text/plain",
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+        )
@@ -1,6 +1,11 @@
+from app.models.acceso import AccesoUsuario
+from app.models.contadores import Contadores
 from app.models.equipo import Equipo
+from app.models.historial import HistorialProyecto
 from app.models.prefijo_telefonico import prefijos_telefonicos
 from app.models.proyecto import Proyecto
+from app.models.referencia import Referencia
 from app.models.roles import Roles
+from app.models.sesion import Sesion
 from app.models.ticket_tarea import Ticket_Tarea
 from app.models.usuario import Usuario
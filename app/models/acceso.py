@@ -0,0 +1,191 @@
+from mysql.connector.cursor import CursorBase
+
+from app.db import close_conn_cursor, get_connection
+
+# Accesos que se derivan de las tablas de participación:
+# - proyecto: es integrante, puede modificar si su rol en el proyecto es 1
+# - equipo: es miembro, puede modificar si su rol en el equipo
+#   o en el proyecto es 1
+# - tarea: la tiene asignada, puede modificar si puede modificar
+#   el proyecto o el equipo de la tarea
+_DERIVED_ACCESS = """
+    SELECT ipr.integrante AS usuario, 'proyecto' AS tipo_recurso,
+    ipr.proyecto AS recurso, ipr.rol = 1 AS puede_modificar
+    FROM integrantes_proyecto AS ipr
+    {where}
+    UNION
+    SELECT ipr.integrante, 'equipo', m.equipo, (m.rol = 1 OR ipr.rol = 1)
+    FROM miembros_equipo AS m
+    INNER JOIN integrantes_proyecto AS ipr
+    ON m.miembro = ipr.id
+    {where}
+    UNION
+    SELECT ipr.integrante, 'tarea', a.ticket_tarea,
+    (
+        EXISTS(
+            SELECT 1 FROM integrantes_proyecto AS admin_p
+            WHERE admin_p.integrante = ipr.integrante
+            AND admin_p.proyecto = tt.proyecto AND admin_p.rol = 1
+        )
+        OR EXISTS(
+            SELECT 1 FROM miembros_equipo AS admin_m
+            INNER JOIN integrantes_proyecto AS admin_ipr
+            ON admin_m.miembro = admin_ipr.id
+            WHERE admin_ipr.integrante = ipr.integrante
+            AND admin_m.equipo = tt.equipo
+            AND (admin_m.rol = 1 OR admin_ipr.rol = 1)
+        )
+    )
+    FROM asignacion_tarea AS a
+    INNER JOIN miembros_equipo AS m
+    ON a.miembro = m.id
+    INNER JOIN integrantes_proyecto AS ipr
+    ON m.miembro = ipr.id
+    INNER JOIN ticket_tarea AS tt
+    ON a.ticket_tarea = tt.id
+    {where}
+"""
+
+
+class AccesoUsuario:
+    """Tabla desnormalizada acceso_usuario(usuario, tipo_recurso, recurso,
+    puede_modificar), mantenida por los métodos de los modelos que
+    cambian participaciones. La aplicación todavía no escribe membresías
+    de equipo ni asignaciones de tareas: las escritas por fuera de los
+    modelos requieren db-cli rebuild-access.
+
+    Cada fila depende solo de los roles del propio usuario, por lo que
+    tras un cambio alcanza con recalcular las filas de ese usuario.
+    """
+
+    @classmethod
+    def get(cls, user_id: int, resource: str, resource_id: int) -> bool | None:
+        """Leer la fila de acceso de un usuario a un recurso.
+
+        Returns:
+            bool | None: puede_modificar, None si el usuario no tiene acceso.
+        """
+
+        cnx = get_connection()
+        cursor = cnx.cursor()
+
+        cursor.execute(
+            """SELECT puede_modificar FROM acceso_usuario
+            WHERE usuario = %s AND tipo_recurso = %s AND recurso = %s""",
+            (user_id, resource, resource_id),
+        )
+
+        row = cursor.fetchone()
+
+        close_conn_cursor(cnx, cursor)
+
+        if row is None:
+            return None
+
+        return bool(row[0])
+
+    @classmethod
+    def refresh_user(cls, cursor: CursorBase, user_id: int) -> None:
+        """Recalcular los accesos de un usuario, con el cursor (y la
+        transacción) de la escritura que los modificó."""
+
+        cursor.execute("DELETE FROM acceso_usuario WHERE usuario = %s", (user_id,))
+
+        cursor.execute(
+            "INSERT INTO acceso_usuario(usuario, tipo_recurso, recurso, puede_modificar)"
+            + _DERIVED_ACCESS.format(where="WHERE ipr.integrante = %s"),
+            (user_id, user_id, user_id),
+        )
+
+    @classmethod
+    def forget_project(cls, cursor: CursorBase, project_id: int) -> None:
+        """Quitar los accesos a un proyecto, sus equipos y sus tareas.
+        Debe ejecutarse antes de borrar el proyecto."""
+
+        cursor.execute(
+            """DELETE FROM acceso_usuario
+            WHERE (tipo_recurso = 'proyecto' AND recurso = %s)
+            OR (tipo_recurso = 'equipo'
+                AND recurso IN (SELECT id FROM equipo WHERE proyecto = %s))
+            OR (tipo_recurso = 'tarea'
+                AND recurso IN (SELECT id FROM ticket_tarea WHERE proyecto = %s))""",
+            (project_id, project_id, project_id),
+        )
+
+    @classmethod
+    def forget_team(cls, cursor: CursorBase, team_id: int) -> None:
+        """Quitar los accesos a un equipo y sus tareas.
+        Debe ejecutarse antes de borrar el equipo."""
+
+        cursor.execute(
+            """DELETE FROM acceso_usuario
+            WHERE (tipo_recurso = 'equipo' AND recurso = %s)
+            OR (tipo_recurso = 'tarea'
+                AND recurso IN (SELECT id FROM ticket_tarea WHERE equipo = %s))""",
+            (team_id, team_id),
+        )
+
+    @classmethod
+    def rebuild_all(cls, test_db: bool = False) -> int:
+        """Reconstruir la tabla completa en una transacción.
+
+        Returns:
+            int: filas insertadas.
+        """
+
+        cnx = get_connection(connect_test_db=test_db)
+        cursor = cnx.cursor()
+
+        cursor.execute("DELETE FROM acceso_usuario")
+        cursor.execute(
+            "INSERT INTO acceso_usuario(usuario, tipo_recurso, recurso, puede_modificar)"
+            + _DERIVED_ACCESS.format(where="")
+        )
+        inserted = cursor.rowcount
+
+        cnx.commit()
+        close_conn_cursor(cnx, cursor)
+
+        return inserted
+
+    @classmethod
+    def verify(cls, test_db: bool = False) -> dict[str, int]:
+        """Comparar la tabla con los accesos derivados.
+
+        Returns:
+            dict: filas faltantes, sobrantes y con puede_modificar erróneo.
+        """
+
+        derived = _DERIVED_ACCESS.format(where="")
+
+        cnx = get_connection(connect_test_db=test_db)
+        cursor = cnx.cursor()
+
+        cursor.execute(
+            f"""SELECT
+            COALESCE(SUM(a.usuario IS NULL), 0),
+            COALESCE(SUM(a.puede_modificar <> d.puede_modificar), 0)
+            FROM ({derived}) AS d
+            LEFT JOIN acceso_usuario AS a
+            ON a.usuario = d.usuario AND a.tipo_recurso = d.tipo_recurso
+            AND a.recurso = d.recurso"""
+        )
+        missing, wrong = cursor.fetchone()
+
+        cursor.execute(
+            f"""SELECT COUNT(*)
+            FROM acceso_usuario AS a
+            LEFT JOIN ({derived}) AS d
+            ON a.usuario = d.usuario AND a.tipo_recurso = d.tipo_recurso
+            AND a.recurso = d.recurso
+            WHERE d.usuario IS NULL"""
+        )
+        extra = cursor.fetchone()[0]
+
+        close_conn_cursor(cnx, cursor)
+
+        return {
+            "faltantes": int(missing),
+            "sobrantes": int(extra),
+            "erroneas": int(wrong),
+        }
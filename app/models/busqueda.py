@@ -0,0 +1,125 @@
+""" Búsqueda por nombre y descripción en los listados del usuario.
+    Usa los índices FULLTEXT de proyecto, equipo y ticket_tarea con
+    MATCH ... AGAINST en modo booleano (cada palabra es obligatoria y
+    se busca como prefijo), ordenando por relevancia.
+    Si la consulta tiene palabras más cortas que el mínimo indexado,
+    si FULLTEXT no encuentra nada (p. ej. solo stopwords) o si la tabla
+    todavía no tiene el índice, se busca `nombre LIKE 'consulta%'`
+    sobre el índice de prefijo del nombre.
+    Los resultados se paginan por posición: `siguiente` y `anterior`
+    de la Pagina son números de página, no ids.
+"""
+import re
+from typing import Any
+
+from mysql.connector import Error as dbError
+from mysql.connector import errorcode
+from mysql.connector.cursor import CursorBase
+
+import app.config as config
+from app.models.filas import fetch_rows
+from app.models.paginacion import Pagina, page_size
+
+# innodb_ft_min_token_size del servidor, las palabras más cortas
+# no están en el índice FULLTEXT
+FULLTEXT_MIN_TOKEN: int = getattr(config, "FULLTEXT_MIN_TOKEN", 3)
+# palabras de la consulta que se tienen en cuenta
+MAX_SEARCH_TERMS: int = getattr(config, "MAX_SEARCH_TERMS", 8)
+# páginas de resultados que se pueden pedir, con OFFSET cada página
+# cuesta lo que todas las anteriores
+MAX_SEARCH_PAGES: int = getattr(config, "MAX_SEARCH_PAGES", 20)
+
+_WORD = re.compile(r"\w+")
+
+
+def search_terms(consulta: str | None) -> list[str]:
+    """Palabras de la consulta, sin los operadores de MATCH en modo
+    booleano."""
+
+    return _WORD.findall(consulta or "")[:MAX_SEARCH_TERMS]
+
+
+def _page_number(value: Any) -> int:
+    if value is None or not str(value).isdigit() or int(value) < 1:
+        return 1
+
+    return min(int(value), MAX_SEARCH_PAGES)
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_page(
+    cursor: CursorBase,
+    query: str,
+    params: tuple,
+    match_columns: str,
+    name_column: str,
+    id_column: str,
+    consulta: str | None,
+    pagina: Any = None,
+    cantidad: Any = None,
+) -> Pagina:
+    """Ejecutar una consulta de listado filtrada por una búsqueda.
+
+    Args:
+        cursor (CursorBase): cursor de tuplas.
+        query (str): consulta sin ORDER BY, con `{keyset}` al final de
+        su WHERE (ver paginacion.fetch_page).
+        match_columns (str): columnas del índice FULLTEXT,
+        p. ej. "p.nombre, p.descripcion".
+        name_column (str): columna con índice de prefijo, p. ej. "p.nombre".
+        id_column (str): desempate del orden, p. ej. "p.id".
+        consulta (str): texto buscado.
+        pagina: número de página pedido, desde 1.
+        cantidad: tamaño de página pedido.
+    """
+
+    size = page_size(cantidad)
+    number = _page_number(pagina)
+    terms = search_terms(consulta)
+
+    if not terms:
+        return Pagina([], None, None, size)
+
+    limit = (size + 1, (number - 1) * size)
+    filas = None
+
+    if all(len(term) >= FULLTEXT_MIN_TOKEN for term in terms):
+        match = f"MATCH({match_columns}) AGAINST (%s IN BOOLEAN MODE)"
+        against = " ".join(f"+{term}*" for term in terms)
+
+        try:
+            cursor.execute(
+                query.format(keyset=f"AND {match}")
+                + f" ORDER BY {match} DESC, {id_column} LIMIT %s OFFSET %s",
+                (*params, against, against, *limit),
+            )
+            filas = fetch_rows(cursor)
+        except dbError as exception:
+            # tabla creada antes de agregar el índice, ver create-search-indexes
+            if exception.errno != errorcode.ER_FT_MATCHING_KEY_NOT_FOUND:
+                raise
+
+    # más allá de la última página de FULLTEXT no se llega sin pasar
+    # por una página con resultados, vacío implica que no hubo ninguno
+    if not filas:
+        prefix = " ".join(terms)
+
+        cursor.execute(
+            query.format(keyset=f"AND {name_column} LIKE %s")
+            + f" ORDER BY {name_column} = %s DESC, {name_column}, {id_column}"
+            + " LIMIT %s OFFSET %s",
+            (*params, _escape_like(prefix) + "%", prefix, *limit),
+        )
+        filas = fetch_rows(cursor)
+
+    has_more = len(filas) > size and number < MAX_SEARCH_PAGES
+
+    return Pagina(
+        filas[:size],
+        number + 1 if has_more else None,
+        number - 1 if number > 1 else None,
+        size,
+    )
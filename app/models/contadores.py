@@ -0,0 +1,233 @@
+""" Conteos desnormalizados por proyecto y por equipo.
+    contadores_proyecto (equipos, tareas e integrantes), contadores_equipo
+    (tareas y miembros) y contadores_estado (tareas por estado) se
+    mantienen con incrementos en la transacción de cada escritura de los
+    modelos, así las métricas de app.api.project leen una fila por clave
+    primaria en lugar de contar. Las tareas se cuentan con los triggers
+    de ticket_tarea (ver triggers.sql), sin importar quién las escriba.
+    Los incrementos (`x = x + 1`) bloquean la fila del contador, dos
+    escrituras concurrentes sobre el mismo proyecto no pierden cuentas.
+    Un proyecto sin fila en contadores_proyecto (creado antes de las
+    tablas) no tiene contadores confiables: las lecturas devuelven None
+    y las métricas cuentan, hasta correr db-cli recount.
+    Los métodos que acompañan un borrado deben ejecutarse antes del
+    DELETE, que borra en cascada las filas a descontar.
+"""
+from mysql.connector.cursor import CursorBase
+
+from app.db import close_conn_cursor, get_connection
+
+# tablas -> (clave, conteos derivados de las tablas de origen)
+_DERIVED: dict[str, tuple[str, str]] = {
+    "contadores_proyecto": (
+        "proyecto",
+        """SELECT p.id AS proyecto
+        , (SELECT COUNT(*) FROM equipo WHERE proyecto = p.id) AS equipos
+        , (SELECT COUNT(*) FROM ticket_tarea WHERE proyecto = p.id) AS tareas
+        , (SELECT COUNT(*) FROM integrantes_proyecto WHERE proyecto = p.id)
+        AS integrantes
+        FROM proyecto AS p""",
+    ),
+    "contadores_equipo": (
+        "equipo",
+        """SELECT e.id AS equipo, e.proyecto
+        , (SELECT COUNT(*) FROM ticket_tarea WHERE equipo = e.id) AS tareas
+        , (SELECT COUNT(*) FROM miembros_equipo WHERE equipo = e.id) AS miembros
+        FROM equipo AS e""",
+    ),
+    "contadores_estado": (
+        "proyecto, estado",
+        """SELECT proyecto, estado, COUNT(*) AS tareas
+        FROM ticket_tarea
+        GROUP BY proyecto, estado""",
+    ),
+}
+
+# columnas de conteo de cada tabla
+_COUNTS: dict[str, tuple[str, ...]] = {
+    "contadores_proyecto": ("equipos", "tareas", "integrantes"),
+    "contadores_equipo": ("proyecto", "tareas", "miembros"),
+    "contadores_estado": ("tareas",),
+}
+
+
+class Contadores:
+    """Mantenimiento y lectura de las tablas de contadores. Los métodos
+    de escritura reciben el cursor (y la transacción) de la escritura
+    que cuentan."""
+
+    @classmethod
+    def project_created(cls, cursor: CursorBase, project_id: int) -> None:
+        cursor.execute(
+            "INSERT IGNORE INTO contadores_proyecto(proyecto) VALUES (%s)",
+            (project_id,),
+        )
+
+    @classmethod
+    def participant_added(cls, cursor: CursorBase, project_id: int) -> None:
+        cursor.execute(
+            """UPDATE contadores_proyecto SET integrantes = integrantes + 1
+            WHERE proyecto = %s""",
+            (project_id,),
+        )
+
+    @classmethod
+    def participant_removed(
+        cls, cursor: CursorBase, project_id: int, user_id: int
+    ) -> None:
+        """Descontar al integrante y sus membresías de equipo, que se
+        borran en cascada."""
+
+        cursor.execute(
+            """UPDATE contadores_equipo AS ce
+            INNER JOIN miembros_equipo AS m
+            ON m.equipo = ce.equipo
+            INNER JOIN integrantes_proyecto AS ipr
+            ON m.miembro = ipr.id
+            SET ce.miembros = ce.miembros - 1
+            WHERE ipr.proyecto = %s AND ipr.integrante = %s""",
+            (project_id, user_id),
+        )
+        cursor.execute(
+            """UPDATE contadores_proyecto AS cp
+            INNER JOIN integrantes_proyecto AS ipr
+            ON ipr.proyecto = cp.proyecto
+            SET cp.integrantes = cp.integrantes - 1
+            WHERE ipr.proyecto = %s AND ipr.integrante = %s""",
+            (project_id, user_id),
+        )
+
+    @classmethod
+    def user_removed(cls, cursor: CursorBase, user_id: int) -> None:
+        """participant_removed en cada proyecto del usuario."""
+
+        cursor.execute(
+            "SELECT proyecto FROM integrantes_proyecto WHERE integrante = %s",
+            (user_id,),
+        )
+
+        for (project_id,) in cursor.fetchall():
+            cls.participant_removed(cursor, project_id, user_id)
+
+    @classmethod
+    def team_created(cls, cursor: CursorBase, project_id: int, team_id: int) -> None:
+        cursor.execute(
+            """INSERT IGNORE INTO contadores_equipo(equipo, proyecto)
+            VALUES (%s, %s)""",
+            (team_id, project_id),
+        )
+        cursor.execute(
+            """UPDATE contadores_proyecto SET equipos = equipos + 1
+            WHERE proyecto = %s""",
+            (project_id,),
+        )
+
+    @classmethod
+    def team_removed(cls, cursor: CursorBase, project_id: int, team_id: int) -> None:
+        """Descontar el equipo y sus tareas, que se borran en cascada. La
+        fila de contadores_equipo también se borra en cascada."""
+
+        cursor.execute(
+            """UPDATE contadores_estado AS ce
+            INNER JOIN (
+                SELECT estado, COUNT(*) AS tareas
+                FROM ticket_tarea
+                WHERE equipo = %s
+                GROUP BY estado
+            ) AS t
+            ON t.estado = ce.estado
+            SET ce.tareas = ce.tareas - t.tareas
+            WHERE ce.proyecto = %s""",
+            (team_id, project_id),
+        )
+        cursor.execute(
+            """UPDATE contadores_proyecto
+            SET equipos = equipos - 1, tareas = tareas - (
+                SELECT COUNT(*) FROM ticket_tarea WHERE equipo = %s
+            )
+            WHERE proyecto = %s""",
+            (team_id, project_id),
+        )
+
+    @classmethod
+    def of_project(cls, cursor: CursorBase, project_id: int) -> dict | None:
+        """Conteos del proyecto, None si no tiene contadores.
+
+        Args:
+            cursor (CursorBase): cursor de diccionarios.
+        """
+
+        cursor.execute(
+            """SELECT equipos, tareas, integrantes
+            FROM contadores_proyecto WHERE proyecto = %s""",
+            (project_id,),
+        )
+
+        return cursor.fetchone()
+
+    @classmethod
+    def rebuild_all(cls, test_db: bool = False) -> dict[str, int]:
+        """Reconstruir las tres tablas en una transacción.
+
+        Returns:
+            dict: filas insertadas por tabla.
+        """
+
+        cnx = get_connection(connect_test_db=test_db)
+        cursor = cnx.cursor()
+        inserted = {}
+
+        for table, (_, derived) in _DERIVED.items():
+            cursor.execute(f"DELETE FROM {table}")
+            cursor.execute(f"INSERT INTO {table} " + derived)
+            inserted[table] = cursor.rowcount
+
+        cnx.commit()
+        close_conn_cursor(cnx, cursor)
+
+        return inserted
+
+    @classmethod
+    def verify(cls, test_db: bool = False) -> dict[str, int]:
+        """Comparar las tablas con los conteos derivados. Las filas de
+        contadores_estado en 0 equivalen a no tener fila.
+
+        Returns:
+            dict: por tabla, filas faltantes, sobrantes o con conteos
+            distintos.
+        """
+
+        cnx = get_connection(connect_test_db=test_db)
+        cursor = cnx.cursor()
+        drift = {}
+
+        for table, (key, derived) in _DERIVED.items():
+            keys = [column.strip() for column in key.split(",")]
+            on = " AND ".join(f"c.{column} = d.{column}" for column in keys)
+            differs = " OR ".join(
+                f"NOT c.{column} <=> d.{column}" for column in _COUNTS[table]
+            )
+
+            cursor.execute(
+                f"""SELECT COUNT(*)
+                FROM ({derived}) AS d
+                LEFT JOIN {table} AS c
+                ON {on}
+                WHERE {differs}"""
+            )
+            wrong = cursor.fetchone()[0]
+
+            # solo contadores_estado puede tener filas sin origen (las
+            # demás se borran en cascada), en 0 tras descontar sus tareas
+            cursor.execute(
+                f"""SELECT COUNT(*)
+                FROM {table} AS c
+                LEFT JOIN ({derived}) AS d
+                ON {on}
+                WHERE d.{keys[0]} IS NULL AND c.tareas <> 0"""
+            )
+            drift[table] = int(wrong) + int(cursor.fetchone()[0])
+
+        close_conn_cursor(cnx, cursor)
+
+        return drift
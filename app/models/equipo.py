@@ -1,50 +1,129 @@
 from datetime import date
-from typing import Any, Iterator, Optional
+from typing import Any, Iterable, Iterator, Optional
 
 from mysql.connector.connection import MySQLConnection
 from mysql.connector.cursor import CursorBase
 from mysql.connector.pooling import PooledMySQLConnection
 from mysql.connector.types import RowType
 
+import app.models.identidad as identidad
 import app.models.proyecto as proyecto
 from app.db import context_db_manager, get_connection
+from app.models.acceso import AccesoUsuario
+from app.models.busqueda import search_page
+from app.models.contadores import Contadores
+from app.models.filas import StreamedRows, fetch_models, fetch_rows
+from app.models.paginacion import Pagina, fetch_page
+from app.models.version_proyecto import VersionProyecto
+
+
+_TEAMS_OF_MEMBER = """SELECT
+    e.id as "id equipo", e.nombre as "nombre equipo", e.proyecto as "proyecto padre"
+    , m.id as "id miembro", re.nombre as "rol", m.suspendido
+    FROM
+    equipo as  e
+    INNER JOIN
+    miembros_equipo as m
+    ON e.id = m.equipo
+    INNER JOIN
+    roles_equipo as re
+    ON re.id = m.rol
+    INNER JOIN
+    integrantes_proyecto as ipr
+    ON ipr.id = m.miembro
+    INNER JOIN
+    usuario as u
+    ON u.id = ipr.integrante
+    WHERE u.id = %s {keyset}
+"""
 
 
 class Equipo:
+    __slots__ = (
+        "id",
+        "nombre",
+        "fecha_creacion",
+        "id_proyecto",
+        "proyecto",
+        "miembros",
+        "tareas",
+    )
+
     @classmethod
     def _get_by_member(cls, member_id):
         cnx: MySQLConnection | PooledMySQLConnection = get_connection()
-        cursor: CursorBase = cnx.cursor(dictionary=True)
-
-        select_query: str = """SELECT
-                e.id as "id equipo", e.nombre as "nombre equipo", e.proyecto as "proyecto padre"
-                , m.id as "id miembro", re.nombre as "rol", m.suspendido
-                FROM
-                equipo as  e
-                INNER JOIN
-                miembros_equipo as m
-                ON e.id = m.equipo
-                INNER JOIN
-                roles_equipo as re
-                ON re.id = m.rol
-                INNER JOIN
-                integrantes_proyecto as ipr
-                ON ipr.id = m.miembro
-                INNER JOIN
-                usuario as u
-                ON u.id = ipr.integrante
-                WHERE u.id = %s
-                ORDER BY e.id;
-        """
+        cursor: CursorBase = cnx.cursor()
+
+        cursor.execute(
+            _TEAMS_OF_MEMBER.format(keyset="") + " ORDER BY e.id", (member_id,)
+        )
+
+        rows = fetch_rows(cursor)
+
+        cursor.close()
+        cnx.close()
+
+        return rows
+
+    @classmethod
+    def page_of_member(
+        cls, member_id, despues=None, antes=None, cantidad=None
+    ) -> Pagina:
+        """Una página de los equipos del usuario, ordenados por id."""
+
+        cnx: MySQLConnection | PooledMySQLConnection = get_connection()
+        cursor: CursorBase = cnx.cursor()
+
+        page = fetch_page(
+            cursor,
+            _TEAMS_OF_MEMBER,
+            (member_id,),
+            id_column="e.id",
+            id_key="id equipo",
+            despues=despues,
+            antes=antes,
+            cantidad=cantidad,
+        )
+
+        cursor.close()
+        cnx.close()
+
+        return page
 
-        cursor.execute(select_query, (member_id,))
+    @classmethod
+    def stream_of_member(cls, member_id) -> StreamedRows:
+        """Todos los equipos del usuario, leídos en streaming."""
 
-        teams_of_member: RowType | None = cursor.fetchall()
+        return StreamedRows(
+            _TEAMS_OF_MEMBER.format(keyset="") + " ORDER BY e.id", (member_id,)
+        )
+
+    @classmethod
+    def search_of_member(
+        cls, member_id, consulta, pagina=None, cantidad=None
+    ) -> Pagina:
+        """Equipos del usuario cuyo nombre coincide con la consulta,
+        por relevancia."""
+
+        cnx: MySQLConnection | PooledMySQLConnection = get_connection()
+        cursor: CursorBase = cnx.cursor()
+
+        page = search_page(
+            cursor,
+            _TEAMS_OF_MEMBER,
+            (member_id,),
+            match_columns="e.nombre",
+            name_column="e.nombre",
+            id_column="e.id",
+            consulta=consulta,
+            pagina=pagina,
+            cantidad=cantidad,
+        )
 
         cursor.close()
         cnx.close()
 
-        return teams_of_member
+        return page
 
     @classmethod
     def _get_by_project(cls, project_id: int):
@@ -59,6 +138,11 @@ class Equipo:
 
     @classmethod
     def get_by_id(csl, task_id):
+        loaded_team = identidad.lookup(Equipo, "id", task_id)
+
+        if loaded_team is not None:
+            return loaded_team
+
         query = """
         SELECT
         nombre, fecha_creacion, proyecto, id
@@ -74,11 +158,48 @@ class Equipo:
 
         queried_team = cursor.fetchone()
 
+        cursor.close()
+        connection.close()
+
         if queried_team is not None:
-            return Equipo(**queried_team)
+            return identidad.remember(Equipo(**queried_team), id=queried_team["id"])
 
         return None
 
+    @classmethod
+    def get_many(cls, ids: Iterable[int]) -> dict[int, "Equipo"]:
+        """Equipos con los ids indicados en una sola consulta, por id."""
+
+        loaded_teams = {}
+        ids_to_load = []
+
+        for id in ids:
+            loaded_team = identidad.lookup(Equipo, "id", id)
+
+            if loaded_team is not None:
+                loaded_teams[loaded_team.id] = loaded_team
+            else:
+                ids_to_load.append(id)
+
+        if not ids_to_load:
+            return loaded_teams
+
+        placeholders = ", ".join(["%s"] * len(ids_to_load))
+
+        with context_db_manager() as conn:
+            conn.execute(
+                f"""SELECT nombre, fecha_creacion, proyecto, id
+                FROM equipo WHERE id IN ({placeholders})""",
+                ids_to_load,
+            )
+
+            for loaded_team in fetch_models(conn.cursor, Equipo):
+                loaded_teams[loaded_team.id] = identidad.remember(
+                    loaded_team, id=loaded_team.id
+                )
+
+        return loaded_teams
+
     @classmethod
     def exists(cls, team_atribute: int | str):
         existance_query = "SELECT 1 FROM equipo WHERE %s IN (id, nombre);"
@@ -127,6 +248,10 @@ class Equipo:
                 create_query,
                 values,
             )
+            Contadores.team_created(
+                db_conn.cursor, self.id_proyecto, db_conn.cursor.lastrowid
+            )
+            VersionProyecto.bump(db_conn.cursor, self.id_proyecto)
             db_conn.connection.commit()
 
         self._query_id()
@@ -139,16 +264,30 @@ class Equipo:
                 WHERE id = %s""",
                 (self.nombre, self.fecha_creacion, self.id),
             )
+            VersionProyecto.bump(conn.cursor, self.id_proyecto)
             conn.connection.commit()
 
+        identidad.remember(self, id=self.id)
+
     def delete(self) -> None:
         with context_db_manager() as conn:
+            AccesoUsuario.forget_team(conn.cursor, self.id)
+            Contadores.team_removed(conn.cursor, self.id_proyecto, self.id)
             conn.execute(
                 "DELETE FROM equipo WHERE id = %s",
                 (self.id,),
             )
+            VersionProyecto.bump(conn.cursor, self.id_proyecto)
             conn.connection.commit()
 
+        # sus tareas se borran en cascada
+        identidad.forget(self)
+        identidad.forget_where(
+            lambda loaded: identidad.same_id(
+                getattr(loaded, "id_equipo", None), self.id
+            )
+        )
+
     def user_can_modify(self, user_id):
         query = """
             select true
@@ -170,6 +309,9 @@ class Equipo:
 
         result = cursor.fetchone()
 
+        cursor.close()
+        connection.close()
+
         if result is not None and result[0] == 1:
             return True
 
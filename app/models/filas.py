@@ -0,0 +1,144 @@
+from collections.abc import Iterator, Mapping
+from typing import Any
+
+from mysql.connector.cursor import CursorBase
+
+import app.config as config
+from app.db import get_streaming_connection
+
+# filas pedidas al servidor por cada fetchmany de StreamedRows
+STREAM_BATCH: int = getattr(config, "STREAM_BATCH", 500)
+
+# nombres de columnas -> {columna: posición}, compartido por todas las
+# filas (y consultas) con las mismas columnas
+_column_maps: dict[tuple[str, ...], dict[str, int]] = {}
+
+
+def column_map(column_names: tuple[str, ...]) -> dict[str, int]:
+    columns = _column_maps.get(column_names)
+
+    if columns is None:
+        columns = _column_maps.setdefault(
+            column_names, {name: position for position, name in enumerate(column_names)}
+        )
+
+    return columns
+
+
+class Fila(Mapping):
+    """Fila de resultado respaldada por la tupla del cursor.
+
+    Se usa como un diccionario de solo lectura (keys, values, items, [])
+    pero los nombres de columna no se repiten en cada fila: todas las
+    filas de una consulta comparten el mismo mapa de columnas.
+    Para cambiar valores se arma otra fila con replace().
+    Para jsonify convertir con dict(fila).
+    """
+
+    __slots__ = ("_columns", "_values")
+
+    def __init__(self, columns: dict[str, int], values: tuple) -> None:
+        self._columns = columns
+        self._values = values
+
+    def __getitem__(self, column: str) -> Any:
+        return self._values[self._columns[column]]
+
+    def replace(self, **values: Any) -> "Fila":
+        """Copia de la fila con otros valores en las columnas indicadas."""
+
+        replaced = list(self._values)
+
+        for column, value in values.items():
+            replaced[self._columns[column]] = value
+
+        return Fila(self._columns, tuple(replaced))
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._columns)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __repr__(self) -> str:
+        return f"Fila({dict(self)})"
+
+
+def fetch_rows(cursor: CursorBase) -> list[Fila]:
+    """Filas del último execute de un cursor de tuplas."""
+
+    columns = column_map(tuple(cursor.column_names))
+
+    return [Fila(columns, values) for values in cursor.fetchall()]
+
+
+def fetch_models(cursor: CursorBase, model: type) -> list:
+    """Instancias de model a partir del último execute de un cursor de
+    tuplas, cuyas columnas son los argumentos de model."""
+
+    column_names = tuple(cursor.column_names)
+
+    return [model(**dict(zip(column_names, values))) for values in cursor.fetchall()]
+
+
+class StreamedRows:
+    """Filas de una consulta leídas de a lotes con un cursor sin buffer.
+
+    La consulta se ejecuta al crearla (keys() ya está disponible) pero
+    las filas se traen del servidor a medida que se itera, una sola vez.
+    bool() trae el primer lote para saber si hay filas; la iteración
+    empieza por ese lote.
+    La conexión vuelve al pool al leer la última fila o, si la iteración
+    no termina, al terminar el request.
+    """
+
+    def __init__(
+        self,
+        query: str,
+        params: tuple = (),
+        test_db: bool = False,
+        batch: int = STREAM_BATCH,
+    ) -> None:
+        self.batch = batch
+        self.connection = get_streaming_connection(connect_test_db=test_db)
+
+        try:
+            self.cursor = self.connection.cursor(buffered=False)
+            self.cursor.execute(query, params)
+        except Exception:
+            self.connection.close()
+            raise
+
+        self.columns = column_map(tuple(self.cursor.column_names))
+        # primer lote, si bool() ya lo trajo
+        self._first: list | None = None
+
+    def keys(self) -> list[str]:
+        return list(self.columns)
+
+    def __bool__(self) -> bool:
+        if self._first is None:
+            self._first = self.cursor.fetchmany(self.batch)
+
+            if not self._first:
+                self.close()
+
+        return bool(self._first)
+
+    def __iter__(self) -> Iterator[Fila]:
+        rows, self._first = self._first, []
+
+        try:
+            if rows is None:
+                rows = self.cursor.fetchmany(self.batch)
+
+            while rows:
+                for values in rows:
+                    yield Fila(self.columns, values)
+
+                rows = self.cursor.fetchmany(self.batch)
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        self.connection.close()
@@ -0,0 +1,232 @@
+""" Historial diario de las métricas de un proyecto.
+    historial_proyecto guarda por proyecto y día (UTC) una foto con el
+    total de tareas y las tareas por estado, por equipo y asignadas a
+    cada miembro (usuario). `rollup` toma la foto del día solo de los
+    proyectos cuya versión (ver version_proyecto) cambió desde su última
+    foto, registrada en historial_version: un proyecto sin cambios no
+    tiene filas ese día y vale su foto anterior. Las tareas y sus
+    asignaciones cambian la versión desde sus triggers (ver
+    triggers.sql), así el avance de las tareas entra en la foto del día.
+    Las fotos se leen de los contadores (ver MetricasProyecto) y de las
+    asignaciones del proyecto, sin recorrer ticket_tarea. `history` lee
+    un rango de días por la clave primaria (proyecto, dia, ...).
+"""
+from datetime import date, datetime, timedelta, timezone
+
+from mysql.connector.cursor import CursorBase
+
+import app.config as config
+from app.db import close_conn_cursor, get_connection
+from app.models.metricas import MetricasProyecto
+from app.models.referencia import Referencia
+
+# días que devuelve history sin `desde`, y máximo de un rango pedido
+HISTORY_DEFAULT_DAYS: int = getattr(config, "HISTORY_DEFAULT_DAYS", 30)
+HISTORY_MAX_DAYS: int = getattr(config, "HISTORY_MAX_DAYS", 366)
+
+# proyectos sin foto o modificados desde la última
+_CHANGED = """SELECT p.id AS proyecto, COALESCE(vp.version, 0) AS version
+    FROM proyecto AS p
+    LEFT JOIN version_proyecto AS vp
+    ON vp.proyecto = p.id
+    LEFT JOIN historial_version AS hv
+    ON hv.proyecto = p.id
+    WHERE hv.proyecto IS NULL OR hv.version <> COALESCE(vp.version, 0)"""
+
+_ASSIGNED_PER_MEMBER = """SELECT
+    ipr.integrante AS usuario, COUNT(a.id) AS total
+    FROM integrantes_proyecto AS ipr
+    INNER JOIN miembros_equipo AS m
+    ON m.miembro = ipr.id
+    INNER JOIN asignacion_tarea AS a
+    ON a.miembro = m.id
+    WHERE ipr.proyecto = %(proyecto)s
+    GROUP BY ipr.integrante"""
+
+# tipo -> (tabla, columna) de los nombres de sus claves
+_NAMES = {
+    "equipo": ("equipo", "nombre"),
+    "miembro": ("usuario", "username"),
+}
+
+
+def today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+def history_range(desde: str | None, hasta: str | None) -> tuple[date, date]:
+    """Rango de días pedido, con fechas ISO (AAAA-MM-DD).
+
+    Raises:
+        ValueError: fechas inválidas, desde posterior a hasta o más de
+        HISTORY_MAX_DAYS días.
+    """
+
+    try:
+        end = date.fromisoformat(hasta) if hasta else today()
+        start = (
+            date.fromisoformat(desde)
+            if desde
+            else end - timedelta(days=HISTORY_DEFAULT_DAYS - 1)
+        )
+    except ValueError:
+        raise ValueError("Las fechas deben tener el formato AAAA-MM-DD")
+
+    if start > end:
+        raise ValueError("La fecha desde no puede ser posterior a hasta")
+
+    if (end - start).days >= HISTORY_MAX_DAYS:
+        raise ValueError(f"El rango no puede superar los {HISTORY_MAX_DAYS} días")
+
+    return start, end
+
+
+class HistorialProyecto:
+    """Fotos diarias de historial_proyecto(proyecto, dia, tipo, clave,
+    total). El tipo `total` (clave 0) está en todas las fotos."""
+
+    @classmethod
+    def snapshot(cls, cursor: CursorBase, project_id: int) -> list[tuple]:
+        """Filas (tipo, clave, total) de la foto actual del proyecto.
+
+        Args:
+            cursor (CursorBase): cursor de diccionarios.
+        """
+
+        states = MetricasProyecto.status_totals(cursor, project_id)
+        teams = MetricasProyecto.tasks_per_team(cursor, project_id)
+
+        cursor.execute(_ASSIGNED_PER_MEMBER, {"proyecto": project_id})
+        members = cursor.fetchall()
+
+        return [
+            ("total", 0, sum(states.values())),
+            *(("estado", state, total) for state, total in states.items()),
+            *(("equipo", team["id"], int(team["total"])) for team in teams),
+            *(("miembro", row["usuario"], int(row["total"])) for row in members),
+        ]
+
+    @classmethod
+    def rollup(cls, test_db: bool = False, day: date | None = None) -> int:
+        """Guardar la foto del día de los proyectos modificados desde su
+        última foto, cada uno en su transacción. Repetirlo el mismo día
+        reemplaza las fotos de los proyectos modificados en el medio.
+
+        Returns:
+            int: proyectos procesados.
+        """
+
+        day = day or today()
+
+        cnx = get_connection(connect_test_db=test_db)
+        cursor = cnx.cursor(dictionary=True)
+
+        cursor.execute(_CHANGED)
+        changed = cursor.fetchall()
+
+        for row in changed:
+            project_id = row["proyecto"]
+            # una escritura posterior a la lectura de la versión puede
+            # entrar en la foto, se repite en la próxima ejecución
+            rows = cls.snapshot(cursor, project_id)
+
+            cursor.execute(
+                "DELETE FROM historial_proyecto WHERE proyecto = %s AND dia = %s",
+                (project_id, day),
+            )
+            cursor.executemany(
+                """INSERT INTO historial_proyecto(proyecto, dia, tipo, clave, total)
+                VALUES (%s, %s, %s, %s, %s)""",
+                [(project_id, day, *snapshot_row) for snapshot_row in rows],
+            )
+            cursor.execute(
+                """INSERT INTO historial_version(proyecto, version, dia)
+                VALUES (%s, %s, %s)
+                ON DUPLICATE KEY UPDATE version = %s, dia = %s""",
+                (project_id, row["version"], day, row["version"], day),
+            )
+            cnx.commit()
+
+        close_conn_cursor(cnx, cursor)
+
+        return len(changed)
+
+    @classmethod
+    def history(
+        cls, cursor: CursorBase, project_id: int, desde: date, hasta: date
+    ) -> dict:
+        """Fotos de cada día del rango. Los días sin foto repiten la
+        anterior y los previos a la primera foto del proyecto se omiten.
+
+        Args:
+            cursor (CursorBase): cursor de diccionarios.
+
+        Returns:
+            dict: `nombres` (por tipo, clave -> nombre) y `dias`, una
+            foto por día con `total` y, por tipo, clave -> total.
+        """
+
+        # la foto vigente al comienzo del rango puede ser anterior a él
+        cursor.execute(
+            """SELECT MAX(dia) AS dia FROM historial_proyecto
+            WHERE proyecto = %s AND dia <= %s""",
+            (project_id, desde),
+        )
+        start = cursor.fetchone()["dia"] or desde
+
+        cursor.execute(
+            """SELECT dia, tipo, clave, total FROM historial_proyecto
+            WHERE proyecto = %s AND dia BETWEEN %s AND %s
+            ORDER BY dia, tipo, clave""",
+            (project_id, start, hasta),
+        )
+
+        snapshots: dict[date, dict] = {}
+        keys: dict[str, set] = {"estado": set(), "equipo": set(), "miembro": set()}
+
+        for row in cursor.fetchall():
+            snapshot = snapshots.setdefault(
+                row["dia"], {"total": 0, "estado": {}, "equipo": {}, "miembro": {}}
+            )
+
+            if row["tipo"] == "total":
+                snapshot["total"] = row["total"]
+            else:
+                snapshot[row["tipo"]][row["clave"]] = row["total"]
+                keys[row["tipo"]].add(row["clave"])
+
+        days, current = [], snapshots.get(start)
+
+        for offset in range((hasta - desde).days + 1):
+            day = desde + timedelta(days=offset)
+            current = snapshots.get(day, current)
+
+            if current is not None:
+                days.append({"dia": day.isoformat(), **current})
+
+        names = {
+            "estado": {
+                key: Referencia.name_of("estado", key) for key in keys["estado"]
+            },
+            **{kind: cls._names(cursor, kind, keys[kind]) for kind in _NAMES},
+        }
+
+        return {"nombres": names, "dias": days}
+
+    @classmethod
+    def _names(cls, cursor: CursorBase, kind: str, keys: set) -> dict:
+        """Nombres de equipos o usuarios por id, None si ya no existen."""
+
+        if not keys:
+            return {}
+
+        table, column = _NAMES[kind]
+        placeholders = ", ".join(["%s"] * len(keys))
+
+        cursor.execute(
+            f"SELECT id, {column} AS nombre FROM {table} WHERE id IN ({placeholders})",
+            tuple(keys),
+        )
+        found = {row["id"]: row["nombre"] for row in cursor.fetchall()}
+
+        return {key: found.get(key) for key in keys}
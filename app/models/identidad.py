@@ -0,0 +1,91 @@
+""" Mapa de identidad por request.
+    Dentro de un request cada registro se carga una sola vez: las
+    lecturas por id, username, email o sesión retornan la instancia ya
+    cargada. Fuera de un request (CLI, hilos de mantenimiento) no se
+    guarda nada y cada lectura consulta la base de datos.
+"""
+from typing import Any, Callable, Hashable
+
+from flask import g, has_request_context
+
+
+def _identity_map() -> dict | None:
+    if not has_request_context():
+        return None
+
+    return g.setdefault("identity_map", {})
+
+
+def _normalize(value: Any) -> Hashable:
+    # los ids llegan como int desde la db y como str desde las rutas
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+
+    return value
+
+
+def lookup(model: type, field: str, value: Any) -> Any | None:
+    """Instancia de model ya cargada con field == value, o None."""
+
+    identity_map = _identity_map()
+
+    if identity_map is None or value is None:
+        return None
+
+    return identity_map.get((model, field, _normalize(value)))
+
+
+def remember(instance: Any, **keys: Any) -> Any:
+    """Registrar una instancia bajo las claves indicadas, reemplazando
+    las que tuviera (p. ej. tras cambiar su username).
+
+    Returns:
+        la misma instancia.
+    """
+
+    identity_map = _identity_map()
+
+    if identity_map is None:
+        return instance
+
+    forget(instance)
+
+    model = type(instance)
+
+    for field, value in keys.items():
+        if value is not None:
+            identity_map[(model, field, _normalize(value))] = instance
+
+    return instance
+
+
+def forget(instance: Any) -> None:
+    """Quitar una instancia del mapa, p. ej. tras borrarla."""
+
+    model = type(instance)
+
+    forget_where(
+        lambda loaded: type(loaded) is model
+        and (loaded is instance or _same_record(loaded, instance))
+    )
+
+
+def forget_where(condition: Callable[[Any], bool]) -> None:
+    """Quitar las instancias que cumplan la condición, p. ej. los
+    registros borrados en cascada."""
+
+    identity_map = _identity_map()
+
+    if identity_map is None:
+        return
+
+    for key in [key for key, loaded in identity_map.items() if condition(loaded)]:
+        del identity_map[key]
+
+
+def same_id(a: Any, b: Any) -> bool:
+    return a is not None and b is not None and _normalize(a) == _normalize(b)
+
+
+def _same_record(loaded: Any, instance: Any) -> bool:
+    return same_id(getattr(loaded, "id", None), getattr(instance, "id", None))
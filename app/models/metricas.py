@@ -0,0 +1,302 @@
+""" Métricas de un proyecto para app.api.project.
+    Los totales del proyecto, de sus equipos y por estado se leen de las
+    tablas de contadores (ver app.models.contadores) por clave primaria.
+    Un proyecto sin contadores todavía se cuenta con las consultas
+    `_COUNT_*`, que como el resto parten de las filas del proyecto (por
+    la clave foránea `proyecto` o por el id del proyecto) en lugar de
+    agrupar tablas enteras y filtrar después, por lo que su costo
+    depende del tamaño del proyecto y no de la cantidad total de
+    proyectos.
+    `full_scans` verifica esto con EXPLAIN, ver tests/test_metricas.py y
+    db-cli explain-metrics.
+"""
+from typing import Any
+
+from mysql.connector.cursor import CursorBase
+
+from app.db import get_connection
+from app.models.referencia import Referencia
+
+_GENERAL = """SELECT
+    equipos AS total_equipos, tareas AS total_tareas
+    , integrantes AS total_integrantes
+    FROM contadores_proyecto
+    WHERE proyecto = %(proyecto)s"""
+
+# sin filas si el proyecto no tiene contadores, una fila con equipo
+# NULL si los tiene pero no tiene equipos
+_TEAMS = """SELECT
+    ce.equipo AS id, e.nombre, ce.tareas, ce.miembros
+    FROM contadores_proyecto AS cp
+    LEFT JOIN contadores_equipo AS ce
+    ON ce.proyecto = cp.proyecto
+    LEFT JOIN equipo AS e
+    ON e.id = ce.equipo
+    WHERE cp.proyecto = %(proyecto)s
+    ORDER BY ce.equipo"""
+
+# ídem con estado NULL si no tiene tareas
+_STATUSES = """SELECT
+    ce.estado, ce.tareas AS total
+    FROM contadores_proyecto AS cp
+    LEFT JOIN contadores_estado AS ce
+    ON ce.proyecto = cp.proyecto
+    WHERE cp.proyecto = %(proyecto)s"""
+
+_COUNT_GENERAL = """SELECT
+    (SELECT COUNT(*) FROM equipo WHERE proyecto = p.id) AS total_equipos
+    , (SELECT COUNT(*) FROM ticket_tarea WHERE proyecto = p.id) AS total_tareas
+    , (SELECT COUNT(*) FROM integrantes_proyecto WHERE proyecto = p.id)
+    AS total_integrantes
+    FROM proyecto AS p
+    WHERE p.id = %(proyecto)s"""
+
+# equipos del usuario con alguna tarea asignada y total de asignaciones
+_USER_TOTALS = """SELECT
+    COUNT(DISTINCT me.id) AS total_equipos
+    , COUNT(asigt.id) AS total_tareas
+    FROM usuario AS u
+    INNER JOIN integrantes_proyecto AS ipr
+    ON u.id = ipr.integrante
+    INNER JOIN miembros_equipo AS me
+    ON ipr.id = me.miembro
+    INNER JOIN asignacion_tarea AS asigt
+    ON me.id = asigt.miembro
+    WHERE ipr.proyecto = %(proyecto)s AND u.username = %(usuario)s"""
+
+_USER_PER_STATUS = """SELECT
+    tt.estado, COUNT(tt.id) AS total
+    FROM usuario AS u
+    INNER JOIN integrantes_proyecto AS ipr
+    ON u.id = ipr.integrante
+    INNER JOIN miembros_equipo AS me
+    ON ipr.id = me.miembro
+    INNER JOIN asignacion_tarea AS asigt
+    ON me.id = asigt.miembro
+    INNER JOIN ticket_tarea AS tt
+    ON asigt.ticket_tarea = tt.id
+    WHERE ipr.proyecto = %(proyecto)s AND u.username = %(usuario)s
+    GROUP BY tt.estado
+    ORDER BY tt.estado"""
+
+_COUNT_TASKS_PER_TEAM = """SELECT
+    e.id, e.nombre, COUNT(tt.id) AS total
+    FROM equipo AS e
+    LEFT JOIN ticket_tarea AS tt
+    ON e.id = tt.equipo
+    WHERE e.proyecto = %(proyecto)s
+    GROUP BY e.id"""
+
+_COUNT_MEMBERS_PER_TEAM = """SELECT
+    e.id, e.nombre, COUNT(m.id) AS total
+    FROM equipo AS e
+    INNER JOIN miembros_equipo AS m
+    ON e.id = m.equipo
+    WHERE e.proyecto = %(proyecto)s
+    GROUP BY e.id"""
+
+_COUNT_TASKS_PER_STATUS = """SELECT
+    estado, COUNT(id) AS total
+    FROM ticket_tarea
+    WHERE proyecto = %(proyecto)s
+    GROUP BY estado"""
+
+# nombre -> consulta, todas las que verifica full_scans
+QUERIES: dict[str, str] = {
+    "gral_stats": _GENERAL,
+    "user_stats totales": _USER_TOTALS,
+    "user_stats por estado": _USER_PER_STATUS,
+    "tareas_equipo y miembros_equipo": _TEAMS,
+    "estado_tareas": _STATUSES,
+    "gral_stats sin contadores": _COUNT_GENERAL,
+    "tareas_equipo sin contadores": _COUNT_TASKS_PER_TEAM,
+    "miembros_equipo sin contadores": _COUNT_MEMBERS_PER_TEAM,
+    "estado_tareas sin contadores": _COUNT_TASKS_PER_STATUS,
+}
+
+# tipos de acceso de EXPLAIN que recorren una tabla o un índice completos
+_FULL_SCAN_TYPES = ("ALL", "index")
+
+
+class MetricasProyecto:
+    """Consultas de métricas de un proyecto. Reciben un cursor de
+    diccionarios (context_db_manager(dict=True))."""
+
+    @classmethod
+    def general(cls, cursor: CursorBase, project_id: int) -> dict | None:
+        """Totales de equipos, tareas e integrantes, None si el proyecto
+        no existe."""
+
+        cursor.execute(_GENERAL, {"proyecto": project_id})
+        row = cursor.fetchone()
+
+        if row is None:
+            cursor.execute(_COUNT_GENERAL, {"proyecto": project_id})
+            row = cursor.fetchone()
+
+        if row is None:
+            return None
+
+        return {key: int(value) for key, value in row.items()}
+
+    @classmethod
+    def of_user(cls, cursor: CursorBase, project_id: int, username: str) -> dict:
+        """Equipos y tareas asignadas del usuario en el proyecto, con el
+        total de sus tareas por estado."""
+
+        params = {"proyecto": project_id, "usuario": username}
+
+        cursor.execute(_USER_TOTALS, params)
+        data = {key: int(value) for key, value in cursor.fetchone().items()}
+
+        cursor.execute(_USER_PER_STATUS, params)
+        data["por_estado"] = [
+            {
+                "nombre": Referencia.name_of("estado", row["estado"]),
+                "total": row["total"],
+            }
+            for row in cursor.fetchall()
+        ]
+
+        return data
+
+    @classmethod
+    def _teams(cls, cursor: CursorBase, project_id: int) -> list[dict] | None:
+        """Contadores de los equipos del proyecto, None si no tiene."""
+
+        cursor.execute(_TEAMS, {"proyecto": project_id})
+        rows = cursor.fetchall()
+
+        if not rows:
+            return None
+
+        return [row for row in rows if row["id"] is not None]
+
+    @classmethod
+    def tasks_per_team(cls, cursor: CursorBase, project_id: int) -> list[dict]:
+        teams = cls._teams(cursor, project_id)
+
+        if teams is None:
+            cursor.execute(_COUNT_TASKS_PER_TEAM, {"proyecto": project_id})
+            return cursor.fetchall()
+
+        return [
+            {"id": team["id"], "nombre": team["nombre"], "total": team["tareas"]}
+            for team in teams
+        ]
+
+    @classmethod
+    def members_per_team(cls, cursor: CursorBase, project_id: int) -> list[dict]:
+        """Equipos con al menos un miembro y su total de miembros."""
+
+        teams = cls._teams(cursor, project_id)
+
+        if teams is None:
+            cursor.execute(_COUNT_MEMBERS_PER_TEAM, {"proyecto": project_id})
+            return cursor.fetchall()
+
+        return [
+            {"id": team["id"], "nombre": team["nombre"], "total": team["miembros"]}
+            for team in teams
+            if team["miembros"] > 0
+        ]
+
+    @classmethod
+    def status_totals(cls, cursor: CursorBase, project_id: int) -> dict[int, int]:
+        """id de estado -> total de tareas, solo estados con tareas."""
+
+        cursor.execute(_STATUSES, {"proyecto": project_id})
+        rows = cursor.fetchall()
+
+        if not rows:
+            cursor.execute(_COUNT_TASKS_PER_STATUS, {"proyecto": project_id})
+            rows = cursor.fetchall()
+
+        return {
+            row["estado"]: int(row["total"])
+            for row in rows
+            if row["estado"] is not None and row["total"]
+        }
+
+    @classmethod
+    def tasks_per_status(cls, cursor: CursorBase, project_id: int) -> list[dict]:
+        """Total de tareas de cada estado, también de los que no tienen
+        tareas."""
+
+        totals = cls.status_totals(cursor, project_id)
+
+        return [
+            {"id": st["id"], "nombre": st["nombre"], "total": totals.get(st["id"], 0)}
+            for st in Referencia.rows("estado")
+        ]
+
+    @classmethod
+    def full_scans(
+        cls, cursor: CursorBase, project_id: int, username: str
+    ) -> list[dict[str, Any]]:
+        """Pasos de los planes de EXPLAIN de QUERIES que recorren una
+        tabla o un índice completos.
+
+        Returns:
+            list[dict]: una fila por paso, con la consulta, la tabla, el
+            tipo de acceso y las filas estimadas. Vacía si ninguna consulta
+            recorre tablas completas.
+        """
+
+        params = {"proyecto": project_id, "usuario": username}
+        scans = []
+
+        for name, query in QUERIES.items():
+            cursor.execute("EXPLAIN " + query, params)
+
+            for step in cursor.fetchall():
+                if step["type"] in _FULL_SCAN_TYPES:
+                    scans.append(
+                        {
+                            "consulta": name,
+                            "tabla": step["table"],
+                            "tipo": step["type"],
+                            "filas": step["rows"],
+                        }
+                    )
+
+        return scans
+
+    @classmethod
+    def explain_sample(
+        cls, test_db: bool = False
+    ) -> tuple[int, str, list[dict[str, Any]]] | None:
+        """full_scans sobre el proyecto con más tareas y uno de sus
+        integrantes.
+
+        Returns:
+            (id del proyecto, username, full_scans), None si no hay
+            proyectos con integrantes.
+        """
+
+        cnx = get_connection(connect_test_db=test_db)
+        cursor = cnx.cursor(dictionary=True)
+
+        cursor.execute(
+            """SELECT ipr.proyecto, u.username
+            FROM integrantes_proyecto AS ipr
+            INNER JOIN usuario AS u
+            ON u.id = ipr.integrante
+            ORDER BY (
+                SELECT COUNT(*) FROM ticket_tarea WHERE proyecto = ipr.proyecto
+            ) DESC
+            LIMIT 1"""
+        )
+        sample = cursor.fetchone()
+
+        if sample is None:
+            cursor.close()
+            cnx.close()
+            return None
+
+        scans = cls.full_scans(cursor, sample["proyecto"], sample["username"])
+
+        cursor.close()
+        cnx.close()
+
+        return sample["proyecto"], sample["username"], scans
@@ -0,0 +1,124 @@
+""" Paginación por clave (keyset) para los listados del usuario.
+    En lugar de OFFSET, cada página se pide a partir del id de la última
+    (o primera) fila de la página anterior: `id > despues` o `id < antes`,
+    con orden estable por id. El costo de una página no depende de
+    cuántas filas haya antes de ella.
+"""
+from typing import Any
+
+from mysql.connector.cursor import CursorBase
+
+import app.config as config
+from app.models.filas import Fila, fetch_rows
+
+PAGE_SIZE: int = getattr(config, "PAGE_SIZE", 50)
+MAX_PAGE_SIZE: int = getattr(config, "MAX_PAGE_SIZE", 200)
+
+
+def _as_id(value: Any) -> int | None:
+    if value is None or not str(value).isdigit():
+        return None
+
+    return int(value)
+
+
+class Pagina:
+    """Filas de una página y los cursores para pedir la siguiente
+    (`despues=siguiente`) y la anterior (`antes=anterior`), None si no hay."""
+
+    __slots__ = ("filas", "siguiente", "anterior", "cantidad")
+
+    def __init__(
+        self,
+        filas: list[Fila],
+        siguiente: int | None,
+        anterior: int | None,
+        cantidad: int,
+    ) -> None:
+        self.filas = filas
+        self.siguiente = siguiente
+        self.anterior = anterior
+        self.cantidad = cantidad
+
+    def to_dict(self) -> dict:
+        return {
+            "filas": [dict(fila) for fila in self.filas],
+            "siguiente": self.siguiente,
+            "anterior": self.anterior,
+            "cantidad": self.cantidad,
+        }
+
+
+def page_size(value: Any = None) -> int:
+    """Tamaño de página pedido, acotado entre 1 y MAX_PAGE_SIZE."""
+
+    size = _as_id(value)
+
+    if size is None or size < 1:
+        return PAGE_SIZE
+
+    return min(size, MAX_PAGE_SIZE)
+
+
+def fetch_page(
+    cursor: CursorBase,
+    query: str,
+    params: tuple,
+    id_column: str,
+    id_key: str,
+    despues: Any = None,
+    antes: Any = None,
+    cantidad: Any = None,
+) -> Pagina:
+    """Ejecutar una consulta de listado paginada.
+
+    Args:
+        cursor (CursorBase): cursor de tuplas.
+        query (str): consulta sin ORDER BY, con `{keyset}` al final de
+        su WHERE.
+        id_column (str): columna de orden, p. ej. "p.id".
+        id_key (str): nombre de esa columna en las filas, p. ej. "id proyecto".
+        despues, antes: cursores recibidos, si se indican los dos se usa
+        `despues`.
+        cantidad: tamaño de página pedido.
+    """
+
+    size = page_size(cantidad)
+    despues, antes = _as_id(despues), _as_id(antes)
+    backwards = despues is None and antes is not None
+
+    if despues is not None:
+        keyset, keyset_params = f"AND {id_column} > %s", (despues,)
+    elif backwards:
+        keyset, keyset_params = f"AND {id_column} < %s", (antes,)
+    else:
+        keyset, keyset_params = "", ()
+
+    # una fila de más indica si hay otra página en ese sentido
+    cursor.execute(
+        query.format(keyset=keyset)
+        + f" ORDER BY {id_column} {'DESC' if backwards else 'ASC'} LIMIT %s",
+        (*params, *keyset_params, size + 1),
+    )
+
+    filas = fetch_rows(cursor)
+    has_more = len(filas) > size
+    filas = filas[:size]
+
+    if backwards:
+        filas.reverse()
+
+    if not filas:
+        return Pagina(filas, None, None, size)
+
+    first_id, last_id = filas[0][id_key], filas[-1][id_key]
+
+    if backwards:
+        return Pagina(filas, last_id, first_id if has_more else None, size)
+
+    return Pagina(
+        filas,
+        last_id if has_more else None,
+        first_id if despues is not None else None,
+        size,
+    )
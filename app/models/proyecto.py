@@ -1,5 +1,5 @@
 from datetime import date
-from typing import Any, Iterator, Optional, Union
+from typing import Any, Iterable, Iterator, Optional, Union
 
 from mysql.connector.connection import MySQLConnection
 from mysql.connector.cursor import CursorBase
@@ -7,45 +7,135 @@ from mysql.connector.pooling import PooledMySQLConnection
 from mysql.connector.types import RowType
 
 import app.models.equipo as equipo
+import app.models.identidad as identidad
 import app.models.ticket_tarea as ticket_tarea
 import app.models.usuario as usuario
 from app.db import get_connection
+from app.models.acceso import AccesoUsuario
+from app.models.busqueda import search_page
+from app.models.contadores import Contadores
+from app.models.filas import StreamedRows, fetch_models, fetch_rows
+from app.models.paginacion import Pagina, fetch_page
+from app.models.version_proyecto import VersionProyecto, aggregate_cache
+
+
+_PROJECTS_OF_PARTICIPANT = """SELECT
+    p.id as 'id proyecto', p.nombre as 'nombre proyecto'
+    , p.es_publico as "publico", p.activo, p.presupuesto
+    , p.fecha_inicio as "fecha inicio", p.fecha_finalizacion as "fecha finalizacion"
+    , i.id as 'id integrante', rp.nombre as 'rol'
+    FROM
+    proyecto as  p
+    INNER JOIN
+    integrantes_proyecto as i
+    ON p.id = i.proyecto
+    INNER JOIN
+    roles_proyecto as rp
+    ON rp.id = i.rol
+    WHERE i.integrante = %s {keyset}
+"""
 
 
 class Proyecto:
+    __slots__ = (
+        "id",
+        "nombre",
+        "descripcion",
+        "es_publico",
+        "activo",
+        "presupuesto",
+        "fecha_inicio",
+        "fecha_finalizacion",
+        "participantes",
+        "equipos",
+        "tareas",
+    )
+
     @classmethod
     def _get_all_of_participant(cls, participant_id):
         cnx: MySQLConnection | PooledMySQLConnection = get_connection()
-        cursor: CursorBase = cnx.cursor(dictionary=True)
-
-        select_query: str = """SELECT
-                p.id as 'id proyecto', p.nombre as 'nombre proyecto'
-                , p.es_publico as "publico", p.activo, p.presupuesto
-                , p.fecha_inicio as "fecha inicio", p.fecha_finalizacion as "fecha finalizacion"
-                , i.id as 'id integrante', rp.nombre as 'rol'
-                FROM
-                proyecto as  p
-                INNER JOIN
-                integrantes_proyecto as i
-                ON p.id = i.proyecto
-                INNER JOIN
-                roles_proyecto as rp
-                ON rp.id = i.rol
-                WHERE i.integrante = %s
-                ORDER BY p.id
-        """
+        cursor: CursorBase = cnx.cursor()
 
-        cursor.execute(select_query, (participant_id,))
+        cursor.execute(
+            _PROJECTS_OF_PARTICIPANT.format(keyset="") + " ORDER BY p.id",
+            (participant_id,),
+        )
 
-        proyects_of_participant: RowType | None = cursor.fetchall()
+        proyects_of_participant = fetch_rows(cursor)
 
         cursor.close()
         cnx.close()
 
         return proyects_of_participant
 
+    @classmethod
+    def page_of_participant(
+        cls, participant_id, despues=None, antes=None, cantidad=None
+    ) -> Pagina:
+        """Una página de los proyectos del participante, ordenados por id."""
+
+        cnx: MySQLConnection | PooledMySQLConnection = get_connection()
+        cursor: CursorBase = cnx.cursor()
+
+        page = fetch_page(
+            cursor,
+            _PROJECTS_OF_PARTICIPANT,
+            (participant_id,),
+            id_column="p.id",
+            id_key="id proyecto",
+            despues=despues,
+            antes=antes,
+            cantidad=cantidad,
+        )
+
+        cursor.close()
+        cnx.close()
+
+        return page
+
+    @classmethod
+    def stream_of_participant(cls, participant_id) -> StreamedRows:
+        """Todos los proyectos del usuario, leídos en streaming."""
+
+        return StreamedRows(
+            _PROJECTS_OF_PARTICIPANT.format(keyset="") + " ORDER BY p.id",
+            (participant_id,),
+        )
+
+    @classmethod
+    def search_of_participant(
+        cls, participant_id, consulta, pagina=None, cantidad=None
+    ) -> Pagina:
+        """Proyectos del usuario cuyo nombre o descripción coinciden con la
+        consulta, por relevancia."""
+
+        cnx: MySQLConnection | PooledMySQLConnection = get_connection()
+        cursor: CursorBase = cnx.cursor()
+
+        page = search_page(
+            cursor,
+            _PROJECTS_OF_PARTICIPANT,
+            (participant_id,),
+            match_columns="p.nombre, p.descripcion",
+            name_column="p.nombre",
+            id_column="p.id",
+            consulta=consulta,
+            pagina=pagina,
+            cantidad=cantidad,
+        )
+
+        cursor.close()
+        cnx.close()
+
+        return page
+
     @classmethod
     def get_by_id(cls, id) -> Union["Proyecto", None]:
+        loaded_proyect = identidad.lookup(Proyecto, "id", id)
+
+        if loaded_proyect is not None:
+            return loaded_proyect
+
         cnx: MySQLConnection | PooledMySQLConnection = get_connection()
         cursor: CursorBase = cnx.cursor(dictionary=True)
 
@@ -57,12 +147,50 @@ class Proyecto:
 
         if loaded_proyect is not None:
             loaded_proyect: "Proyecto" = Proyecto(**loaded_proyect)
+            identidad.remember(loaded_proyect, id=loaded_proyect.id)
 
         cursor.close()
         cnx.close()
 
         return loaded_proyect
 
+    @classmethod
+    def get_many(cls, ids: Iterable[int]) -> dict[int, "Proyecto"]:
+        """Proyectos con los ids indicados en una sola consulta, por id."""
+
+        loaded_proyects = {}
+        ids_to_load = []
+
+        for id in ids:
+            loaded_proyect = identidad.lookup(Proyecto, "id", id)
+
+            if loaded_proyect is not None:
+                loaded_proyects[loaded_proyect.id] = loaded_proyect
+            else:
+                ids_to_load.append(id)
+
+        if not ids_to_load:
+            return loaded_proyects
+
+        placeholders = ", ".join(["%s"] * len(ids_to_load))
+
+        cnx: MySQLConnection | PooledMySQLConnection = get_connection()
+        cursor: CursorBase = cnx.cursor()
+
+        cursor.execute(
+            f"SELECT * FROM proyecto WHERE id IN ({placeholders})", ids_to_load
+        )
+
+        for loaded_proyect in fetch_models(cursor, Proyecto):
+            loaded_proyects[loaded_proyect.id] = identidad.remember(
+                loaded_proyect, id=loaded_proyect.id
+            )
+
+        cursor.close()
+        cnx.close()
+
+        return loaded_proyects
+
     def __init__(
         self,
         nombre: str,
@@ -97,6 +225,7 @@ class Proyecto:
         VALUES (%s, %s, %s, %s, %s, %s, %s)"""
 
         cursor.execute(insert_query, self.__tuple__())
+        Contadores.project_created(cursor, cursor.lastrowid)
 
         cnx.commit()
         cursor.close()
@@ -114,23 +243,38 @@ class Proyecto:
         WHERE id=%s"""
 
         cursor.execute(insert_query, (*self.__tuple__(), self.id))
+        VersionProyecto.bump(cursor, self.id)
 
         cnx.commit()
         cursor.close()
         cnx.close()
 
+        identidad.remember(self, id=self.id)
+
     def delete(self) -> None:
         cnx: MySQLConnection | PooledMySQLConnection = get_connection()
         cursor: CursorBase = cnx.cursor()
 
         delete_query: str = "DELETE FROM proyecto WHERE id = %s"
 
+        AccesoUsuario.forget_project(cursor, self.id)
         cursor.execute(delete_query, (self.id,))
 
         cnx.commit()
         cursor.close()
         cnx.close()
 
+        # sus filas de version_proyecto y de contadores se borran en cascada
+        aggregate_cache.discard_where(lambda key, _: identidad.same_id(key[0], self.id))
+
+        # sus equipos y tareas se borran en cascada
+        identidad.forget(self)
+        identidad.forget_where(
+            lambda loaded: identidad.same_id(
+                getattr(loaded, "id_proyecto", None), self.id
+            )
+        )
+
     def register_new_participant(self, participant_id: int, role_id: int) -> None:
         cnx: MySQLConnection | PooledMySQLConnection = get_connection()
         cursor: CursorBase = cnx.cursor()
@@ -140,6 +284,9 @@ class Proyecto:
         VALUES (%s, %s, %s)"""
 
         cursor.execute(insert_participant, (self.id, participant_id, role_id))
+        Contadores.participant_added(cursor, self.id)
+        AccesoUsuario.refresh_user(cursor, participant_id)
+        VersionProyecto.bump(cursor, self.id)
 
         cnx.commit()
         cursor.close()
@@ -155,6 +302,8 @@ class Proyecto:
         WHERE proyecto=%s AND integrante=%s"""
 
         cursor.execute(update_participant, (role_id, self.id, participant_id))
+        AccesoUsuario.refresh_user(cursor, participant_id)
+        VersionProyecto.bump(cursor, self.id)
 
         cnx.commit()
         cursor.close()
@@ -168,7 +317,10 @@ class Proyecto:
         update_participant = """DELETE FROM integrantes_proyecto
         WHERE proyecto=%s AND integrante=%s"""
 
+        Contadores.participant_removed(cursor, self.id, participant_id)
         cursor.execute(update_participant, (self.id, participant_id))
+        AccesoUsuario.refresh_user(cursor, participant_id)
+        VersionProyecto.bump(cursor, self.id)
 
         cnx.commit()
         cursor.close()
@@ -259,8 +411,9 @@ class Proyecto:
         if as_dicts:
             self.tareas = all_tasks
         else:
+            # el proyecto de cada tarea es este, no hace falta consultarlo
             for t in all_tasks:
-                self.tareas.append(ticket_tarea.Ticket_Tarea(**t))
+                self.tareas.append(ticket_tarea.Ticket_Tarea(**{**t, "proyecto": self}))
 
     def load_own_resources(self, as_dicts: bool):
         self._fetch_all_participants(as_dicts)
@@ -281,6 +434,9 @@ class Proyecto:
 
         result = cursor.fetchone()
 
+        cursor.close()
+        connection.close()
+
         if result is not None and result[0] == 1:
             return True
 
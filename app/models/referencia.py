@@ -0,0 +1,166 @@
+import threading
+import time
+
+from mysql.connector import Error as dbError
+
+import app.config as config
+from app.db import close_conn_cursor, get_connection
+
+# segundos entre consultas a version_referencia
+REFERENCE_CHECK_INTERVAL: float = getattr(config, "REFERENCE_CHECK_INTERVAL", 30.0)
+# segundos tras los que se recargan las tablas aunque no cambie la versión
+REFERENCE_CACHE_TTL: float = getattr(config, "REFERENCE_CACHE_TTL", 3600.0)
+
+_REFERENCE_QUERIES = {
+    "roles_proyecto": "SELECT id, nombre FROM roles_proyecto ORDER BY id",
+    "roles_equipo": "SELECT id, nombre FROM roles_equipo ORDER BY id",
+    "estado": "SELECT id, nombre FROM estado ORDER BY id",
+    "prefijo_telefono": "SELECT id, prefijo, pais FROM prefijo_telefono ORDER BY id",
+}
+
+
+class Referencia:
+    """Copia en memoria de las tablas de referencia (roles, estados y
+    prefijos telefónicos), que casi nunca cambian.
+
+    Las tablas se cargan juntas y se identifican con la versión guardada
+    en version_referencia. Cada REFERENCE_CHECK_INTERVAL segundos se lee
+    esa versión y, si cambió (ver `flask db-cli refresh-reference`) o
+    pasó REFERENCE_CACHE_TTL, se vuelven a cargar.
+    """
+
+    _tables: dict[str, list[dict]] = {}
+    _by_id: dict[str, dict[int, dict]] = {}
+    _version: int | None = None
+    _loaded_at = 0.0
+    _checked_at = 0.0
+    _lock = threading.Lock()
+
+    @classmethod
+    def rows(cls, table: str) -> list[dict]:
+        """Filas de una tabla de referencia, ordenadas por id."""
+
+        cls._ensure_fresh()
+
+        return [dict(row) for row in cls._tables[table]]
+
+    @classmethod
+    def get(cls, table: str, id: int | str) -> dict | None:
+        """Fila de una tabla de referencia por id, None si no existe."""
+
+        cls._ensure_fresh()
+
+        row = cls._by_id[table].get(int(id)) if str(id).isdigit() else None
+
+        return dict(row) if row is not None else None
+
+    @classmethod
+    def name_of(cls, table: str, id: int | str) -> str | None:
+        row = cls.get(table, id)
+
+        return row["nombre"] if row is not None else None
+
+    @classmethod
+    def version(cls) -> int:
+        cls._ensure_fresh()
+
+        return cls._version
+
+    @classmethod
+    def load(cls, test_db: bool = False) -> dict[str, int]:
+        """Cargar todas las tablas de referencia en una sola conexión.
+
+        Returns:
+            dict: filas cargadas por tabla.
+        """
+
+        cnx = get_connection(connect_test_db=test_db)
+        cursor = cnx.cursor(dictionary=True)
+
+        version = cls._read_version(cursor)
+        tables = {}
+
+        for table, query in _REFERENCE_QUERIES.items():
+            cursor.execute(query)
+            tables[table] = cursor.fetchall()
+
+        close_conn_cursor(cnx, cursor)
+
+        with cls._lock:
+            cls._tables = tables
+            cls._by_id = {
+                table: {row["id"]: row for row in rows}
+                for table, rows in tables.items()
+            }
+            cls._version = version
+            cls._loaded_at = cls._checked_at = time.monotonic()
+
+        return {table: len(rows) for table, rows in tables.items()}
+
+    @classmethod
+    def bump_version(cls, test_db: bool = False) -> int:
+        """Incrementar la versión para que todos los procesos recarguen
+        las tablas en su próxima verificación.
+
+        Returns:
+            int: versión nueva.
+        """
+
+        cnx = get_connection(connect_test_db=test_db)
+        cursor = cnx.cursor(dictionary=True)
+
+        cursor.execute(
+            """INSERT INTO version_referencia(id, version) VALUES (1, 1)
+            ON DUPLICATE KEY UPDATE version = version + 1"""
+        )
+        version = cls._read_version(cursor)
+
+        cnx.commit()
+        close_conn_cursor(cnx, cursor)
+
+        return version
+
+    @classmethod
+    def _read_version(cls, cursor) -> int:
+        cursor.execute("SELECT version FROM version_referencia WHERE id = 1")
+        row = cursor.fetchone()
+
+        return row["version"] if row is not None else 0
+
+    @classmethod
+    def _ensure_fresh(cls) -> None:
+        now = time.monotonic()
+
+        if (
+            cls._version is not None
+            and now - cls._checked_at < REFERENCE_CHECK_INTERVAL
+        ):
+            return
+
+        if cls._version is None or now - cls._loaded_at >= REFERENCE_CACHE_TTL:
+            cls.load()
+            return
+
+        cnx = get_connection()
+        cursor = cnx.cursor(dictionary=True)
+
+        version = cls._read_version(cursor)
+
+        close_conn_cursor(cnx, cursor)
+
+        if version != cls._version:
+            cls.load()
+        else:
+            cls._checked_at = now
+
+
+def preload_reference_data() -> None:
+    """Cargar las tablas de referencia al iniciar la aplicación. Si la
+    base de datos no está disponible (p. ej. antes de `create-db`) se
+    cargan en el primer uso."""
+
+    try:
+        Referencia.load()
+    except dbError as exception:
+        # TODO: Loggear este output a algun lugar
+        print(f"There was an error while loading the reference data:\n {exception}")
@@ -0,0 +1,91 @@
+from typing import Any, Callable, Iterable
+
+
+class LazyForeignKey:
+    """Atributo de clave foránea que se carga en el primer acceso.
+
+    El id se guarda en `id_<nombre>` y el objeto relacionado recién se
+    consulta al leer `<nombre>`. Asignar un id descarta el objeto cargado;
+    asignar un objeto guarda también su id. Las clases con __slots__
+    deben declarar `id_<nombre>` y `_<nombre>_cargado`.
+
+    Args:
+        get_one: recibe un id y retorna el objeto o None.
+        get_many: recibe ids y retorna {id: objeto}, para `prefetch`.
+    """
+
+    def __init__(
+        self,
+        get_one: Callable[[int], Any],
+        get_many: Callable[[Iterable[int]], dict[int, Any]],
+    ) -> None:
+        self.get_one = get_one
+        self.get_many = get_many
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+        self.id_attribute = f"id_{name}"
+        self.cache_attribute = f"_{name}_cargado"
+
+    def __get__(self, instance: Any, owner: type) -> Any:
+        if instance is None:
+            return self
+
+        if not self.is_loaded(instance):
+            related_id = getattr(instance, self.id_attribute, None)
+            setattr(
+                instance,
+                self.cache_attribute,
+                self.get_one(related_id) if related_id is not None else None,
+            )
+
+        return getattr(instance, self.cache_attribute)
+
+    def __set__(self, instance: Any, value: Any) -> None:
+        if value is None or isinstance(value, (int, str)):
+            setattr(instance, self.id_attribute, value)
+
+            if self.is_loaded(instance):
+                delattr(instance, self.cache_attribute)
+        else:
+            setattr(instance, self.id_attribute, value.id)
+            setattr(instance, self.cache_attribute, value)
+
+    def is_loaded(self, instance: Any) -> bool:
+        return hasattr(instance, self.cache_attribute)
+
+
+def prefetch(instances: list, *names: str) -> list:
+    """Cargar las relaciones indicadas de varios objetos con una consulta
+    `IN (...)` por relación, en lugar de una por objeto.
+
+    Returns:
+        list: los mismos objetos, con sus relaciones cargadas.
+    """
+
+    if not instances:
+        return instances
+
+    for name in names:
+        relation: LazyForeignKey = getattr(type(instances[0]), name)
+
+        pending = [
+            instance for instance in instances if not relation.is_loaded(instance)
+        ]
+        ids = {
+            getattr(instance, relation.id_attribute)
+            for instance in pending
+            if getattr(instance, relation.id_attribute, None) is not None
+        }
+
+        loaded = relation.get_many(ids) if ids else {}
+
+        for instance in pending:
+            related_id = getattr(instance, relation.id_attribute, None)
+            setattr(
+                instance,
+                relation.cache_attribute,
+                loaded.get(int(related_id) if related_id is not None else None),
+            )
+
+    return instances
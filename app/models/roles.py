@@ -1,60 +1,19 @@
-from bcrypt import checkpw, gensalt, hashpw
-from mysql.connector.connection import MySQLConnection
-from mysql.connector.cursor import CursorBase
-from mysql.connector.pooling import PooledMySQLConnection
-from mysql.connector.types import RowType
-
-from app.db import close_conn_cursor, context_db_manager, get_connection
+from app.models.referencia import Referencia
 
 
 class Roles:
     @classmethod
     def get_proyect_roles(cls):
-        cnx = get_connection()
-        cursor = cnx.cursor(dictionary=True)
-
-        query = "SELECT * FROM roles_proyecto"
-
-        cursor.execute(query)
-
-        result = cursor.fetchall()
-
-        cursor.close()
-        cnx.close()
-
-        return result
+        return Referencia.rows("roles_proyecto")
 
     @classmethod
     def proyect_role_name(cls, id: int):
-        cnx = get_connection()
-        cursor = cnx.cursor()
-
-        query = "SELECT nombre FROM roles_proyecto WHERE id=%s"
-
-        cursor.execute(query, (id,))
-
-        result = cursor.fetchone()
-
-        cursor.close()
-        cnx.close()
-
-        if result is not None:
-            return result[0]
-
-        return None
+        return Referencia.name_of("roles_proyecto", id)
 
     @classmethod
     def get_team_roles(cls):
-        cnx = get_connection()
-        cursor = cnx.cursor(dictionary=True)
-
-        query = "SELECT * FROM roles_equipo"
+        return Referencia.rows("roles_equipo")
 
-        cursor.execute(query)
-
-        result = cursor.fetchall()
-
-        cursor.close()
-        cnx.close()
-
-        return result
+    @classmethod
+    def team_role_name(cls, id: int):
+        return Referencia.name_of("roles_equipo", id)
@@ -0,0 +1,253 @@
+import atexit
+import datetime
+import hashlib
+import threading
+import time
+from typing import Union
+
+import app.config as config
+import app.models.usuario as usuario
+from app.db import close_conn_cursor, get_connection
+
+SESSION_MAX_AGE = datetime.timedelta(days=5)
+# iniciar el hilo de mantenimiento al crear la aplicación
+SESSION_MAINTENANCE: bool = getattr(config, "SESSION_MAINTENANCE", True)
+# segundos entre escrituras en lote de ultimo_acceso
+LAST_SEEN_FLUSH_INTERVAL: float = getattr(config, "SESSION_FLUSH_INTERVAL", 30.0)
+# segundos entre barridos de sesiones vencidas
+SWEEP_INTERVAL: float = getattr(config, "SESSION_SWEEP_INTERVAL", 600.0)
+# filas por sentencia en los barridos y en las escrituras en lote
+SWEEP_BATCH: int = getattr(config, "SESSION_SWEEP_BATCH", 500)
+
+
+class Sesion:
+    """Sesiones de usuario, una fila por dispositivo/navegador.
+
+    Solo se guarda el hash del token de la cookie. El último acceso se
+    acumula en memoria y se escribe en lotes (ver flush_last_seen); las
+    sesiones vencidas se borran en tandas pequeñas (ver sweep_expired).
+    """
+
+    _last_seen: dict[str, datetime.datetime] = {}
+    _last_seen_lock = threading.Lock()
+
+    @staticmethod
+    def hash_token(token: str) -> str:
+        return hashlib.sha256(token.encode("utf8")).hexdigest()
+
+    @classmethod
+    def create(
+        cls,
+        user_id: int,
+        token: str,
+        duration: datetime.timedelta = SESSION_MAX_AGE,
+        cursor=None,
+    ) -> bool:
+        """Registrar una sesión nueva.
+
+        Args:
+            cursor (optional): cursor de una transacción en curso, si no se
+            usa uno propio y se confirma la escritura.
+        """
+
+        insert_query = """INSERT INTO sesion(token_hash, usuario, expira)
+        VALUES (%s, %s, NOW() + INTERVAL %s SECOND)"""
+        values = (cls.hash_token(token), user_id, int(duration.total_seconds()))
+
+        if cursor is not None:
+            cursor.execute(insert_query, values)
+            return cursor.rowcount == 1
+
+        cnx = get_connection()
+        cursor = cnx.cursor()
+
+        cursor.execute(insert_query, values)
+        created = cursor.rowcount == 1
+
+        cnx.commit()
+        close_conn_cursor(cnx, cursor)
+
+        return created
+
+    @classmethod
+    def get_user(cls, token: str) -> Union["usuario.Usuario", None]:
+        """Usuario de una sesión vigente, por el índice único de token_hash."""
+
+        user_by_session_query = f"""SELECT {usuario.USER_COLUMNS}
+            FROM sesion AS s
+            INNER JOIN usuario AS u
+            ON s.usuario = u.id
+            INNER JOIN prefijo_telefono AS p
+            ON u.telefono_prefijo = p.id
+            WHERE s.token_hash = %s AND s.expira > NOW()
+            """
+
+        cnx = get_connection()
+        cursor = cnx.cursor(dictionary=True)
+
+        cursor.execute(user_by_session_query, (cls.hash_token(token),))
+
+        user_info = cursor.fetchone()
+
+        close_conn_cursor(cnx, cursor)
+
+        if user_info is None:
+            return None
+
+        return usuario.Usuario(**user_info)
+
+    @classmethod
+    def end(cls, token: str) -> None:
+        cnx = get_connection()
+        cursor = cnx.cursor()
+
+        cursor.execute(
+            "DELETE FROM sesion WHERE token_hash = %s", (cls.hash_token(token),)
+        )
+
+        cnx.commit()
+        close_conn_cursor(cnx, cursor)
+
+        with cls._last_seen_lock:
+            cls._last_seen.pop(cls.hash_token(token), None)
+
+    @classmethod
+    def end_all(cls, user_id: int, cursor=None) -> None:
+        """Cerrar todas las sesiones de un usuario."""
+
+        if cursor is not None:
+            cursor.execute("DELETE FROM sesion WHERE usuario = %s", (user_id,))
+            return
+
+        cnx = get_connection()
+        cursor = cnx.cursor()
+
+        cursor.execute("DELETE FROM sesion WHERE usuario = %s", (user_id,))
+
+        cnx.commit()
+        close_conn_cursor(cnx, cursor)
+
+    @classmethod
+    def touch(cls, token: str) -> None:
+        """Anotar un acceso a la sesión, se escribe en el próximo lote."""
+
+        with cls._last_seen_lock:
+            cls._last_seen[cls.hash_token(token)] = datetime.datetime.now()
+
+    @classmethod
+    def flush_last_seen(cls) -> int:
+        """Escribir en un solo lote los accesos acumulados.
+
+        Returns:
+            int: sesiones actualizadas.
+        """
+
+        with cls._last_seen_lock:
+            pending, cls._last_seen = cls._last_seen, {}
+
+        if not pending:
+            return 0
+
+        pending = list(pending.items())
+
+        cnx = get_connection()
+        cursor = cnx.cursor()
+
+        # una sentencia por tanda: UPDATE ... CASE token_hash WHEN ... END
+        for start in range(0, len(pending), SWEEP_BATCH):
+            chunk = pending[start : start + SWEEP_BATCH]
+
+            cases = " ".join(["WHEN %s THEN %s"] * len(chunk))
+            placeholders = ", ".join(["%s"] * len(chunk))
+
+            cursor.execute(
+                f"""UPDATE sesion
+                SET ultimo_acceso = CASE token_hash {cases} END
+                WHERE token_hash IN ({placeholders})""",
+                (
+                    *[value for pair in chunk for value in pair],
+                    *[token_hash for token_hash, _ in chunk],
+                ),
+            )
+
+        cnx.commit()
+        close_conn_cursor(cnx, cursor)
+
+        return len(pending)
+
+    @classmethod
+    def sweep_expired(cls, batch: int = SWEEP_BATCH, test_db: bool = False) -> int:
+        """Borrar las sesiones vencidas en tandas de a batch filas,
+        confirmando cada tanda para no retener bloqueos.
+
+        Returns:
+            int: sesiones borradas.
+        """
+
+        deleted = 0
+
+        cnx = get_connection(connect_test_db=test_db)
+        cursor = cnx.cursor()
+
+        while True:
+            cursor.execute(
+                "DELETE FROM sesion WHERE expira <= NOW() ORDER BY expira LIMIT %s",
+                (batch,),
+            )
+            cnx.commit()
+
+            deleted += cursor.rowcount
+
+            if cursor.rowcount < batch:
+                break
+
+        close_conn_cursor(cnx, cursor)
+
+        return deleted
+
+
+_maintenance_started = False
+_maintenance_lock = threading.Lock()
+
+
+def _flush_on_exit() -> None:
+    try:
+        Sesion.flush_last_seen()
+    except Exception as exception:
+        # TODO: Loggear este output a algun lugar
+        print(f"There was an error while saving session accesses:\n {exception}")
+
+
+def _maintenance_loop() -> None:
+    next_sweep = time.monotonic()
+
+    while True:
+        time.sleep(LAST_SEEN_FLUSH_INTERVAL)
+
+        try:
+            Sesion.flush_last_seen()
+
+            if time.monotonic() >= next_sweep:
+                Sesion.sweep_expired()
+                next_sweep = time.monotonic() + SWEEP_INTERVAL
+        except Exception as exception:
+            # TODO: Loggear este output a algun lugar
+            print(f"There was an error while maintaining sessions:\n {exception}")
+
+
+def start_session_maintenance() -> None:
+    """Iniciar, una vez por proceso, el hilo que escribe los últimos
+    accesos y barre las sesiones vencidas."""
+
+    global _maintenance_started
+
+    with _maintenance_lock:
+        if _maintenance_started:
+            return
+
+        threading.Thread(
+            target=_maintenance_loop, name="sesion-maintenance", daemon=True
+        ).start()
+        atexit.register(_flush_on_exit)
+
+        _maintenance_started = True
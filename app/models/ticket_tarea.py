@@ -7,50 +7,152 @@ from mysql.connector.pooling import PooledMySQLConnection
 from mysql.connector.types import RowType
 
 import app.models.equipo as equipo_mod
+import app.models.identidad as identidad
 import app.models.proyecto as proyecto_mod
-from app.db import get_connection
+from app.db import context_db_manager, get_connection
+from app.models.busqueda import search_page
+from app.models.filas import StreamedRows, fetch_rows
+from app.models.paginacion import Pagina, fetch_page
+from app.models.relacion import LazyForeignKey, prefetch
+
+
+_TASKS_OF_USER = """select
+    t.id as "id tarea", t.proyecto as "proyecto padre", t.equipo as "equipo encargado"
+    , t.nombre, t.estado, t.fecha_asignacion as "asignada a equipo"
+    , t.fecha_limite as "limite", a.id as "asignacion nº"
+    , a.fecha_asignacion as "asignada a usuario"
+    from
+    ticket_tarea as t
+    inner join
+    asignacion_tarea as a
+    on t.id = a.ticket_tarea
+    inner join
+    miembros_equipo as m
+    on a.miembro = m.id
+    inner join
+    integrantes_proyecto as ipr
+    on m.miembro = ipr.id
+    inner join
+    usuario as u
+    on ipr.integrante = u.id
+    where u.id = %s {keyset}
+"""
 
 
 class Ticket_Tarea:
+    __slots__ = (
+        "id",
+        "id_proyecto",
+        "_proyecto_cargado",
+        "id_equipo",
+        "_equipo_cargado",
+        "nombre",
+        "estado",
+        "descripcion",
+        "fecha_creacion",
+        "fecha_asignacion",
+        "fecha_limite",
+        "fecha_finalizacion",
+    )
+
+    # se cargan recién al leerlas, los ids están en id_proyecto e id_equipo
+    proyecto = LazyForeignKey(
+        get_one=lambda id: proyecto_mod.Proyecto.get_by_id(id),
+        get_many=lambda ids: proyecto_mod.Proyecto.get_many(ids),
+    )
+    equipo = LazyForeignKey(
+        get_one=lambda id: equipo_mod.Equipo.get_by_id(id),
+        get_many=lambda ids: equipo_mod.Equipo.get_many(ids),
+    )
+
+    @classmethod
+    def prefetch(cls, tasks: list["Ticket_Tarea"]) -> list["Ticket_Tarea"]:
+        """Cargar proyecto y equipo de varias tareas con una consulta
+        por relación."""
+
+        return prefetch(tasks, "proyecto", "equipo")
+
     @classmethod
     def _get_by_asigned_user(cls, user_id):
         cnx: MySQLConnection | PooledMySQLConnection = get_connection()
-        cursor: CursorBase = cnx.cursor(dictionary=True)
-
-        select_query: str = """select
-            t.id as "id tarea", t.proyecto as "proyecto padre", t.equipo as "equipo encargado"
-            , t.nombre, t.estado, t.fecha_asignacion as "asignada a equipo"
-            , t.fecha_limite as "limite", a.id as "asignacion nº"
-            , a.fecha_asignacion as "asignada a usuario"
-            from
-            ticket_tarea as t
-            inner join
-            asignacion_tarea as a
-            on t.id = a.ticket_tarea
-            inner join
-            miembros_equipo as m
-            on a.miembro = m.id
-            inner join
-            integrantes_proyecto as ipr
-            on m.miembro = ipr.id
-            inner join
-            usuario as u
-            on ipr.integrante = u.id
-            where u.id = %s
-            order by t.id;
-        """
+        cursor: CursorBase = cnx.cursor()
 
-        cursor.execute(select_query, (user_id,))
+        cursor.execute(_TASKS_OF_USER.format(keyset="") + " ORDER BY t.id", (user_id,))
 
-        tasks_of_user: RowType | None = cursor.fetchall()
+        rows = fetch_rows(cursor)
 
         cursor.close()
         cnx.close()
 
-        return tasks_of_user
+        return rows
+
+    @classmethod
+    def page_of_asigned_user(
+        cls, user_id, despues=None, antes=None, cantidad=None
+    ) -> Pagina:
+        """Una página de las tareas asignadas al usuario, ordenadas por id."""
+
+        cnx: MySQLConnection | PooledMySQLConnection = get_connection()
+        cursor: CursorBase = cnx.cursor()
+
+        page = fetch_page(
+            cursor,
+            _TASKS_OF_USER,
+            (user_id,),
+            id_column="t.id",
+            id_key="id tarea",
+            despues=despues,
+            antes=antes,
+            cantidad=cantidad,
+        )
+
+        cursor.close()
+        cnx.close()
+
+        return page
+
+    @classmethod
+    def stream_of_asigned_user(cls, user_id) -> StreamedRows:
+        """Todas las tareas asignadas al usuario, leídas en streaming."""
+
+        return StreamedRows(
+            _TASKS_OF_USER.format(keyset="") + " ORDER BY t.id", (user_id,)
+        )
+
+    @classmethod
+    def search_of_asigned_user(
+        cls, user_id, consulta, pagina=None, cantidad=None
+    ) -> Pagina:
+        """Tareas asignadas al usuario cuyo nombre o descripción coinciden
+        con la consulta, por relevancia."""
+
+        cnx: MySQLConnection | PooledMySQLConnection = get_connection()
+        cursor: CursorBase = cnx.cursor()
+
+        page = search_page(
+            cursor,
+            _TASKS_OF_USER,
+            (user_id,),
+            match_columns="t.nombre, t.descripcion",
+            name_column="t.nombre",
+            id_column="t.id",
+            consulta=consulta,
+            pagina=pagina,
+            cantidad=cantidad,
+        )
+
+        cursor.close()
+        cnx.close()
+
+        return page
 
     @classmethod
     def get_by_id(csl, task_id):
+        loaded_task = identidad.lookup(Ticket_Tarea, "id", task_id)
+
+        if loaded_task is not None:
+            return loaded_task
+
         query = """
         SELECT
         id, proyecto, equipo, nombre, estado, descripcion,
@@ -68,8 +170,13 @@ class Ticket_Tarea:
 
         queried_task = cursor.fetchone()
 
+        cursor.close()
+        connection.close()
+
         if queried_task is not None:
-            return Ticket_Tarea(**queried_task)
+            return identidad.remember(
+                Ticket_Tarea(**queried_task), id=queried_task["id"]
+            )
 
         return None
 
@@ -87,8 +194,8 @@ class Ticket_Tarea:
         id: Optional[int] = None,
     ) -> None:
         self.id = id
-        self.proyecto = proyecto_mod.Proyecto.get_by_id(proyecto)
-        self.equipo = equipo_mod.Equipo.get_by_id(equipo)
+        self.proyecto = proyecto
+        self.equipo = equipo
         self.nombre = nombre
         self.estado = estado
         self.descripcion = descripcion
@@ -98,9 +205,26 @@ class Ticket_Tarea:
         self.fecha_finalizacion = fecha_finalizacion
 
     def user_can_modify(self, user_id):
-        if self.proyecto.user_can_modify(user_id) or self.equipo.user_can_modify(
-            user_id
-        ):
-            return True
+        """Administrador del proyecto o del equipo de la tarea, resuelto
+        con los ids sin cargar el proyecto ni el equipo."""
+
+        query = """
+        SELECT
+        EXISTS(
+            SELECT 1 FROM integrantes_proyecto
+            WHERE integrante = %s AND proyecto = %s AND rol = 1
+        )
+        OR EXISTS(
+            SELECT 1 FROM miembros_equipo AS m
+            INNER JOIN integrantes_proyecto AS ipr
+            ON m.miembro = ipr.id
+            WHERE ipr.integrante = %s AND m.equipo = %s
+            AND (m.rol = 1 OR ipr.rol = 1)
+        )
+        """
+
+        with context_db_manager() as conn:
+            conn.execute(query, (user_id, self.id_proyecto, user_id, self.id_equipo))
+            result = conn.fetchone()
 
-        return False
+        return result is not None and result[0] == 1
@@ -1,24 +1,56 @@
 from typing import Any, Iterator, Optional, Sequence, Union
 
-from bcrypt import checkpw, gensalt, hashpw
 from mysql.connector.connection import MySQLConnection
 from mysql.connector.cursor import CursorBase
 from mysql.connector.pooling import PooledMySQLConnection
 from mysql.connector.types import RowType
 
 import app.models.equipo as equipo
+import app.models.identidad as identidad
 import app.models.proyecto as proyecto
+import app.models.sesion as sesion
 import app.models.ticket_tarea as ticket_tarea
+import app.passwords as passwords
+from app.cache import session_cache
 from app.db import close_conn_cursor, get_connection
+from app.models.contadores import Contadores
+from app.models.version_proyecto import VersionProyecto
+
+# columnas de todas las consultas que construyen un Usuario: las
+# instancias se comparten entre loaders por el mapa de identidad, una
+# cargada con menos columnas quedaría con atributos en None
+USER_COLUMNS = """u.id, u.username, u.nombre, u.apellido, u.email,
+    p.prefijo AS telefono_prefijo, u.telefono_numero, u.generacion_sesion"""
 
 
 class Usuario:
+    __slots__ = (
+        "id",
+        "username",
+        "nombre",
+        "apellido",
+        "email",
+        "telefono_prefijo",
+        "telefono_numero",
+        "contrasena",
+        "id_integrante",
+        "id_miembro",
+        "rol_proyecto",
+        "rol_equipo",
+        "generacion_sesion",
+        "proyectos",
+        "equipos",
+        "tareas",
+    )
+
     @classmethod
     def get_by_id(cls, id: int) -> Union["Usuario", None]:
-        user_info_query_by_id = """SELECT
-            u.id, username, nombre, apellido, email,
-            prefijo AS telefono_prefijo, telefono_numero,
-            llave_sesion
+        loaded_user = identidad.lookup(Usuario, "id", id)
+
+        if loaded_user is not None:
+            return loaded_user
+
+        user_info_query_by_id = f"""SELECT {USER_COLUMNS}
             FROM usuario AS u INNER JOIN prefijo_telefono AS p
             ON u.telefono_prefijo = p.id
             WHERE u.id = %s
@@ -31,61 +63,67 @@ class Usuario:
 
         loaded_user: RowType | Sequence[Any] | None = cursor.fetchone()
 
+        close_conn_cursor(cnx, cursor)
+
         if loaded_user is not None:
-            return Usuario(**loaded_user)
+            return Usuario(**loaded_user).remember()
 
         return None
 
     @classmethod
-    def get_by_session_id(self, session_id: str) -> Union["Usuario", None]:
-        user_info_query_by_id = """SELECT
-            u.id, username, nombre, apellido, email,
-            prefijo AS telefono_prefijo, telefono_numero,
-            llave_sesion
-            FROM usuario AS u INNER JOIN prefijo_telefono AS p
-            ON u.telefono_prefijo = p.id
-            WHERE u.llave_sesion = %s
-            """
+    def get_by_session_id(cls, session_id: str) -> Union["Usuario", None]:
+        loaded_user = identidad.lookup(Usuario, "sesion", session_id)
 
-        cnx: MySQLConnection | PooledMySQLConnection = get_connection()
-        cursor: CursorBase = cnx.cursor(dictionary=True)
+        if loaded_user is not None:
+            return loaded_user
 
-        cursor.execute(user_info_query_by_id, (session_id,))
-
-        loaded_user: RowType | Sequence[Any] | None = cursor.fetchone()
+        loaded_user = sesion.Sesion.get_user(session_id)
 
         if loaded_user is not None:
-            return Usuario(**loaded_user)
+            loaded_user.remember(session_id)
 
-        return None
+        return loaded_user
 
     @classmethod
-    def get_authenticated(cls, identif: str, contrasena: str) -> Union["Usuario", None]:
-        if not cls._authenticate(identif=identif, passwd=contrasena):
-            return None
+    def get_for_login(
+        cls, cursor: CursorBase, identif: str, by_email: bool
+    ) -> tuple[Union["Usuario", None], str | None]:
+        """Perfil y hash de contraseña en una sola consulta, por el índice
+        único de email o de username según el tipo de identificación.
 
-        cnx: MySQLConnection | PooledMySQLConnection = get_connection()
-        cursor: CursorBase = cnx.cursor(dictionary=True)
+        Args:
+            cursor (CursorBase): cursor con dictionary=True de la transacción
+            del login.
 
-        user_info_query_by_email = """SELECT
-            u.id, username, nombre, apellido, email,
-            prefijo AS telefono_prefijo, telefono_numero,
-            llave_sesion
+        Returns:
+            tuple: (usuario, hash de su contraseña), (None, None) si no existe.
+        """
+
+        column = "email" if by_email else "username"
+
+        user_login_query = f"""SELECT {USER_COLUMNS}, u.contrasena
             FROM usuario AS u INNER JOIN prefijo_telefono AS p
             ON u.telefono_prefijo = p.id
-            WHERE %s IN (email, username)
+            WHERE u.{column} = %s
             """
 
-        cursor.execute(user_info_query_by_email, (identif,))
+        cursor.execute(user_login_query, (identif,))
 
-        authenticated_user_info: dict = cursor.fetchone()
+        user_info: dict | None = cursor.fetchone()
 
-        close_conn_cursor(cnx, cursor)
+        if user_info is None:
+            return None, None
 
-        return Usuario(**authenticated_user_info)
+        hashed_passwd = user_info.pop("contrasena")
+
+        return Usuario(**user_info), hashed_passwd
 
     @classmethod
     def _authenticate(cls, identif: str, passwd: str) -> bool:
+        """Verificar la contraseña de un usuario ya logueado (p. ej. al
+        confirmar el borrado de su cuenta). No cuenta como intento de
+        login: fallar acá no debe frenar sus ingresos."""
+
         query_pass_by_email = (
             "SELECT contrasena FROM usuario WHERE %s IN (email, username)"
         )
@@ -100,35 +138,88 @@ class Usuario:
 
         query_result: dict | None = cursor.fetchone()
 
+        close_conn_cursor(cnx, cursor)
+
         if query_result is None:
             return False
 
         fetched_passwd: str = query_result["contrasena"]
 
+        return passwords.check_password(passwd, fetched_passwd)
+
+    @classmethod
+    def set_password_hash(
+        cls, cursor: CursorBase, user_id: int, hashed_passwd: bytes
+    ) -> None:
+        """Reemplazar el hash guardado, con el cursor de la transacción
+        en curso."""
+
+        cursor.execute(
+            "UPDATE usuario SET contrasena = %s WHERE id = %s",
+            (hashed_passwd, user_id),
+        )
+
+    @classmethod
+    def password_costs(cls, test_db: bool = False) -> dict[int, int]:
+        """Cantidad de usuarios por costo de bcrypt de su hash guardado."""
+
+        cnx: MySQLConnection | PooledMySQLConnection = get_connection(
+            connect_test_db=test_db
+        )
+        cursor: CursorBase = cnx.cursor()
+
+        # contrasena: "$2b$" + costo de dos dígitos + "$" + sal y hash
+        cursor.execute(
+            """SELECT CAST(SUBSTRING(contrasena, 5, 2) AS UNSIGNED) AS costo,
+            COUNT(*) FROM usuario GROUP BY costo ORDER BY costo"""
+        )
+
+        costs = {int(cost): int(count) for cost, count in cursor.fetchall()}
+
         close_conn_cursor(cnx, cursor)
 
-        return checkpw(passwd.encode("utf8"), fetched_passwd.encode("utf8"))
+        return costs
 
     @classmethod
     def remove_session(cls, user_id: int) -> None:
+        """Cerrar todas las sesiones del usuario, en todos sus dispositivos"""
+
         cnx: MySQLConnection | PooledMySQLConnection = get_connection()
         cursor: CursorBase = cnx.cursor()
 
-        sql = "UPDATE usuario SET llave_sesion = 'not_logged' WHERE id = %s"
+        # incrementar la generación revoca los tokens firmados ya emitidos
+        sql = """UPDATE usuario SET generacion_sesion = generacion_sesion + 1
+        WHERE id = %s"""
 
         cursor.execute(sql, (user_id,))
+        sesion.Sesion.end_all(user_id, cursor=cursor)
 
+        cnx.commit()
         cursor.close()
         cnx.close()
 
+        cls._forget_sessions(user_id)
+
+    @classmethod
+    def _forget_sessions(cls, user_id: int) -> None:
+        """Invalidar las sesiones del usuario guardadas en session_cache"""
+
+        session_cache.discard_where(lambda _, user: user.id == user_id)
+
     @classmethod
     def get_by_username_or_mail(cls, identif: str):
+        loaded_user = identidad.lookup(Usuario, "username", identif)
+
+        if loaded_user is None:
+            loaded_user = identidad.lookup(Usuario, "email", identif)
+
+        if loaded_user is not None:
+            return loaded_user
+
         cnx: MySQLConnection | PooledMySQLConnection = get_connection()
         cursor: CursorBase = cnx.cursor(dictionary=True)
 
-        user_info_query_by_email = """SELECT
-            u.id, username, nombre, apellido, email,
-            prefijo AS telefono_prefijo, telefono_numero
+        user_info_query_by_email = f"""SELECT {USER_COLUMNS}
             FROM usuario AS u INNER JOIN prefijo_telefono AS p
             ON u.telefono_prefijo = p.id
             WHERE %s IN (email, username)
@@ -141,7 +232,7 @@ class Usuario:
         close_conn_cursor(cnx, cursor)
 
         if user_info is not None:
-            return Usuario(**user_info)
+            return Usuario(**user_info).remember()
 
         return None
 
@@ -159,7 +250,7 @@ class Usuario:
         id_miembro: Optional[int] = None,
         rol_proyecto: Optional[str] = None,
         rol_equipo: Optional[str] = None,
-        llave_sesion: Optional[str] = None,
+        generacion_sesion: Optional[int] = None,
     ) -> None:
         self.id = id
         self.username = username
@@ -172,10 +263,10 @@ class Usuario:
         self.id_miembro = id_miembro
         self.rol_proyecto = rol_proyecto
         self.rol_equipo = rol_equipo
-        self.llave_sesion = llave_sesion
+        self.generacion_sesion = generacion_sesion
 
         if contrasena is not None and not contrasena[0:3] == "$2b":
-            self.contrasena = hashpw(contrasena.encode("utf8"), gensalt())
+            self.contrasena = passwords.hash_password(contrasena)
         else:
             self.contrasena = contrasena
 
@@ -217,12 +308,18 @@ class Usuario:
         cursor.close()
         cnx.close()
 
+        self._forget_sessions(self.id)
+        self.remember()
+
     def delete(self) -> None:
         cnx: MySQLConnection | PooledMySQLConnection = get_connection()
         cursor: CursorBase = cnx.cursor()
 
         sql = "DELETE FROM usuario WHERE id = %s"
 
+        # sus participaciones se borran en cascada
+        VersionProyecto.bump_of_user(cursor, self.id)
+        Contadores.user_removed(cursor, self.id)
         cursor.execute(sql, (self.id,))
 
         cnx.commit()
@@ -230,49 +327,32 @@ class Usuario:
         cursor.close()
         cnx.close()
 
-    def set_session_id(self, sessionId):
-        update_session_query = "UPDATE usuario SET llave_sesion = %s WHERE id = %s"
-
-        verify_session_update = "SELECT llave_sesion FROM usuario WHERE id = %s"
-
-        values = (sessionId, self.id)
+        self._forget_sessions(self.id)
+        identidad.forget(self)
 
-        cnx = get_connection()
-        cursor = cnx.cursor()
+    def remember(self, session_id: str | None = None) -> "Usuario":
+        """Registrar al usuario en el mapa de identidad del request, por
+        id, username, email y opcionalmente id de sesión."""
 
-        cursor.execute(update_session_query, values)
-        cnx.commit()
-        cursor.execute(verify_session_update, (self.id,))
-
-        queried_session_id = cursor.fetchone()
-
-        close_conn_cursor(cnx, cursor)
+        return identidad.remember(
+            self,
+            id=self.id,
+            username=self.username,
+            email=self.email,
+            sesion=session_id,
+        )
 
-        if queried_session_id is not None and sessionId == queried_session_id[0]:
-            return True
+    def set_session_id(self, sessionId, cursor: CursorBase | None = None) -> bool:
+        """Registrar una sesión nueva del usuario, sin cerrar las que
+        tenga abiertas en otros dispositivos"""
 
-        return False
+        return sesion.Sesion.create(self.id, sessionId, cursor=cursor)
 
     def load_own_resources(self):
         self.proyectos = proyecto.Proyecto._get_all_of_participant(self.id)
         self.equipos = equipo.Equipo._get_by_member(self.id)
         self.tareas = ticket_tarea.Ticket_Tarea._get_by_asigned_user(self.id)
 
-    def load_session_key(self):
-        verify_session_update = "SELECT llave_sesion FROM usuario WHERE id = %s"
-
-        cnx = get_connection()
-        cursor = cnx.cursor()
-
-        cursor.execute(verify_session_update, (self.id,))
-
-        queried_session_id = cursor.fetchone()
-
-        close_conn_cursor(cnx, cursor)
-
-        if queried_session_id is not None:
-            self.llave_sesion = queried_session_id[0]
-
     def __tuple__(self, with_id: bool = False) -> tuple:
         """Retornar atributos de usuario como tupla
 
@@ -342,6 +422,3 @@ class Usuario:
 
         if hasattr(self, "rol_equipo") and self.rol_equipo is not None:
             yield "rol_equipo", self.rol_equipo
-
-        if hasattr(self, "llave_sesion") and self.llave_sesion is not None:
-            yield "llave_sesion", self.llave_sesion
@@ -0,0 +1,170 @@
+""" Versión por proyecto para invalidar los agregados cacheados.
+    Cada escritura que cambia los conteos de un proyecto (equipos,
+    tareas, integrantes, miembros) incrementa su fila de
+    version_proyecto en la misma transacción; las de ticket_tarea lo
+    hacen desde sus triggers (ver triggers.sql), escriba quien escriba
+    las tareas. Los agregados se guardan en aggregate_cache bajo
+    (proyecto, nombre, versión): tras una escritura la versión cambia en
+    todos los workers y las entradas viejas dejan de leerse hasta que el
+    LRU las descarta.
+    La misma versión es el ETag de los endpoints de app.api.project.
+"""
+from datetime import datetime
+from typing import Any, Callable
+
+from flask import g, has_request_context
+from mysql.connector.cursor import CursorBase
+
+import app.config as config
+from app.cache import TTLCache
+from app.db import get_connection
+
+_MISSING = object()
+
+# (proyecto, agregado, versión) -> resultado, ver cached_aggregate
+aggregate_cache = TTLCache(
+    "agregados_proyecto",
+    maxsize=getattr(config, "AGGREGATE_CACHE_SIZE", 2000),
+    # la versión invalida, el TTL solo acota escrituras por fuera de
+    # los modelos (p. ej. borrados en cascada desde la consola)
+    ttl=getattr(config, "AGGREGATE_CACHE_TTL", 600.0),
+)
+
+
+def _request_versions() -> dict | None:
+    if not has_request_context():
+        return None
+
+    return g.setdefault("project_versions", {})
+
+
+def _request_writes() -> set | None:
+    if not has_request_context():
+        return None
+
+    return g.setdefault("projects_written", set())
+
+
+class VersionProyecto:
+    """Tabla version_proyecto(proyecto, version, modificado). Un proyecto
+    sin fila está en la versión 0, sin fecha de modificación."""
+
+    @classmethod
+    def read(cls, project_id: int) -> tuple[int, datetime | None]:
+        """Versión del proyecto y fecha (UTC) de su última escritura,
+        leídas una vez por request."""
+
+        versions = _request_versions()
+
+        if versions is not None and project_id in versions:
+            return versions[project_id]
+
+        cnx = get_connection()
+        cursor = cnx.cursor()
+
+        cursor.execute(
+            "SELECT version, modificado FROM version_proyecto WHERE proyecto = %s",
+            (project_id,),
+        )
+        row = cursor.fetchone()
+
+        cursor.close()
+        cnx.close()
+
+        version = (row[0], row[1]) if row is not None else (0, None)
+
+        if versions is not None:
+            versions[project_id] = version
+
+        return version
+
+    @classmethod
+    def get(cls, project_id: int) -> int | None:
+        """Versión actual del proyecto.
+
+        Returns:
+            int | None: None si el proyecto se modificó en este request,
+            sus agregados no se cachean hasta que la escritura se confirme.
+        """
+
+        writes = _request_writes()
+
+        if writes is not None and project_id in writes:
+            return None
+
+        return cls.read(project_id)[0]
+
+    @classmethod
+    def bump(cls, cursor: CursorBase, project_id: int) -> None:
+        """Incrementar la versión del proyecto, con el cursor (y la
+        transacción) de la escritura."""
+
+        cursor.execute(
+            """INSERT INTO version_proyecto(proyecto, version) VALUES (%s, 1)
+            ON DUPLICATE KEY UPDATE
+            version = version + 1, modificado = UTC_TIMESTAMP()""",
+            (project_id,),
+        )
+        cls._modified(project_id)
+
+    @classmethod
+    def bump_of_user(cls, cursor: CursorBase, user_id: int) -> None:
+        """Incrementar la versión de todos los proyectos del usuario.
+        Debe ejecutarse antes de borrarlo."""
+
+        cursor.execute(
+            """INSERT INTO version_proyecto(proyecto, version)
+            SELECT proyecto, 1 FROM integrantes_proyecto WHERE integrante = %s
+            ON DUPLICATE KEY UPDATE
+            version = version_proyecto.version + 1, modificado = UTC_TIMESTAMP()""",
+            (user_id,),
+        )
+        cursor.execute(
+            "SELECT proyecto FROM integrantes_proyecto WHERE integrante = %s",
+            (user_id,),
+        )
+
+        for (project_id,) in cursor.fetchall():
+            cls._modified(project_id)
+
+    @classmethod
+    def _modified(cls, project_id: int) -> None:
+        versions, writes = _request_versions(), _request_writes()
+
+        # una versión escrita pero no confirmada no debe guardarse en la
+        # cache: si el request se deshace, otra escritura la reutilizaría
+        if writes is not None:
+            versions.pop(int(project_id), None)
+            writes.add(int(project_id))
+
+
+def cached_aggregate(
+    project_id: Any, name: str, compute: Callable[[], Any], bypass: bool = False
+) -> Any:
+    """Resultado de compute() para el agregado name del proyecto,
+    desde aggregate_cache si la versión del proyecto no cambió.
+
+    Args:
+        bypass (bool): no leer la cache (el resultado sí se guarda).
+        Los resultados None no se guardan.
+    """
+
+    if not str(project_id).isdigit():
+        return compute()
+
+    project_id = int(project_id)
+    version = VersionProyecto.get(project_id)
+
+    if version is None:
+        return compute()
+
+    key = (project_id, name, version)
+    value = _MISSING if bypass else aggregate_cache.get(key, _MISSING)
+
+    if value is _MISSING:
+        value = compute()
+
+        if value is not None:
+            aggregate_cache.set(key, value)
+
+    return value
@@ -0,0 +1,323 @@
+""" Hash y verificación de contraseñas con bcrypt.
+    bcrypt ocupa la CPU por decenas o cientos de milisegundos; para que
+    una ráfaga de logins no deje sin workers al resto del tráfico, las
+    operaciones se ejecutan en un pool de hilos acotado (bcrypt libera
+    el GIL mientras calcula) con una cola de espera limitada. Si la cola
+    está llena se rechaza el pedido de inmediato (503) y si un mismo
+    identificador acumula demasiados intentos se lo frena (429).
+    El costo de bcrypt se calibra en el primer hash para que demore
+    cerca de PASSWORD_HASH_TARGET_MS en la máquina actual. Cada host
+    puede calibrar un costo distinto: los hashes guardados solo se
+    recalculan si su costo es menor, nunca para bajarlo. Para un costo
+    uniforme entre hosts, fijarlo con PASSWORD_ROUNDS (ver db-cli
+    password-cost).
+"""
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Callable
+
+from bcrypt import checkpw, gensalt, hashpw
+from flask import Flask, make_response, render_template
+from werkzeug.wrappers import Response
+
+import app.config as config
+from app.cache import TTLCache
+from app.metrics import Counter, Histogram, registry
+
+# hilos dedicados a bcrypt
+PASSWORD_WORKERS: int = getattr(config, "PASSWORD_WORKERS", os.cpu_count() or 2)
+# operaciones que pueden esperar un hilo libre antes de rechazar nuevas
+PASSWORD_QUEUE_LIMIT: int = getattr(
+    config, "PASSWORD_QUEUE_LIMIT", PASSWORD_WORKERS * 4
+)
+# segundos que un request espera el resultado de una operación
+PASSWORD_TIMEOUT: float = getattr(config, "PASSWORD_TIMEOUT", 5.0)
+# intentos de login por identificador dentro de la ventana
+LOGIN_MAX_ATTEMPTS: int = getattr(config, "LOGIN_MAX_ATTEMPTS", 5)
+LOGIN_ATTEMPTS_WINDOW: float = getattr(config, "LOGIN_ATTEMPTS_WINDOW", 60.0)
+# costo fijo de bcrypt, si no se indica se calibra según PASSWORD_HASH_TARGET_MS
+PASSWORD_ROUNDS: int | None = getattr(config, "PASSWORD_ROUNDS", None)
+PASSWORD_HASH_TARGET_MS: float = getattr(config, "PASSWORD_HASH_TARGET_MS", 250.0)
+PASSWORD_MIN_ROUNDS: int = getattr(config, "PASSWORD_MIN_ROUNDS", 10)
+PASSWORD_MAX_ROUNDS: int = getattr(config, "PASSWORD_MAX_ROUNDS", 16)
+
+_PASSWORD_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+queue_wait: Histogram = registry.register(
+    Histogram(
+        "promanager_password_queue_seconds",
+        "Espera de las operaciones de contraseña por un hilo libre",
+        labels=("operation",),
+        buckets=_PASSWORD_BUCKETS,
+    )
+)
+
+hash_time: Histogram = registry.register(
+    Histogram(
+        "promanager_password_hash_seconds",
+        "Duración de bcrypt por operación",
+        labels=("operation",),
+        buckets=_PASSWORD_BUCKETS,
+    )
+)
+
+rehashes: Counter = registry.register(
+    Counter(
+        "promanager_password_rehashes_total",
+        "Hashes guardados con un costo menor y recalculados al ingresar",
+    )
+)
+
+rejections: Counter = registry.register(
+    Counter(
+        "promanager_password_rejections_total",
+        "Operaciones de contraseña rechazadas",
+        labels=("reason",),
+    )
+)
+
+
+class PasswordServiceError(Exception):
+    status_code = 503
+    message = "El servicio está saturado, intente nuevamente en unos segundos."
+
+    def __init__(self, retry_after: int = 1) -> None:
+        super().__init__(self.message)
+        self.retry_after = retry_after
+
+
+class PasswordServiceBusy(PasswordServiceError):
+    """La cola del pool de bcrypt está llena o la operación no terminó
+    a tiempo."""
+
+
+class TooManyAttempts(PasswordServiceError):
+    """El identificador superó los intentos de login permitidos."""
+
+    status_code = 429
+    message = "Demasiados intentos de ingreso, espere un momento."
+
+
+_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_WORKERS, thread_name_prefix="bcrypt"
+)
+# operaciones en curso o esperando un hilo
+_pending = 0
+_pending_lock = threading.Lock()
+
+# identificador -> momentos de los intentos dentro de la ventana
+_attempts = TTLCache("login_attempts", maxsize=10000, ttl=LOGIN_ATTEMPTS_WINDOW)
+_attempts_lock = threading.Lock()
+
+
+def _run(operation: str, func: Callable, *args):
+    global _pending
+
+    with _pending_lock:
+        if _pending >= PASSWORD_WORKERS + PASSWORD_QUEUE_LIMIT:
+            rejections.inc(reason="queue_full")
+            raise PasswordServiceBusy()
+
+        _pending += 1
+
+    submitted = time.perf_counter()
+
+    def timed():
+        global _pending
+
+        started = time.perf_counter()
+        queue_wait.observe(started - submitted, operation=operation)
+
+        try:
+            return func(*args)
+        finally:
+            hash_time.observe(time.perf_counter() - started, operation=operation)
+
+            with _pending_lock:
+                _pending -= 1
+
+    future = _executor.submit(timed)
+
+    try:
+        return future.result(timeout=PASSWORD_TIMEOUT)
+    except FutureTimeoutError:
+        # si todavía no empezó se descarta, si no termina igual en su hilo
+        if future.cancel():
+            with _pending_lock:
+                _pending -= 1
+
+        rejections.inc(reason="timeout")
+        raise PasswordServiceBusy(retry_after=int(PASSWORD_TIMEOUT))
+
+
+_calibration: dict | None = None
+_calibration_lock = threading.Lock()
+
+
+def calibrate(target_ms: float = PASSWORD_HASH_TARGET_MS) -> dict:
+    """Elegir el costo de bcrypt más alto cuyo hash no supere target_ms.
+
+    Se mide un hash con PASSWORD_MIN_ROUNDS (el mejor de tres, para que
+    todos los workers lleguen al mismo costo) y se extrapola: cada punto
+    de costo duplica el tiempo.
+
+    Returns:
+        dict: costo elegido, objetivo, tiempo medido con el costo mínimo
+        y tiempo estimado con el elegido, en milisegundos.
+    """
+
+    global _calibration
+
+    timings = []
+
+    for _ in range(3):
+        started = time.perf_counter()
+        hashpw(b"calibracion", gensalt(rounds=PASSWORD_MIN_ROUNDS))
+        timings.append(time.perf_counter() - started)
+
+    measured_ms = min(timings) * 1000
+
+    rounds = PASSWORD_MIN_ROUNDS
+
+    while (
+        rounds < PASSWORD_MAX_ROUNDS
+        and measured_ms * 2 ** (rounds + 1 - PASSWORD_MIN_ROUNDS) <= target_ms
+    ):
+        rounds += 1
+
+    with _calibration_lock:
+        _calibration = {
+            "rounds": rounds,
+            "target_ms": target_ms,
+            "measured_ms": round(measured_ms, 1),
+            "measured_rounds": PASSWORD_MIN_ROUNDS,
+            "estimated_ms": round(measured_ms * 2 ** (rounds - PASSWORD_MIN_ROUNDS), 1),
+        }
+
+    return _calibration
+
+
+def bcrypt_rounds() -> int:
+    """Costo para los hashes nuevos: PASSWORD_ROUNDS o el calibrado,
+    que se mide la primera vez que se pide."""
+
+    if PASSWORD_ROUNDS is not None:
+        return PASSWORD_ROUNDS
+
+    if _calibration is None:
+        calibrate()
+
+    return _calibration["rounds"]
+
+
+def hash_rounds(hashed: str | bytes) -> int:
+    """Costo de un hash bcrypt ("$2b$12$...")."""
+
+    if isinstance(hashed, bytes):
+        hashed = hashed.decode("utf8")
+
+    return int(hashed.split("$")[2])
+
+
+def hash_password(password: str) -> bytes:
+    rounds = bcrypt_rounds()
+
+    return _run("hash", lambda: hashpw(password.encode("utf8"), gensalt(rounds=rounds)))
+
+
+def rehash_if_needed(password: str, hashed: str | bytes) -> bytes | None:
+    """Recalcular el hash de una contraseña ya verificada si fue guardado
+    con un costo menor al actual. Un costo mayor se conserva: lo pudo
+    calibrar un host más rápido.
+
+    Returns:
+        bytes | None: hash nuevo, None si no hace falta o si el pool está
+        saturado (se reintenta en el próximo ingreso).
+    """
+
+    if hash_rounds(hashed) >= bcrypt_rounds():
+        return None
+
+    try:
+        new_hash = hash_password(password)
+    except PasswordServiceBusy:
+        return None
+
+    rehashes.inc()
+
+    return new_hash
+
+
+def check_password(password: str, hashed: str | bytes, identifier: str = "") -> bool:
+    """Verificar una contraseña contra su hash.
+
+    Args:
+        identifier (str, optional): email o username del intento de login,
+        para limitar los intentos fallidos por identificador.
+
+    Raises:
+        TooManyAttempts: el identificador superó LOGIN_MAX_ATTEMPTS.
+        PasswordServiceBusy: el pool de bcrypt está saturado.
+    """
+
+    if identifier:
+        _register_attempt(identifier)
+
+    if isinstance(hashed, str):
+        hashed = hashed.encode("utf8")
+
+    valid = _run("check", checkpw, password.encode("utf8"), hashed)
+
+    if valid and identifier:
+        _attempts.pop(identifier.lower())
+
+    return valid
+
+
+def _register_attempt(identifier: str) -> None:
+    key = identifier.lower()
+    now = time.monotonic()
+
+    with _attempts_lock:
+        attempts: deque = _attempts.get(key) or deque()
+
+        while attempts and attempts[0] <= now - LOGIN_ATTEMPTS_WINDOW:
+            attempts.popleft()
+
+        if len(attempts) >= LOGIN_MAX_ATTEMPTS:
+            rejections.inc(reason="throttled")
+            raise TooManyAttempts(
+                retry_after=int(attempts[0] + LOGIN_ATTEMPTS_WINDOW - now) + 1
+            )
+
+        attempts.append(now)
+        _attempts.set(key, attempts)
+
+
+def error_response(error: PasswordServiceError, template: str, **context) -> Response:
+    """Respuesta para un PasswordServiceError, con Retry-After."""
+
+    response = make_response(
+        render_template(template, errors=[error.message], **context),
+        error.status_code,
+    )
+    response.headers["Retry-After"] = str(error.retry_after)
+
+    return response
+
+
+def init_passwords(app: Flask) -> None:
+    """Responder 429/503 a los PasswordServiceError no manejados por la
+    vista. El costo de bcrypt no se calibra acá: create_app también se
+    ejecuta en cada comando de la consola."""
+
+    @app.errorhandler(PasswordServiceError)
+    def password_service_error(error: PasswordServiceError) -> Response:
+        response = Response(error.message, status=error.status_code)
+        response.headers["Retry-After"] = str(error.retry_after)
+
+        return response
@@ -0,0 +1,210 @@
+""" Instrumentación de consultas SQL.
+    Registra cada sentencia ejecutada por los cursores de app.db
+    (forma de sus parámetros, filas y tiempo), escribe un log estructurado
+    de consultas lentas y detecta patrones N+1 dentro de un request.
+"""
+import json
+import logging
+import os
+import re
+import sys
+import time
+
+from flask import Flask, g, has_request_context, request
+from werkzeug.wrappers import Response
+
+import app.config as config
+
+# Consultas que superen este tiempo se escriben en el log de consultas lentas
+SLOW_QUERY_MS: float = getattr(config, "DB_SLOW_QUERY_MS", 200.0)
+# Veces que una misma sentencia puede repetirse en un request antes de
+# considerarla un N+1
+N_PLUS_ONE_THRESHOLD: int = getattr(config, "DB_N_PLUS_ONE_THRESHOLD", 5)
+# Agregar X-DB-Queries / X-DB-Time a las respuestas, por defecto solo en debug
+QUERY_HEADERS: bool | None = getattr(config, "DB_QUERY_HEADERS", None)
+
+logger = logging.getLogger(__name__)
+
+_APP_DIR = os.path.dirname(os.path.abspath(__file__))
+_IGNORED_FILES = (
+    os.path.join(_APP_DIR, "db.py"),
+    os.path.abspath(__file__),
+)
+_WHITESPACE = re.compile(r"\s+")
+
+
+class InstrumentedCursor:
+    """Envoltorio de un cursor de mysql-connector que registra cada
+    execute/executemany sin alterar su comportamiento."""
+
+    def __init__(self, cursor) -> None:
+        self._cursor = cursor
+
+    def __getattr__(self, attr):
+        return getattr(self._cursor, attr)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self._cursor.close()
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._cursor.execute(operation, params, *args, **kwargs)
+        finally:
+            record_query(
+                operation, params, self._cursor.rowcount, time.perf_counter() - start
+            )
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._cursor.executemany(operation, seq_params, *args, **kwargs)
+        finally:
+            record_query(
+                operation,
+                seq_params[0] if seq_params else None,
+                self._cursor.rowcount,
+                time.perf_counter() - start,
+                batch=len(seq_params),
+            )
+
+
+def _normalize(statement: str | bytes) -> str:
+    if isinstance(statement, bytes):
+        statement = statement.decode("utf8", errors="replace")
+
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+def _params_shape(params) -> list | dict | None:
+    """Tipos de los parametros, nunca sus valores."""
+
+    if params is None:
+        return None
+
+    if isinstance(params, dict):
+        return {key: type(value).__name__ for key, value in params.items()}
+
+    return [type(value).__name__ for value in params]
+
+
+def _caller() -> str | None:
+    """Primer frame de la aplicación fuera de la capa de base de datos."""
+
+    frame = sys._getframe(1)
+
+    while frame is not None:
+        filename = frame.f_code.co_filename
+
+        if filename.startswith(_APP_DIR) and filename not in _IGNORED_FILES:
+            relative = os.path.relpath(filename, os.path.dirname(_APP_DIR))
+            return f"{relative}:{frame.f_lineno} {frame.f_code.co_name}"
+
+        frame = frame.f_back
+
+    return None
+
+
+def record_query(
+    statement: str | bytes,
+    params,
+    rowcount: int,
+    elapsed: float,
+    batch: int = 1,
+) -> None:
+    """Registrar una sentencia ejecutada en el request actual, loggearla
+    si fue lenta y advertir si se repite lo suficiente como para ser N+1."""
+
+    normalized = _normalize(statement)
+    elapsed_ms = elapsed * 1000
+
+    entry = {
+        "statement": normalized,
+        "params": _params_shape(params),
+        "rows": rowcount,
+        "ms": round(elapsed_ms, 3),
+    }
+
+    if batch > 1:
+        entry["batch"] = batch
+
+    if elapsed_ms >= SLOW_QUERY_MS:
+        logger.warning(
+            json.dumps(
+                {
+                    "event": "slow_query",
+                    "path": _request_path(),
+                    "caller": _caller(),
+                    **entry,
+                },
+                default=str,
+            )
+        )
+
+    if not has_request_context():
+        return
+
+    g.setdefault("db_queries", []).append(entry)
+
+    counts = g.setdefault("db_statement_counts", {})
+    counts[normalized] = counts.get(normalized, 0) + 1
+
+    if counts[normalized] == N_PLUS_ONE_THRESHOLD:
+        logger.warning(
+            json.dumps(
+                {
+                    "event": "n_plus_one",
+                    "path": _request_path(),
+                    "caller": _caller(),
+                    "statement": normalized,
+                    "repeated": N_PLUS_ONE_THRESHOLD,
+                }
+            )
+        )
+
+
+def _request_path() -> str | None:
+    return request.path if has_request_context() else None
+
+
+def request_queries() -> list[dict]:
+    """Consultas registradas en el request actual."""
+
+    if not has_request_context():
+        return []
+
+    return g.get("db_queries", [])
+
+
+def init_query_log(app: Flask) -> None:
+    """Registrar el resumen por request y, en modo desarrollo,
+    los headers X-DB-Queries / X-DB-Time."""
+
+    @app.after_request
+    def summarize_queries(response: Response) -> Response:
+        add_headers = app.debug if QUERY_HEADERS is None else QUERY_HEADERS
+        queries = request_queries()
+        total_ms = sum(q["ms"] for q in queries)
+
+        logger.debug(
+            json.dumps(
+                {
+                    "event": "request_queries",
+                    "path": _request_path(),
+                    "queries": len(queries),
+                    "ms": round(total_ms, 3),
+                }
+            )
+        )
+
+        if add_headers:
+            response.headers["X-DB-Queries"] = str(len(queries))
+            response.headers["X-DB-Time"] = f"{total_ms:.3f}"
+
+        return response
@@ -1,8 +1,14 @@
 from flask import Blueprint, make_response, render_template, request
 from werkzeug.utils import redirect
 
+import app.passwords as passwords
 import app.validation as validation
-from app.authentication import generate_session_cookies, required_login
+from app.authentication import (
+    end_session,
+    generate_session_cookies,
+    login as login_user,
+    required_login,
+)
 from app.models import Usuario, prefijos_telefonicos
 
 bp = Blueprint(
@@ -38,7 +44,15 @@ def register():
         )
 
         if not errors:
-            new_user: "Usuario" = Usuario(**form)
+            try:
+                new_user: "Usuario" = Usuario(**form)
+            except passwords.PasswordServiceError as error:
+                return passwords.error_response(
+                    error,
+                    register_template,
+                    country_codes=prefijos_telefonicos.read_all(),
+                )
+
             new_user.create()
             return redirect("/auth/login")
 
@@ -59,40 +73,19 @@ def login():
     if request.method == "POST":
         user_auth_info = request.form
 
-        valid_email = validation.email_address(user_auth_info["identif"])
-        registered_email = validation.email_exists(user_auth_info["identif"])
-        valid_username = validation.username_length(user_auth_info["identif"])
-        registered_username = validation.username_exists(user_auth_info["identif"])
-
-        if not valid_email and not valid_username:
-            errors.append("La identificación ingresada no es válida")
-        elif valid_username and not registered_username:
-            errors.append("Nombre de usuario no registrado.")
-        elif valid_email and not registered_email:
-            errors.append("Email no registrado")
-
-        if errors:
-            response = make_response(render_template(template_name, errors=errors))
-            return response
-
-        logged_user = Usuario.get_authenticated(**user_auth_info)
+        try:
+            logged_user, session_cookie, errors = login_user(
+                user_auth_info["identif"], user_auth_info["contrasena"]
+            )
+        except passwords.PasswordServiceError as error:
+            return passwords.error_response(error, template_name)
 
-        if not logged_user:
-            errors.append("Error al autenticar. Contraseña o e-mail erróneos.")
-            response = make_response(render_template(template_name, errors=errors))
-            return response
-
-        session_cookie = generate_session_cookies()
-
-        if logged_user.set_session_id(session_cookie["value"]):
+        if not errors:
             response = redirect(f"/usuario/{logged_user.username}/dashboard")
             response.set_cookie(**session_cookie)
 
             return response
 
-        else:
-            errors.append("Hubo un error al establecer su sesión.")
-
     return render_template(template_name, errors=errors)
 
 
@@ -118,6 +111,8 @@ def denied_access():
 def logout():
     response = redirect("/")
 
+    end_session(request.cookies.get("sessionId"))
+
     dummy_cookies = generate_session_cookies()
 
     response.set_cookie(**dummy_cookies)
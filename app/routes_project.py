@@ -4,6 +4,7 @@ from werkzeug.wrappers import Response
 
 from app.authentication import need_authorization, required_login
 from app.models import Proyecto, Roles, Usuario
+from app.streaming import stream_page
 from app.validation.full import validate_project
 
 bp = Blueprint(
@@ -13,34 +14,63 @@ bp = Blueprint(
 )
 
 
+def _yes_no(row):
+    return row.replace(
+        publico="Sí" if row["publico"] == 1 else "No",
+        activo="Sí" if row["activo"] == 1 else "No",
+    )
+
+
 @bp.get("/")
 @required_login
 @need_authorization
 def user_proyects(username):
     current_user = Usuario.get_by_username_or_mail(username)
-    current_user.load_own_resources()
-    data = current_user.proyectos
+
+    # ?todos=1 lista todos los proyectos sin cargarlos en memoria
+    if request.args.get("todos"):
+        filas = Proyecto.stream_of_participant(current_user.id)
+
+        return stream_page(
+            "tables/generic_table.html",
+            # map() siempre es verdadero, el template necesita saber si
+            # hay filas para mostrar el mensaje de tabla vacía
+            data=map(_yes_no, filas) if filas else [],
+            data_keys=filas.keys(),
+            resource="proyecto",
+            current_user=current_user,
+        )
+
+    consulta = request.args.get("consulta")
+
+    if consulta:
+        pagina = Proyecto.search_of_participant(
+            current_user.id,
+            consulta,
+            pagina=request.args.get("pagina"),
+            cantidad=request.args.get("cantidad"),
+        )
+    else:
+        pagina = Proyecto.page_of_participant(
+            current_user.id,
+            despues=request.args.get("despues"),
+            antes=request.args.get("antes"),
+            cantidad=request.args.get("cantidad"),
+        )
+    data = [_yes_no(d) for d in pagina.filas]
 
     if data:
         data_keys = data[0].keys()
     else:
         data_keys = []
 
-    for d in data:
-        if d["publico"] == 1:
-            d["publico"] = "Sí"
-        else:
-            d["publico"] = "No"
-        if d["activo"] == 1:
-            d["activo"] = "Sí"
-        else:
-            d["activo"] = "No"
-
     return render_template(
         "tables/generic_table.html",
         data=data,
         data_keys=data_keys,
         resource="proyecto",
+        pagina=pagina,
+        consulta=consulta,
         current_user=current_user,
     )
 
@@ -3,7 +3,8 @@ from werkzeug.utils import redirect
 from werkzeug.wrappers import Response
 
 from app.authentication import need_authorization, required_login
-from app.models import Usuario, prefijos_telefonicos
+from app.models import Equipo, Ticket_Tarea, Usuario, prefijos_telefonicos
+from app.streaming import stream_page
 from app.validation.full import validate_user_update
 
 bp = Blueprint(
@@ -87,8 +88,36 @@ def dashboard(username):
 @need_authorization
 def user_teams(username):
     current_user = Usuario.get_by_username_or_mail(username)
-    current_user.load_own_resources()
-    data = current_user.equipos
+
+    # ?todos=1 lista todos los registros sin cargarlos en memoria
+    if request.args.get("todos"):
+        filas = Equipo.stream_of_member(current_user.id)
+
+        return stream_page(
+            "tables/generic_table.html",
+            data=filas,
+            data_keys=filas.keys(),
+            resource="equipo",
+            current_user=current_user,
+        )
+
+    consulta = request.args.get("consulta")
+
+    if consulta:
+        pagina = Equipo.search_of_member(
+            current_user.id,
+            consulta,
+            pagina=request.args.get("pagina"),
+            cantidad=request.args.get("cantidad"),
+        )
+    else:
+        pagina = Equipo.page_of_member(
+            current_user.id,
+            despues=request.args.get("despues"),
+            antes=request.args.get("antes"),
+            cantidad=request.args.get("cantidad"),
+        )
+    data = pagina.filas
 
     if data:
         data_keys = data[0].keys()
@@ -100,6 +129,8 @@ def user_teams(username):
         data=data,
         data_keys=data_keys,
         resource="equipo",
+        pagina=pagina,
+        consulta=consulta,
         current_user=current_user,
     )
 
@@ -109,8 +140,36 @@ def user_teams(username):
 @need_authorization
 def user_tasks(username):
     current_user = Usuario.get_by_username_or_mail(username)
-    current_user.load_own_resources()
-    data = current_user.tareas
+
+    # ?todos=1 lista todos los registros sin cargarlos en memoria
+    if request.args.get("todos"):
+        filas = Ticket_Tarea.stream_of_asigned_user(current_user.id)
+
+        return stream_page(
+            "tables/generic_table.html",
+            data=filas,
+            data_keys=filas.keys(),
+            resource="tarea",
+            current_user=current_user,
+        )
+
+    consulta = request.args.get("consulta")
+
+    if consulta:
+        pagina = Ticket_Tarea.search_of_asigned_user(
+            current_user.id,
+            consulta,
+            pagina=request.args.get("pagina"),
+            cantidad=request.args.get("cantidad"),
+        )
+    else:
+        pagina = Ticket_Tarea.page_of_asigned_user(
+            current_user.id,
+            despues=request.args.get("despues"),
+            antes=request.args.get("antes"),
+            cantidad=request.args.get("cantidad"),
+        )
+    data = pagina.filas
 
     if data:
         data_keys = data[0].keys()
@@ -122,5 +181,7 @@ def user_tasks(username):
         data=data,
         data_keys=data_keys,
         resource="tarea",
+        pagina=pagina,
+        consulta=consulta,
         current_user=current_user,
     )
@@ -15,7 +15,9 @@ CREATE TABLE IF NOT EXISTS proyecto(
     activo BOOLEAN NOT NULL DEFAULT true,
     presupuesto BIGINT NOT NULL DEFAULT -1,
     fecha_inicio DATE NOT NULL DEFAULT (CURRENT_DATE()),
-    fecha_finalizacion DATE NOT NULL DEFAULT '1000-01-01'
+    fecha_finalizacion DATE NOT NULL DEFAULT '1000-01-01',
+    INDEX proyecto_nombre (nombre(20)),
+    FULLTEXT INDEX proyecto_busqueda (nombre, descripcion)
 );
 -- table
 CREATE TABLE IF NOT EXISTS usuario(
@@ -27,7 +29,7 @@ CREATE TABLE IF NOT EXISTS usuario(
     telefono_prefijo INT NOT NULL,
     telefono_numero VARCHAR(30) NOT NULL,
     contrasena VARCHAR(72) NOT NULL,
-    llave_sesion VARCHAR(80) NOT NULL DEFAULT 'not_logged',
+    generacion_sesion INT NOT NULL DEFAULT 0,
     FOREIGN KEY (telefono_prefijo) REFERENCES prefijo_telefono(id) ON DELETE CASCADE
 
 );
@@ -56,6 +58,8 @@ CREATE TABLE IF NOT EXISTS equipo(
     proyecto INT NOT NULL,    /*FORANEA*/
     nombre VARCHAR(60) NOT NULL DEFAULT 'not_named',
     fecha_creacion DATE NOT NULL DEFAULT (CURRENT_DATE()),
+    INDEX equipo_nombre (nombre(20)),
+    FULLTEXT INDEX equipo_busqueda (nombre),
     FOREIGN KEY (proyecto) REFERENCES proyecto(id) ON DELETE CASCADE
 );
 -- table
@@ -83,6 +87,62 @@ CREATE TABLE IF NOT EXISTS estado(
     nombre VARCHAR(25) UNIQUE NOT NULL
 );
 -- table
+CREATE TABLE IF NOT EXISTS version_referencia(
+    id TINYINT PRIMARY KEY,
+    version INT NOT NULL DEFAULT 0
+);
+-- table
+CREATE TABLE IF NOT EXISTS version_proyecto(
+    proyecto INT PRIMARY KEY, /*FORANEA*/
+    version INT NOT NULL DEFAULT 0,
+    modificado DATETIME NOT NULL DEFAULT (UTC_TIMESTAMP()), /*UTC*/
+    FOREIGN KEY (proyecto) REFERENCES proyecto(id) ON DELETE CASCADE
+);
+-- table
+CREATE TABLE IF NOT EXISTS contadores_proyecto(
+    proyecto INT PRIMARY KEY, /*FORANEA*/
+    equipos INT NOT NULL DEFAULT 0,
+    tareas INT NOT NULL DEFAULT 0,
+    integrantes INT NOT NULL DEFAULT 0,
+    FOREIGN KEY (proyecto) REFERENCES proyecto(id) ON DELETE CASCADE
+);
+-- table
+CREATE TABLE IF NOT EXISTS contadores_equipo(
+    equipo INT PRIMARY KEY, /*FORANEA*/
+    proyecto INT NOT NULL, /*FORANEA*/
+    tareas INT NOT NULL DEFAULT 0,
+    miembros INT NOT NULL DEFAULT 0,
+    INDEX contadores_equipo_proyecto (proyecto),
+    FOREIGN KEY (equipo) REFERENCES equipo(id) ON DELETE CASCADE,
+    FOREIGN KEY (proyecto) REFERENCES proyecto(id) ON DELETE CASCADE
+);
+-- table
+CREATE TABLE IF NOT EXISTS contadores_estado(
+    proyecto INT NOT NULL, /*FORANEA*/
+    estado INT NOT NULL, /*FORANEA*/
+    tareas INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (proyecto, estado),
+    FOREIGN KEY (proyecto) REFERENCES proyecto(id) ON DELETE CASCADE,
+    FOREIGN KEY (estado) REFERENCES estado(id) ON DELETE CASCADE
+);
+-- table
+CREATE TABLE IF NOT EXISTS historial_proyecto(
+    proyecto INT NOT NULL, /*FORANEA*/
+    dia DATE NOT NULL, /*UTC*/
+    tipo ENUM('total', 'estado', 'equipo', 'miembro') NOT NULL,
+    clave INT NOT NULL, /*estado, equipo o usuario; 0 en total*/
+    total INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (proyecto, dia, tipo, clave),
+    FOREIGN KEY (proyecto) REFERENCES proyecto(id) ON DELETE CASCADE
+);
+-- table
+CREATE TABLE IF NOT EXISTS historial_version(
+    proyecto INT PRIMARY KEY, /*FORANEA*/
+    version INT NOT NULL,
+    dia DATE NOT NULL, /*UTC*/
+    FOREIGN KEY (proyecto) REFERENCES proyecto(id) ON DELETE CASCADE
+);
+-- table
 CREATE TABLE IF NOT EXISTS ticket_tarea(
     id INT AUTO_INCREMENT PRIMARY KEY,
     proyecto INT NOT NULL,    /*FORANEA*/
@@ -94,6 +154,8 @@ CREATE TABLE IF NOT EXISTS ticket_tarea(
     fecha_asignacion DATE NOT NULL DEFAULT '1000-01-01',
     fecha_limite DATE NOT NULL DEFAULT '1000-01-01',
     fecha_finalizacion DATE NOT NULL DEFAULT '1000-01-01',
+    INDEX tarea_nombre (nombre(20)),
+    FULLTEXT INDEX tarea_busqueda (nombre, descripcion),
     FOREIGN KEY (proyecto) REFERENCES proyecto(id) ON DELETE CASCADE,
     FOREIGN KEY (equipo) REFERENCES equipo(id) ON DELETE CASCADE,
     FOREIGN KEY (estado) REFERENCES estado(id) ON DELETE CASCADE
@@ -109,4 +171,26 @@ CREATE TABLE IF NOT EXISTS asignacion_tarea(
     FOREIGN KEY (ticket_tarea) REFERENCES ticket_tarea(id) ON DELETE CASCADE,
     FOREIGN KEY (miembro) REFERENCES miembros_equipo(id) ON DELETE CASCADE,
     CONSTRAINT asignacion UNIQUE (ticket_tarea, miembro)
+);
+-- table
+CREATE TABLE IF NOT EXISTS acceso_usuario(
+    usuario INT NOT NULL, /*FORANEA*/
+    tipo_recurso ENUM('proyecto', 'equipo', 'tarea') NOT NULL,
+    recurso INT NOT NULL,
+    puede_modificar BOOLEAN NOT NULL DEFAULT false,
+    PRIMARY KEY (usuario, tipo_recurso, recurso),
+    INDEX acceso_recurso (tipo_recurso, recurso),
+    FOREIGN KEY (usuario) REFERENCES usuario(id) ON DELETE CASCADE
+);
+-- table
+CREATE TABLE IF NOT EXISTS sesion(
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    token_hash CHAR(64) NOT NULL UNIQUE,
+    usuario INT NOT NULL, /*FORANEA*/
+    creada DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    ultimo_acceso DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    expira DATETIME NOT NULL,
+    INDEX sesion_usuario (usuario),
+    INDEX sesion_expira (expira),
+    FOREIGN KEY (usuario) REFERENCES usuario(id) ON DELETE CASCADE
 );
\ No newline at end of file
@@ -23,47 +23,120 @@ function get_resources() {
   return queried_resources;
 }
 
+let metrics_bundle = null;
+
+// respuestas JSON guardadas con su ETag, se revalidan en cada visita
+// y el servidor responde 304 sin cuerpo si no cambiaron
+async function fetch_revalidated(url) {
+  const key = "api_cache:" + url;
+  let cached = null;
+
+  try {
+    cached = JSON.parse(localStorage.getItem(key));
+  } catch (error) {
+    localStorage.removeItem(key);
+  }
+
+  const headers = {};
+  if (cached !== null && cached.etag) {
+    headers["If-None-Match"] = cached.etag;
+  }
+
+  // el cache http del navegador queda afuera, la revalidación es esta
+  const response = await fetch(new Request(url, { headers, cache: "no-store" }));
+
+  if (response.status === 304 && cached !== null) {
+    return cached.data;
+  }
+
+  const data = await response.json();
+  const etag = response.headers.get("ETag");
+
+  if (response.ok && etag) {
+    try {
+      localStorage.setItem(key, JSON.stringify({ etag, data }));
+    } catch (error) {
+      // sin espacio en localStorage, solo se pierde la cache
+    }
+  } else {
+    localStorage.removeItem(key);
+  }
+
+  return data;
+}
+
+// todas las métricas del proyecto en una sola consulta, compartida
+// por los gráficos y las estadísticas de la página
+function get_metrics_bundle() {
+  if (metrics_bundle === null) {
+    metrics_bundle = fetch_revalidated(api_url + "/metrics_bundle").catch(
+      (error) => {
+        metrics_bundle = null;
+        throw error;
+      }
+    );
+  }
+
+  return metrics_bundle;
+}
+
 async function get_tasks_per_team() {
-  const request = new Request(api_url + "/tareas_equipo");
-  const response = await fetch(request).then((response) => response.json());
+  const response = await get_metrics_bundle();
 
-  return response;
+  return response["tareas_equipo"];
 }
 
 async function get_members_per_team() {
-  const request = new Request(api_url + "/miembros_equipo");
-  const response = await fetch(request).then((response) => response.json());
+  const response = await get_metrics_bundle();
 
-  return response;
+  return response["miembros_equipo"];
 }
 
 async function get_tasks_per_state() {
-  const request = new Request(api_url + "/estado_tareas");
-  const response = await fetch(request).then((response) => response.json());
+  const response = await get_metrics_bundle();
 
-  return response;
+  return response["estado_tareas"];
 }
 
 async function get_project_gral_stats() {
-  const request = new Request(api_url + "/gral_stats");
-  const response = await fetch(request).then((response) => response.json());
+  const response = await get_metrics_bundle();
 
-  return response;
+  return response["gral_stats"];
 }
 
 async function get_user_stats_project() {
-  const request = new Request(api_url + "/user_stats");
-  const response = await fetch(request).then((response) => response.json());
+  const response = await get_metrics_bundle();
+
+  // show_user_stats modifica el objeto recibido
+  return { ...response["user_stats"] };
+}
+
+// fotos diarias de las métricas entre desde y hasta (AAAA-MM-DD),
+// sin ellas los últimos 30 días
+async function get_project_history(desde = null, hasta = null) {
+  const params = new URLSearchParams();
+
+  if (desde !== null) {
+    params.set("desde", desde);
+  }
+  if (hasta !== null) {
+    params.set("hasta", hasta);
+  }
+
+  const response = await fetch(api_url + "/historial?" + params.toString());
 
-  return response;
+  return response.json();
 }
 
 export {
+  fetch_revalidated,
+  get_metrics_bundle,
   get_members_per_team,
   get_tasks_per_state,
   get_tasks_per_team,
   split_url,
   get_resources,
   get_project_gral_stats,
+  get_project_history,
   get_user_stats_project,
 };
@@ -3,12 +3,14 @@ import {
   get_tasks_per_state,
   get_members_per_team,
   get_project_gral_stats,
+  get_project_history,
   get_user_stats_project,
 } from "./api_consult.mjs";
 
 const mpt = document.getElementById("mpt-btn");
 const tpt = document.getElementById("tpt-btn");
 const tps = document.getElementById("tps-btn");
+const hist = document.getElementById("hist-btn");
 const textdata = document.getElementById("textdata");
 
 async function task_x_team_chart() {
@@ -32,7 +34,46 @@ async function task_x_state_chart() {
   make_chart(label, data);
 }
 
-function make_chart(label, data) {
+async function history_chart() {
+  const data = await get_project_history();
+  const states = data.nombres.estado;
+  const completed = Object.keys(states).find(
+    (id) => states[id] === "Completada"
+  );
+
+  const datasets = Object.keys(states).map((id) => ({
+    label: "Tareas " + states[id].toLowerCase(),
+    data: data.dias.map((day) => day.estado[id] || 0),
+  }));
+
+  // burndown: tareas que faltan completar cada día
+  datasets.unshift({
+    label: "Tareas sin completar",
+    data: data.dias.map((day) => day.total - (day.estado[completed] || 0)),
+    borderWidth: 3,
+  });
+
+  const canvas = new_canvas();
+
+  new Chart(canvas, {
+    type: "line",
+    data: {
+      labels: data.dias.map((day) => day.dia),
+      datasets: datasets,
+    },
+    options: {
+      scales: {
+        y: {
+          beginAtZero: true,
+          ticks: { precision: 0 },
+        },
+      },
+    },
+  });
+  canvas.scrollIntoView({ behavior: "smooth" });
+}
+
+function new_canvas() {
   const chart_container = document.getElementById("chart-cointainer");
   const canvas = document.createElement("canvas");
   canvas.setAttribute("id", "barchart");
@@ -40,6 +81,12 @@ function make_chart(label, data) {
   chart_container.removeChild(chart_container.querySelector("#barchart"));
   chart_container.appendChild(canvas);
 
+  return canvas;
+}
+
+function make_chart(label, data) {
+  const canvas = new_canvas();
+
   new Chart(document.getElementById("barchart"), {
     type: "bar",
     data: {
@@ -194,6 +241,7 @@ document.addEventListener("DOMContentLoaded", async function () {
   mpt.addEventListener("click", members_x_team_chart);
   tpt.addEventListener("click", task_x_team_chart);
   tps.addEventListener("click", task_x_state_chart);
+  hist.addEventListener("click", history_chart);
   show_project_gral_stats();
   show_user_stats();
 });
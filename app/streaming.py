@@ -0,0 +1,42 @@
+""" Respuestas HTML en streaming.
+    Para listados sin límite de filas: el template se envía a medida que
+    se renderiza, leyendo las filas de a lotes (ver StreamedRows), por
+    lo que la memoria y el tiempo hasta el primer byte no dependen de
+    la cantidad de filas.
+"""
+from typing import Iterator
+
+from flask import Response, stream_template
+
+import app.config as config
+
+# bytes aproximados por escritura al socket, jinja genera un fragmento
+# por cada expresión del template
+STREAM_CHUNK_SIZE: int = getattr(config, "STREAM_CHUNK_SIZE", 16 * 1024)
+
+
+def _buffered(chunks: Iterator[str], size: int) -> Iterator[str]:
+    buffer: list[str] = []
+    buffered = 0
+
+    for chunk in chunks:
+        buffer.append(chunk)
+        buffered += len(chunk)
+
+        if buffered >= size:
+            yield "".join(buffer)
+            buffer.clear()
+            buffered = 0
+
+    if buffer:
+        yield "".join(buffer)
+
+
+def stream_page(template_name: str, **context) -> Response:
+    """Como render_template, pero la respuesta se envía en streaming
+    con flask.stream_template, agrupando los fragmentos en escrituras
+    de STREAM_CHUNK_SIZE."""
+
+    chunks = stream_template(template_name, **context)
+
+    return Response(_buffered(chunks, STREAM_CHUNK_SIZE), mimetype="text/html")
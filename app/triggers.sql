@@ -0,0 +1,83 @@
+-- los comentarios 'trigger' permiten a db.crear_triggers separar cada CREATE TRIGGER,
+-- que reemplaza al trigger del mismo nombre si ya existe
+-- los borrados en cascada no disparan triggers, los descuentan los metodos de
+-- app.models.contadores que acompañan cada borrado
+-- cada escritura de ticket_tarea o asignacion_tarea incrementa la version del
+-- proyecto (ver app.models.version_proyecto y app.models.historial)
+-- trigger
+CREATE TRIGGER ticket_tarea_insert AFTER INSERT ON ticket_tarea
+FOR EACH ROW
+BEGIN
+    UPDATE contadores_proyecto SET tareas = tareas + 1 WHERE proyecto = NEW.proyecto;
+    UPDATE contadores_equipo SET tareas = tareas + 1 WHERE equipo = NEW.equipo;
+    -- sin fila el estado no tiene tareas en el proyecto, salvo que el
+    -- proyecto no tenga contadores
+    INSERT INTO contadores_estado(proyecto, estado, tareas)
+    SELECT proyecto, NEW.estado, 1 FROM contadores_proyecto WHERE proyecto = NEW.proyecto
+    ON DUPLICATE KEY UPDATE tareas = contadores_estado.tareas + 1;
+    INSERT INTO version_proyecto(proyecto, version) VALUES (NEW.proyecto, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1, modificado = UTC_TIMESTAMP();
+END;
+-- trigger
+CREATE TRIGGER ticket_tarea_update AFTER UPDATE ON ticket_tarea
+FOR EACH ROW
+BEGIN
+    IF OLD.proyecto <> NEW.proyecto THEN
+        UPDATE contadores_proyecto SET tareas = tareas - 1 WHERE proyecto = OLD.proyecto;
+        UPDATE contadores_proyecto SET tareas = tareas + 1 WHERE proyecto = NEW.proyecto;
+    END IF;
+
+    IF OLD.equipo <> NEW.equipo THEN
+        UPDATE contadores_equipo SET tareas = tareas - 1 WHERE equipo = OLD.equipo;
+        UPDATE contadores_equipo SET tareas = tareas + 1 WHERE equipo = NEW.equipo;
+    END IF;
+
+    IF OLD.proyecto <> NEW.proyecto OR OLD.estado <> NEW.estado THEN
+        UPDATE contadores_estado SET tareas = tareas - 1
+        WHERE proyecto = OLD.proyecto AND estado = OLD.estado;
+        INSERT INTO contadores_estado(proyecto, estado, tareas)
+        SELECT proyecto, NEW.estado, 1 FROM contadores_proyecto WHERE proyecto = NEW.proyecto
+        ON DUPLICATE KEY UPDATE tareas = contadores_estado.tareas + 1;
+    END IF;
+
+    -- cualquier cambio de la tarea cambia las respuestas del proyecto
+    INSERT INTO version_proyecto(proyecto, version) VALUES (NEW.proyecto, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1, modificado = UTC_TIMESTAMP();
+
+    IF OLD.proyecto <> NEW.proyecto THEN
+        INSERT INTO version_proyecto(proyecto, version) VALUES (OLD.proyecto, 1)
+        ON DUPLICATE KEY UPDATE version = version + 1, modificado = UTC_TIMESTAMP();
+    END IF;
+END;
+-- trigger
+CREATE TRIGGER ticket_tarea_delete AFTER DELETE ON ticket_tarea
+FOR EACH ROW
+BEGIN
+    UPDATE contadores_proyecto SET tareas = tareas - 1 WHERE proyecto = OLD.proyecto;
+    UPDATE contadores_equipo SET tareas = tareas - 1 WHERE equipo = OLD.equipo;
+    UPDATE contadores_estado SET tareas = tareas - 1
+    WHERE proyecto = OLD.proyecto AND estado = OLD.estado;
+    INSERT INTO version_proyecto(proyecto, version) VALUES (OLD.proyecto, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1, modificado = UTC_TIMESTAMP();
+END;
+-- trigger
+CREATE TRIGGER asignacion_tarea_insert AFTER INSERT ON asignacion_tarea
+FOR EACH ROW
+    INSERT INTO version_proyecto(proyecto, version)
+    SELECT proyecto, 1 FROM ticket_tarea WHERE id = NEW.ticket_tarea
+    ON DUPLICATE KEY UPDATE
+    version = version_proyecto.version + 1, modificado = UTC_TIMESTAMP();
+-- trigger
+CREATE TRIGGER asignacion_tarea_update AFTER UPDATE ON asignacion_tarea
+FOR EACH ROW
+    INSERT INTO version_proyecto(proyecto, version)
+    SELECT proyecto, 1 FROM ticket_tarea WHERE id IN (OLD.ticket_tarea, NEW.ticket_tarea)
+    ON DUPLICATE KEY UPDATE
+    version = version_proyecto.version + 1, modificado = UTC_TIMESTAMP();
+-- trigger
+CREATE TRIGGER asignacion_tarea_delete AFTER DELETE ON asignacion_tarea
+FOR EACH ROW
+    INSERT INTO version_proyecto(proyecto, version)
+    SELECT proyecto, 1 FROM ticket_tarea WHERE id = OLD.ticket_tarea
+    ON DUPLICATE KEY UPDATE
+    version = version_proyecto.version + 1, modificado = UTC_TIMESTAMP();
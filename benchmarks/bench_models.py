@@ -0,0 +1,138 @@
+""" Microbenchmark de carga de filas y modelos.
+    Compara, por cada 100k filas, el tiempo y la memoria retenida de:
+        - filas como diccionarios (cursor dictionary=True) contra Fila
+          respaldada por la tupla del cursor
+        - modelos con __dict__ contra los modelos con __slots__
+    No usa la base de datos: un cursor falso entrega filas sintéticas
+    con las columnas de las consultas reales.
+
+    uso: python -m benchmarks.bench_models [filas]
+"""
+import datetime
+import gc
+import sys
+import time
+import tracemalloc
+
+from app.models import Proyecto
+from app.models.filas import Fila, column_map, fetch_models
+
+LISTING_COLUMNS = (
+    "id proyecto",
+    "nombre proyecto",
+    "publico",
+    "activo",
+    "presupuesto",
+    "fecha inicio",
+    "fecha finalizacion",
+    "id integrante",
+    "rol",
+)
+
+PROYECTO_COLUMNS = (
+    "id",
+    "nombre",
+    "descripcion",
+    "es_publico",
+    "activo",
+    "presupuesto",
+    "fecha_inicio",
+    "fecha_finalizacion",
+)
+
+
+class FakeCursor:
+    def __init__(self, column_names: tuple[str, ...], rows: list[tuple]) -> None:
+        self.column_names = column_names
+        self._rows = rows
+
+    def fetchall(self) -> list[tuple]:
+        return self._rows
+
+
+# mismo constructor que Proyecto pero con __dict__ por instancia
+ProyectoConDict = type("ProyectoConDict", (), {"__init__": Proyecto.__init__})
+
+
+def listing_rows(n: int) -> list[tuple]:
+    start = datetime.date(2024, 1, 1)
+    return [
+        (i, f"proyecto {i}", i % 2, 1, 1000 * i, start, start, i, "gerente")
+        for i in range(n)
+    ]
+
+
+def proyecto_rows(n: int) -> list[tuple]:
+    start = datetime.date(2024, 1, 1)
+    return [
+        (i, f"proyecto {i}", "descripción", i % 2, 1, 1000 * i, start, start)
+        for i in range(n)
+    ]
+
+
+def measure(build) -> tuple[float, int]:
+    """Segundos y bytes retenidos por el resultado de build()."""
+
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+
+    result = build()
+
+    elapsed = time.perf_counter() - started
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    del result
+
+    return elapsed, retained
+
+
+def report(name: str, n: int, elapsed: float, retained: int) -> None:
+    per_100k = 100_000 / n
+    print(
+        f"{name:<28} {elapsed * per_100k * 1000:>9.1f} ms"
+        f" {retained * per_100k / 2**20:>9.1f} MiB"
+        f" {retained / n:>7.0f} B/fila"
+    )
+
+
+def main(n: int = 100_000) -> None:
+    listing = listing_rows(n)
+    proyectos = proyecto_rows(n)
+
+    print(f"{n} filas, valores por cada 100k filas")
+    print(f"{'':<28} {'tiempo':>12} {'memoria':>13} {'':>12}")
+
+    # las tuplas del cursor existen en ambos casos, solo se mide lo que
+    # se construye a partir de ellas
+    report(
+        "filas dict",
+        n,
+        *measure(lambda: [dict(zip(LISTING_COLUMNS, row)) for row in listing]),
+    )
+    report(
+        "filas Fila",
+        n,
+        *measure(lambda: [Fila(column_map(LISTING_COLUMNS), row) for row in listing]),
+    )
+    report(
+        "Proyecto con __dict__",
+        n,
+        *measure(
+            lambda: [
+                ProyectoConDict(**dict(zip(PROYECTO_COLUMNS, row))) for row in proyectos
+            ]
+        ),
+    )
+    report(
+        "Proyecto con __slots__",
+        n,
+        *measure(
+            lambda: fetch_models(FakeCursor(PROYECTO_COLUMNS, proyectos), Proyecto)
+        ),
+    )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
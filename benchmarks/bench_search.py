@@ -0,0 +1,212 @@
+""" Benchmark de la búsqueda de tareas sobre la base de pruebas.
+    La primera vez siembra en promanager_test un proyecto con 100 equipos
+    y 1M de tareas (nombres y descripciones con palabras de frecuencia
+    decreciente), de las que 1 de cada 10 está asignada al usuario
+    "bench_busqueda". Después mide la latencia de la consulta de
+    búsqueda de ese usuario (la misma que Ticket_Tarea.search_of_asigned_user)
+    para consultas frecuentes, raras, de varias palabras y cortas (que
+    usan el índice de prefijo), y la compara con LIKE '%palabra%'.
+
+    uso: python -m benchmarks.bench_search [tareas] [repeticiones]
+"""
+import random
+import statistics
+import sys
+import time
+
+from app.db import crear_indices_busqueda, crear_schemas, get_connection
+from app.models.busqueda import search_page
+from app.models.ticket_tarea import _TASKS_OF_USER
+from benchmarks.semillas import reference_ids
+
+BENCH_USER = "bench_busqueda"
+TEAMS = 100
+BATCH = 10_000
+
+# vocabulario sintético: la palabra i aparece con frecuencia ~ 1/(i+1)
+_rng = random.Random(0)
+VOCABULARY = [
+    "".join(_rng.choice("bcdfglmnprstv") + _rng.choice("aeiou") for _ in range(3))
+    for _ in range(2_000)
+]
+WEIGHTS = [1 / (i + 1) for i in range(len(VOCABULARY))]
+
+QUERIES = {
+    "frecuente": VOCABULARY[0],
+    "rara": VOCABULARY[1_500],
+    "dos palabras": f"{VOCABULARY[3]} {VOCABULARY[40]}",
+    "prefijo": VOCABULARY[10][:4],
+    "corta (LIKE prefijo)": VOCABULARY[5][:2],
+    "sin resultados": "zzzzzz",
+}
+
+
+def _words(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choices(VOCABULARY, WEIGHTS, k=n))
+
+
+def seed(tasks: int) -> int:
+    """Sembrar los datos si el usuario del benchmark no existe.
+
+    Returns:
+        int: id del usuario del benchmark.
+    """
+
+    cnx = get_connection(connect_test_db=True)
+    cursor = cnx.cursor()
+
+    cursor.execute("SELECT id FROM usuario WHERE username = %s", (BENCH_USER,))
+    row = cursor.fetchone()
+
+    if row is not None:
+        cursor.close()
+        cnx.close()
+        return row[0]
+
+    prefix, project_role, team_role, status = reference_ids(cursor)
+
+    cursor.execute(
+        """INSERT INTO usuario (username, email, telefono_prefijo,
+        telefono_numero, contrasena) VALUES (%s, %s, %s, %s, %s)""",
+        (BENCH_USER, f"{BENCH_USER}@example.com", prefix, "0", "-"),
+    )
+    user_id = cursor.lastrowid
+
+    cursor.execute(
+        "INSERT INTO proyecto (nombre, descripcion) VALUES (%s, %s)",
+        ("benchmark", "datos del benchmark de búsqueda"),
+    )
+    project_id = cursor.lastrowid
+
+    cursor.execute(
+        """INSERT INTO integrantes_proyecto (proyecto, integrante, rol)
+        VALUES (%s, %s, %s)""",
+        (project_id, user_id, project_role),
+    )
+    participant_id = cursor.lastrowid
+
+    teams, members = [], []
+
+    for n in range(TEAMS):
+        cursor.execute(
+            "INSERT INTO equipo (proyecto, nombre) VALUES (%s, %s)",
+            (project_id, f"equipo {n}"),
+        )
+        teams.append(cursor.lastrowid)
+
+        cursor.execute(
+            "INSERT INTO miembros_equipo (equipo, miembro, rol) VALUES (%s, %s, %s)",
+            (cursor.lastrowid, participant_id, team_role),
+        )
+        members.append(cursor.lastrowid)
+
+    cnx.commit()
+
+    rng = random.Random(1)
+
+    for start in range(0, tasks, BATCH):
+        rows = [
+            (project_id, teams[n % TEAMS], _words(rng, 3), status, _words(rng, 12))
+            for n in range(start, min(start + BATCH, tasks))
+        ]
+        cursor.executemany(
+            """INSERT INTO ticket_tarea (proyecto, equipo, nombre, estado,
+            descripcion) VALUES (%s, %s, %s, %s, %s)""",
+            rows,
+        )
+        first_task = cursor.lastrowid
+
+        # executemany inserta el lote en una sola sentencia, los ids
+        # son consecutivos a partir de lastrowid
+        cursor.executemany(
+            "INSERT INTO asignacion_tarea (ticket_tarea, miembro) VALUES (%s, %s)",
+            [
+                (first_task + offset, members[(start + offset) % TEAMS])
+                for offset in range(0, len(rows), 10)
+            ],
+        )
+        cnx.commit()
+
+        print(f"sembradas {start + len(rows)} tareas", end="\r", flush=True)
+
+    print()
+
+    cursor.close()
+    cnx.close()
+
+    return user_id
+
+
+def timings(run, repetitions: int) -> tuple[float, float, int]:
+    """p50 y p95 en ms y filas de la última ejecución."""
+
+    samples, rows = [], 0
+
+    for _ in range(repetitions):
+        started = time.perf_counter()
+        rows = run()
+        samples.append((time.perf_counter() - started) * 1000)
+
+    samples.sort()
+
+    return (
+        statistics.median(samples),
+        samples[max(0, int(len(samples) * 0.95) - 1)],
+        rows,
+    )
+
+
+def main(tasks: int = 1_000_000, repetitions: int = 20) -> None:
+    crear_schemas(test_db=True)
+    crear_indices_busqueda(test_db=True)
+    user_id = seed(tasks)
+
+    cnx = get_connection(connect_test_db=True)
+    cursor = cnx.cursor()
+
+    def search(consulta: str):
+        return lambda: len(
+            search_page(
+                cursor,
+                _TASKS_OF_USER,
+                (user_id,),
+                match_columns="t.nombre, t.descripcion",
+                name_column="t.nombre",
+                id_column="t.id",
+                consulta=consulta,
+            ).filas
+        )
+
+    def like_anywhere(consulta: str):
+        def run():
+            cursor.execute(
+                _TASKS_OF_USER.format(
+                    keyset="AND (t.nombre LIKE %s OR t.descripcion LIKE %s)"
+                )
+                + " ORDER BY t.id LIMIT 51",
+                (user_id, f"%{consulta}%", f"%{consulta}%"),
+            )
+            return len(cursor.fetchall())
+
+        return run
+
+    print(f"{tasks} tareas, {repetitions} repeticiones por consulta")
+    print(f"{'':<24} {'p50':>9} {'p95':>9} {'filas':>6}")
+
+    for name, consulta in QUERIES.items():
+        for label, run in (
+            (name, search(consulta)),
+            ("  LIKE '%...%'", like_anywhere(consulta)),
+        ):
+            p50, p95, rows = timings(run, repetitions)
+            print(f"{label:<24} {p50:>6.1f} ms {p95:>6.1f} ms {rows:>6}")
+
+    cursor.close()
+    cnx.close()
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 20,
+    )
@@ -0,0 +1,137 @@
+""" Datos sintéticos para la base de pruebas (promanager_test), usados
+    por los benchmarks y los tests que necesitan tablas de un tamaño
+    realista.
+"""
+from mysql.connector.cursor import CursorBase
+
+from app.db import get_connection
+
+
+def _first_id(cursor: CursorBase, table: str, insert: str, params: tuple) -> int:
+    """Id de la primera fila de una tabla de referencia, insertándola
+    con insert y params si está vacía."""
+
+    cursor.execute(f"SELECT id FROM {table} ORDER BY id LIMIT 1")
+    row = cursor.fetchone()
+
+    if row is not None:
+        return row[0]
+
+    cursor.execute(insert, params)
+    return cursor.lastrowid
+
+
+def reference_ids(cursor: CursorBase) -> tuple[int, int, int, int]:
+    """Ids de un prefijo telefónico, un rol de proyecto, un rol de equipo
+    y un estado."""
+
+    return (
+        _first_id(
+            cursor,
+            "prefijo_telefono",
+            "INSERT INTO prefijo_telefono (prefijo, pais) VALUES (%s, %s)",
+            ("+54", "Argentina"),
+        ),
+        _first_id(
+            cursor,
+            "roles_proyecto",
+            "INSERT INTO roles_proyecto (nombre) VALUES (%s)",
+            ("gerente",),
+        ),
+        _first_id(
+            cursor,
+            "roles_equipo",
+            "INSERT INTO roles_equipo (nombre) VALUES (%s)",
+            ("lider",),
+        ),
+        _first_id(
+            cursor, "estado", "INSERT INTO estado (nombre) VALUES (%s)", ("pendiente",)
+        ),
+    )
+
+
+def sembrar_proyectos(
+    proyectos: int = 200,
+    integrantes: int = 3,
+    equipos: int = 4,
+    tareas: int = 50,
+) -> int:
+    """Insertar proyectos completos (integrantes, equipos con sus
+    miembros y tareas asignadas), para verificar planes de consulta.
+
+    Returns:
+        int: cantidad de tareas insertadas.
+    """
+
+    cnx = get_connection(connect_test_db=True)
+    cursor = cnx.cursor()
+
+    prefix, project_role, team_role, status = reference_ids(cursor)
+
+    cursor.execute("SELECT COALESCE(MAX(id), 0) FROM usuario")
+    run = cursor.fetchone()[0]
+    inserted = 0
+
+    for n in range(proyectos):
+        cursor.execute(
+            "INSERT INTO proyecto (nombre) VALUES (%s)", (f"semilla {run}-{n}",)
+        )
+        project_id = cursor.lastrowid
+        participants = []
+
+        for i in range(integrantes):
+            username = f"s{run}_{n}_{i}"
+            cursor.execute(
+                """INSERT INTO usuario (username, email, telefono_prefijo,
+                telefono_numero, contrasena) VALUES (%s, %s, %s, %s, %s)""",
+                (username, f"{username}@example.com", prefix, "0", "-"),
+            )
+            cursor.execute(
+                """INSERT INTO integrantes_proyecto (proyecto, integrante, rol)
+                VALUES (%s, %s, %s)""",
+                (project_id, cursor.lastrowid, project_role),
+            )
+            participants.append(cursor.lastrowid)
+
+        for e in range(equipos):
+            cursor.execute(
+                "INSERT INTO equipo (proyecto, nombre) VALUES (%s, %s)",
+                (project_id, f"equipo {e}"),
+            )
+            team_id = cursor.lastrowid
+            members = []
+
+            for participant in participants:
+                cursor.execute(
+                    """INSERT INTO miembros_equipo (equipo, miembro, rol)
+                    VALUES (%s, %s, %s)""",
+                    (team_id, participant, team_role),
+                )
+                members.append(cursor.lastrowid)
+
+            for t in range(tareas // equipos):
+                cursor.execute(
+                    """INSERT INTO ticket_tarea (proyecto, equipo, nombre, estado)
+                    VALUES (%s, %s, %s, %s)""",
+                    (project_id, team_id, f"tarea {t}", status),
+                )
+                cursor.execute(
+                    """INSERT INTO asignacion_tarea (ticket_tarea, miembro)
+                    VALUES (%s, %s)""",
+                    (cursor.lastrowid, members[t % len(members)]),
+                )
+                inserted += 1
+
+        cnx.commit()
+
+    # estadísticas de índices actualizadas para el optimizador
+    cursor.execute(
+        """ANALYZE TABLE proyecto, usuario, integrantes_proyecto, equipo,
+        miembros_equipo, ticket_tarea, asignacion_tarea"""
+    )
+    cursor.fetchall()
+
+    cursor.close()
+    cnx.close()
+
+    return inserted
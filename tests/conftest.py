@@ -0,0 +1,49 @@
+import pytest
+
+
+@pytest.fixture(scope="session")
+def test_db() -> None:
+    """Base de pruebas (promanager_test) con sus tablas creadas. Los
+    tests que la usan se saltean si no hay un servidor MySQL."""
+
+    import mysql.connector
+
+    from app.db import crear_base_de_datos, crear_schemas
+
+    try:
+        crear_base_de_datos(test_db=True)
+    except mysql.connector.Error as exception:
+        pytest.skip(f"no hay un servidor MySQL disponible: {exception}")
+
+    crear_schemas(test_db=True)
+
+
+@pytest.fixture
+def cursor(test_db):
+    """Cursor sobre la base de pruebas, lo escrito con él se descarta."""
+
+    from app.db import get_connection
+
+    cnx = get_connection(connect_test_db=True)
+    cursor = cnx.cursor()
+
+    yield cursor
+
+    cnx.rollback()
+    cursor.close()
+    cnx.close()
+
+
+@pytest.fixture
+def equipo(cursor) -> tuple[int, int]:
+    """(proyecto, equipo) nuevos, sin tareas y con contadores."""
+
+    from app.models import Contadores
+    from benchmarks.semillas import sembrar_proyectos
+
+    sembrar_proyectos(proyectos=1, equipos=1, tareas=0)
+    Contadores.rebuild_all(test_db=True)
+
+    cursor.execute("SELECT proyecto, id FROM equipo ORDER BY id DESC LIMIT 1")
+
+    return cursor.fetchone()
@@ -0,0 +1,45 @@
+import pytest
+
+# sin app/config.py no hay servidor al que conectarse
+pytest.importorskip("app.config", reason="falta app/config.py")
+
+from benchmarks.semillas import reference_ids
+
+
+def _counts(cursor, project_id: int, team_id: int) -> tuple[int, int, dict]:
+    cursor.execute(
+        "SELECT tareas FROM contadores_proyecto WHERE proyecto = %s", (project_id,)
+    )
+    project = cursor.fetchone()[0]
+    cursor.execute("SELECT tareas FROM contadores_equipo WHERE equipo = %s", (team_id,))
+    team = cursor.fetchone()[0]
+    cursor.execute(
+        "SELECT estado, tareas FROM contadores_estado WHERE proyecto = %s",
+        (project_id,),
+    )
+
+    return project, team, {state: total for state, total in cursor.fetchall() if total}
+
+
+def test_task_writes_keep_the_counters(cursor, equipo):
+    project_id, team_id = equipo
+    *_, pending = reference_ids(cursor)
+    cursor.execute("INSERT IGNORE INTO estado (nombre) VALUES ('finalizada')")
+    cursor.execute("SELECT id FROM estado WHERE id <> %s LIMIT 1", (pending,))
+    done = cursor.fetchone()[0]
+
+    cursor.execute(
+        """INSERT INTO ticket_tarea (proyecto, equipo, nombre, estado)
+        VALUES (%s, %s, 'tarea', %s), (%s, %s, 'otra tarea', %s)""",
+        (project_id, team_id, pending, project_id, team_id, pending),
+    )
+    assert _counts(cursor, project_id, team_id) == (2, 2, {pending: 2})
+
+    cursor.execute(
+        "UPDATE ticket_tarea SET estado = %s WHERE nombre = 'tarea' AND equipo = %s",
+        (done, team_id),
+    )
+    assert _counts(cursor, project_id, team_id) == (2, 2, {pending: 1, done: 1})
+
+    cursor.execute("DELETE FROM ticket_tarea WHERE equipo = %s", (team_id,))
+    assert _counts(cursor, project_id, team_id) == (0, 0, {})
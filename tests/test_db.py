@@ -0,0 +1,65 @@
+import pytest
+
+# sin app/config.py no se puede importar app.db
+pytest.importorskip("app.config", reason="falta app/config.py")
+
+import mysql.connector.pooling as pooling
+from mysql.connector import DatabaseError, InterfaceError, errorcode
+from mysql.connector.connection import MySQLConnection
+
+import app.db as db
+from app.db import ConnectionPool
+
+
+class ServidorCaido(MySQLConnection):
+    """Conexión sin socket cuya reconexión falla, como con el servidor
+    caído."""
+
+    def is_connected(self) -> bool:
+        return True
+
+    def reconnect(self, *args, **kwargs) -> None:
+        raise InterfaceError("servidor caído")
+
+
+@pytest.fixture
+def pool(monkeypatch) -> ConnectionPool:
+    monkeypatch.setattr(pooling, "connect", lambda **config: ServidorCaido())
+
+    return ConnectionPool(
+        pool_name="test_recycle", pool_size=2, timeout=0.1, recycle=60, user="x"
+    )
+
+
+def test_failed_recycle_keeps_the_connection_in_the_pool(pool):
+    # conexiones que superaron POOL_RECYCLE
+    for cnx in pool._cnx_queue.queue:
+        cnx.pool_created_at = 0
+
+    before = pool.stats()
+
+    for _ in range(pool.pool_size + 1):
+        with pytest.raises(InterfaceError):
+            pool.get_connection()
+
+    assert pool.stats() == before
+    assert pool._cnx_queue.qsize() == pool.pool_size
+
+
+class ColumnasExistentes:
+    """Conexión y cursor de una base que ya tiene las columnas."""
+
+    def cursor(self) -> "ColumnasExistentes":
+        return self
+
+    def execute(self, statement: str) -> None:
+        raise DatabaseError(errno=errorcode.ER_DUP_FIELDNAME)
+
+    def close(self) -> None:
+        pass
+
+
+def test_existing_columns_are_skipped(monkeypatch):
+    monkeypatch.setattr(db, "get_connection", lambda **kwargs: ColumnasExistentes())
+
+    assert db.agregar_columnas() == 0
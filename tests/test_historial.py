@@ -0,0 +1,40 @@
+import pytest
+
+# sin app/config.py no hay servidor al que conectarse
+pytest.importorskip("app.config", reason="falta app/config.py")
+
+from app.models import HistorialProyecto
+from app.models.historial import today
+from benchmarks.semillas import reference_ids
+
+
+def _snapshot_total(cursor, project_id: int) -> int | None:
+    cursor.execute(
+        """SELECT total FROM historial_proyecto
+        WHERE proyecto = %s AND dia = %s AND tipo = 'total'""",
+        (project_id, today()),
+    )
+    row = cursor.fetchone()
+
+    return row[0] if row is not None else None
+
+
+def test_rollup_snapshots_task_progress(cursor, equipo):
+    project_id, team_id = equipo
+    *_, state = reference_ids(cursor)
+
+    HistorialProyecto.rollup(test_db=True)
+    cursor.execute("COMMIT")
+    assert _snapshot_total(cursor, project_id) == 0
+
+    # la tarea se escribe por fuera de los modelos, como todas
+    cursor.execute(
+        """INSERT INTO ticket_tarea (proyecto, equipo, nombre, estado)
+        VALUES (%s, %s, 'tarea', %s)""",
+        (project_id, team_id, state),
+    )
+    cursor.execute("COMMIT")
+
+    HistorialProyecto.rollup(test_db=True)
+    cursor.execute("COMMIT")
+    assert _snapshot_total(cursor, project_id) == 1
@@ -0,0 +1,38 @@
+import pytest
+
+# sin app/config.py no hay servidor al que conectarse
+pytest.importorskip("app.config", reason="falta app/config.py")
+
+from app.db import get_connection
+from app.models import Contadores
+from app.models.metricas import MetricasProyecto
+from benchmarks.semillas import sembrar_proyectos
+
+# proyectos mínimos para que el optimizador elija los planes de una
+# base en uso y no recorra tablas chicas por ser chicas
+PROYECTOS = 200
+
+
+@pytest.fixture(scope="module")
+def proyectos_sembrados(test_db) -> None:
+    cnx = get_connection(connect_test_db=True)
+    cursor = cnx.cursor()
+    cursor.execute("SELECT COUNT(*) FROM proyecto")
+    existing = cursor.fetchone()[0]
+    cursor.close()
+    cnx.close()
+
+    if existing < PROYECTOS:
+        sembrar_proyectos(proyectos=PROYECTOS - existing)
+
+    Contadores.rebuild_all(test_db=True)
+
+
+def test_metric_queries_do_not_scan_full_tables(proyectos_sembrados):
+    sample = MetricasProyecto.explain_sample(test_db=True)
+
+    assert sample is not None
+
+    project_id, username, scans = sample
+
+    assert scans == [], f"proyecto {project_id}, usuario {username}"
@@ -0,0 +1,60 @@
+import pytest
+
+# sin app/config.py no hay servidor al que conectarse
+pytest.importorskip("app.config", reason="falta app/config.py")
+
+from benchmarks.semillas import reference_ids
+
+
+def _version(cursor, project_id: int) -> int:
+    cursor.execute(
+        "SELECT version FROM version_proyecto WHERE proyecto = %s", (project_id,)
+    )
+    row = cursor.fetchone()
+
+    return row[0] if row is not None else 0
+
+
+def test_task_writes_bump_the_project_version(cursor, equipo):
+    project_id, team_id = equipo
+    *_, state = reference_ids(cursor)
+    start = _version(cursor, project_id)
+
+    cursor.execute(
+        """INSERT INTO ticket_tarea (proyecto, equipo, nombre, estado)
+        VALUES (%s, %s, 'tarea', %s)""",
+        (project_id, team_id, state),
+    )
+    assert _version(cursor, project_id) == start + 1
+
+    cursor.execute(
+        "UPDATE ticket_tarea SET nombre = 'renombrada' WHERE equipo = %s", (team_id,)
+    )
+    assert _version(cursor, project_id) == start + 2
+
+    cursor.execute("DELETE FROM ticket_tarea WHERE equipo = %s", (team_id,))
+    assert _version(cursor, project_id) == start + 3
+
+
+def test_assignment_writes_bump_the_project_version(cursor, equipo):
+    project_id, team_id = equipo
+    *_, state = reference_ids(cursor)
+
+    cursor.execute(
+        """INSERT INTO ticket_tarea (proyecto, equipo, nombre, estado)
+        VALUES (%s, %s, 'tarea', %s)""",
+        (project_id, team_id, state),
+    )
+    task_id = cursor.lastrowid
+    cursor.execute("SELECT id FROM miembros_equipo WHERE equipo = %s", (team_id,))
+    member_id = cursor.fetchall()[0][0]
+    start = _version(cursor, project_id)
+
+    cursor.execute(
+        "INSERT INTO asignacion_tarea (ticket_tarea, miembro) VALUES (%s, %s)",
+        (task_id, member_id),
+    )
+    assert _version(cursor, project_id) == start + 1
+
+    cursor.execute("DELETE FROM asignacion_tarea WHERE ticket_tarea = %s", (task_id,))
+    assert _version(cursor, project_id) == start + 2